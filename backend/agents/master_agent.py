@@ -1,33 +1,24 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import SystemMessage
 from graph.state import AgentState
+from graph.memory import add_reply
+from services.llm_gateway import llm_gateway
+from agents.templates import use_templates, render
 from services.data_services import crm_service, customer_service  
-import os
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",  
-    temperature=0.7,
-    groq_api_key=os.getenv("GROQ_API_KEY")
-)
 
-
-def master_agent_node(state: AgentState) -> AgentState:    
-    user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
-    
+async def master_agent_node(state: AgentState) -> AgentState:    
     if state["loan_status"] == "initial":
-        crm_data = crm_service.verify_customer(state["phone"])
+        crm_data = await crm_service.averify_customer(state["phone"])
         
         if not crm_data:
-            state["messages"].append(
-                AIMessage(content="I'm sorry, I couldn't find your details in our system. Please contact customer support.")
-            )
+            add_reply(state, "I'm sorry, I couldn't find your details in our system. Please contact customer support.")
             state["workflow_complete"] = True
             return state
         
-        customer = customer_service.get_customer_by_name(crm_data.name)
+        customer = await customer_service.aget_customer_by_name(crm_data.name)
         
         state["customer_name"] = crm_data.name
         state["verified_phone"] = crm_data.phone
@@ -41,7 +32,10 @@ def master_agent_node(state: AgentState) -> AgentState:
             state["credit_score"] = customer.credit_score
             state["pre_approved_limit"] = customer.pre_approved_limit
         
-        greeting_prompt = f"""You are a friendly loan officer at a bank in India.
+        if use_templates():
+            greeting = render("greeting", name=crm_data.name)
+        else:
+            greeting_prompt = f"""You are a friendly loan officer at a bank in India.
 
 Customer Details:
 - Name: {crm_data.name}
@@ -54,10 +48,11 @@ Write a warm, professional greeting (2-3 sentences):
 3. Ask what loan amount they need
 
 Keep it natural and conversational."""
+            
+            response = await llm_gateway.ainvoke("master", [SystemMessage(content=greeting_prompt)])
+            greeting = response.content
         
-        response = llm.invoke([SystemMessage(content=greeting_prompt)])
-        
-        state["messages"].append(AIMessage(content=response.content))
+        add_reply(state, greeting)
         state["loan_status"] = "negotiating"
         state["current_agent"] = "sales"
         
@@ -78,7 +73,7 @@ Your sanction letter is ready for download!
 
 Thank you for choosing our services! 🙏"""
         
-        state["messages"].append(AIMessage(content=success_message))
+        add_reply(state, success_message)
         state["workflow_complete"] = True
         return state
     
@@ -99,7 +94,7 @@ For assistance, contact our support team.
 
 Thank you for your interest."""
         
-        state["messages"].append(AIMessage(content=rejection_message))
+        add_reply(state, rejection_message)
         state["workflow_complete"] = True
         return state
     
@@ -119,7 +114,7 @@ Max file size: 5MB
 
 Once uploaded, approval is instant! ⚡"""
         
-        state["messages"].append(AIMessage(content=salary_message))
+        add_reply(state, salary_message)
         return state
     
     else:
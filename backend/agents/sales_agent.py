@@ -1,60 +1,29 @@
-from langchain_groq import ChatGroq
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import SystemMessage
 from graph.state import AgentState
+from graph.memory import add_reply
+from services.llm_gateway import llm_gateway
+from agents.templates import use_templates, render
 from services.data_services import offer_service
-import os
-import re
-
-llm = ChatGroq(
-        model="llama-3.1-8b-instant",  
-    temperature=0.7,
-    groq_api_key=os.getenv("GROQ_API_KEY")
-)
+from services.pricing import default_rate
+from utils.emi import emi_exact
+from utils.loan_terms import parse_loan_terms
+from agents.sanction_generator import speculate_sanction_letter
 
 
 def extract_loan_details(user_message: str, state: AgentState) -> dict:
     """
-    Extract loan amount and tenure from user message using regex and LLM.
+    Extract loan amount and tenure from the user message (see utils.loan_terms).
     
     Returns:
         dict with 'amount', 'tenure', 'has_info'
     """
-    # extract numbers from message
-    amounts = re.findall(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakhs?|lacs?|k|thousand)?', user_message.lower())
-    tenures = re.findall(r'(\d+)\s*(?:months?|years?|yr)', user_message.lower())
-    
-    result = {
-        'amount': None,
-        'tenure': None,
-        'has_info': False
-    }
-    
-    if amounts:
-        amount_str = amounts[0].replace(',', '')
-        amount = float(amount_str)
-        
-        # Handle lakhs/thousands
-        if 'lakh' in user_message.lower() or 'lac' in user_message.lower():
-            amount = amount * 100000
-        elif 'k' in user_message.lower() or 'thousand' in user_message.lower():
-            amount = amount * 1000
-        elif amount < 1000:  # Assume lakhs if small number
-            amount = amount * 100000
-        
-        result['amount'] = amount
-        result['has_info'] = True
-    
-    if tenures:
-        tenure = int(tenures[0])
-        if 'year' in user_message.lower() or 'yr' in user_message.lower():
-            tenure = tenure * 12
-        result['tenure'] = tenure
-        result['has_info'] = True
-    
+    expect_tenure = bool(state.get('requested_loan_amount')) and not state.get('requested_tenure')
+    result = parse_loan_terms(user_message, expect_tenure=expect_tenure)
+    result['has_info'] = result['amount'] is not None or result['tenure'] is not None
     return result
 
 
-def sales_agent_node(state: AgentState) -> AgentState:
+async def sales_agent_node(state: AgentState) -> AgentState:
     """
     Sales Agent - Negotiates loan terms.
     
@@ -62,13 +31,12 @@ def sales_agent_node(state: AgentState) -> AgentState:
     1. Check if we have loan details already
     2. If not, extract from user message
     3. Ask for missing information (amount or tenure)
-    4. Once both collected, get pre-approved offer
-    5. Present offer and move to verification
+    4. Once both collected, hand over to pricing (price_offer_node), which
+       runs alongside verification and the credit check
     """
     
     # Get last user message
-    user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
-    last_user_message = user_messages[-1].content if user_messages else ""
+    last_user_message = state.get("last_user_message") or ""
     
     # Extract loan details from message
     extracted = extract_loan_details(last_user_message, state)
@@ -89,13 +57,15 @@ def sales_agent_node(state: AgentState) -> AgentState:
     
     # If missing information, ask for it
     if missing_info:
+        summary = state.get("conversation_summary")
+        earlier = f"\nEarlier in this conversation:\n{summary}\n" if summary else ""
         prompt = f"""You are a sales agent helping with a personal loan.
 
 Customer: {state['customer_name']}
 Pre-approved limit: ₹{state['pre_approved_limit']:,.0f}
 
 Missing information: {', '.join(missing_info)}
-
+{earlier}
 User said: "{last_user_message}"
 
 Generate a friendly response that:
@@ -105,18 +75,70 @@ Generate a friendly response that:
 
 Keep it conversational and brief (2-3 sentences)."""
         
-        response = llm.invoke([SystemMessage(content=prompt)])
-        state["messages"].append(AIMessage(content=response.content))
+        response = await llm_gateway.ainvoke("sales", [SystemMessage(content=prompt)])
+        add_reply(state, response.content)
         return state
 
-    offer = offer_service.get_offer(state['phone'])
+    return state
+
+
+async def price_offer_node(state: AgentState) -> dict:
+    """
+    Price the agreed amount and tenure: pre-approved offer rate (or the
+    default rate for the tenure), EMI, and the offer summary for the customer.
+    
+    Runs in parallel with verification and the credit check, so it returns
+    only the fields it sets; the summary goes to branch_replies["offer"].
+    If the loan will clearly be approved, the sanction letter starts
+    rendering now rather than after underwriting.
+    """
+    offer = await offer_service.aget_offer(state['phone'])
     
-  
     if offer:
         base_rate = offer.interest_rate
     else:
         # Default rates based on tenure
-        if state['requested_tenure'] <= 12:
-            base_rate = 10.5
-        elif state['requested_tenure'] <= 24:
-            base_rate = 11.5
\ No newline at end of file
+        base_rate = default_rate(state['requested_tenure'])
+    
+    # Standard reducing-balance EMI, rounded to paise
+    principal = state['requested_loan_amount']
+    tenure = state['requested_tenure']
+    calculated_emi = float(emi_exact(principal, base_rate, tenure))
+    
+    if use_templates():
+        offer_message = render(
+            "offer_summary",
+            name=state['customer_name'],
+            amount=principal,
+            tenure=tenure,
+            rate=base_rate,
+            emi=calculated_emi
+        )
+    else:
+        offer_prompt = f"""You are a sales agent presenting a personal loan offer.
+
+Customer: {state['customer_name']}
+Loan Amount: ₹{principal:,.0f}
+Tenure: {tenure} months
+Interest Rate: {base_rate}% p.a.
+Monthly EMI: ₹{calculated_emi:,.0f}
+
+Generate a brief message (2-3 sentences):
+1. Summarise the offer above
+2. Say you are now verifying their KYC details
+
+Keep it conversational and positive."""
+        
+        response = await llm_gateway.ainvoke("sales", [SystemMessage(content=offer_prompt)])
+        offer_message = response.content
+    
+    priced = {**state, "negotiated_interest_rate": base_rate, "calculated_emi": calculated_emi}
+    return {
+        "negotiated_interest_rate": base_rate,
+        "calculated_emi": calculated_emi,
+        "speculative_letter": speculate_sanction_letter(priced),
+        "branch_replies": {"offer": offer_message},
+    }
+
+
+__all__ = ["sales_agent_node", "price_offer_node", "extract_loan_details"]
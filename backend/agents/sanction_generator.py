@@ -1,170 +1,102 @@
-from langchain_core.messages import AIMessage
 from graph.state import AgentState
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib import colors
-from pathlib import Path
+from services.pdf_renderer import pdf_renderer
+from services.letter_store import letter_store
+from services.rules_engine import underwriting_policy
+from services.speculative_letters import speculative_letters
+from agents.underwritting_agent import underwriting_features
+from utils.sanction_pdf import render_sanction_letter
+from utils.emi import amortization_schedule_exact
 from datetime import datetime
-import uuid
+from typing import Dict, Optional
+
+
+def letter_fields(state: AgentState) -> Dict:
+    """Plain, picklable letter data for the renderer (dates are fixed here, not in the worker)."""
+    now = datetime.now()
+    # Totals come from the booked schedule, whose last instalment absorbs
+    # the paise rounding, rather than EMI x tenure.
+    schedule = amortization_schedule_exact(
+        state['requested_loan_amount'], state['negotiated_interest_rate'], state['requested_tenure']
+    )
+    return {
+        "date": now.strftime("%B %d, %Y"),
+        "reference": f"SL/{state['customer_id']}/{now.strftime('%Y%m%d')}",
+        "customer_name": state['customer_name'],
+        "address": state['verified_address'],
+        "phone": state['verified_phone'],
+        "customer_id": state['customer_id'],
+        "amount": state['requested_loan_amount'],
+        "rate": state['negotiated_interest_rate'],
+        "tenure": state['requested_tenure'],
+        "emi": state['calculated_emi'],
+        "total_interest": float(sum(row['interest'] for row in schedule)),
+        "total_repayment": float(sum(row['emi'] for row in schedule)),
+    }
 
 
 def generate_sanction_letter_pdf(state: AgentState) -> str:
     """
-    Generate a professional loan sanction letter PDF.
+    Generate a professional loan sanction letter PDF in the calling thread.
     
     Returns:
-        Path to generated PDF file
+        Location of the letter in the letter store
     """
-    # Create output directory
-    output_dir = Path(__file__).parent.parent / "data" / "sanction_letters"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    filename = f"sanction_letter_{state['customer_id']}_{uuid.uuid4().hex[:8]}.pdf"
-    filepath = output_dir / filename
-    
-    doc = SimpleDocTemplate(str(filepath), pagesize=A4)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#1a237e'),
-        spaceAfter=30,
-        alignment=1  # Center
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=12,
-        textColor=colors.HexColor('#1a237e'),
-        spaceAfter=12
-    )
-    
-    story.append(Paragraph("LOAN SANCTION LETTER", title_style))
-    story.append(Spacer(1, 0.2 * inch))
-    
-    date_str = datetime.now().strftime("%B %d, %Y")
-    ref_number = f"SL/{state['customer_id']}/{datetime.now().strftime('%Y%m%d')}"
-    
-    story.append(Paragraph(f"<b>Date:</b> {date_str}", styles['Normal']))
-    story.append(Paragraph(f"<b>Reference No:</b> {ref_number}", styles['Normal']))
-    story.append(Spacer(1, 0.3 * inch))
-    
-    story.append(Paragraph("BORROWER DETAILS", heading_style))
-    customer_data = [
-        ['Name:', state['customer_name']],
-        ['Address:', state['verified_address']],
-        ['Phone:', state['verified_phone']],
-        ['Customer ID:', str(state['customer_id'])]
-    ]
-    
-    customer_table = Table(customer_data, colWidths=[2*inch, 4*inch])
-    customer_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
-    story.append(customer_table)
-    story.append(Spacer(1, 0.3 * inch))
-    
-    story.append(Paragraph("LOAN DETAILS", heading_style))
-    
-    total_repayment = state['calculated_emi'] * state['requested_tenure']
-    total_interest = total_repayment - state['requested_loan_amount']
-    
-    loan_data = [
-        ['Loan Amount:', f"₹{state['requested_loan_amount']:,.2f}"],
-        ['Interest Rate:', f"{state['negotiated_interest_rate']}% per annum"],
-        ['Loan Tenure:', f"{state['requested_tenure']} months"],
-        ['Monthly EMI:', f"₹{state['calculated_emi']:,.2f}"],
-        ['Total Interest:', f"₹{total_interest:,.2f}"],
-        ['Total Repayment:', f"₹{total_repayment:,.2f}"],
-    ]
-    
-    loan_table = Table(loan_data, colWidths=[2*inch, 4*inch])
-    loan_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f5f5f5')),
-    ]))
-    story.append(loan_table)
-    story.append(Spacer(1, 0.3 * inch))
-    
-    # Terms and conditions
-    story.append(Paragraph("TERMS & CONDITIONS", heading_style))
-    
-    terms = [
-        "This sanction is valid for 30 days from the date of issue.",
-        "The loan is subject to verification of all submitted documents.",
-        "EMI payments must be made on or before the due date each month.",
-        "Prepayment charges: 2% of outstanding principal (if prepaid before 12 months).",
-        "Late payment charges: 2% per month on overdue amount.",
-        "The bank reserves the right to recall the loan in case of default.",
-    ]
-    
-    for i, term in enumerate(terms, 1):
-        story.append(Paragraph(f"{i}. {term}", styles['Normal']))
-        story.append(Spacer(1, 0.1 * inch))
-    
-    story.append(Spacer(1, 0.3 * inch))
-    
-    congrats_style = ParagraphStyle(
-        'Congrats',
-        parent=styles['Normal'],
-        fontSize=11,
-        textColor=colors.HexColor('#2e7d32'),
-        spaceAfter=12
-    )
-    story.append(Paragraph(
-        "Congratulations on your loan approval! We look forward to serving you.",
-        congrats_style
-    ))
-    
-    story.append(Spacer(1, 0.3 * inch))
-    
-    story.append(Paragraph("<b>Authorized Signatory</b>", styles['Normal']))
-    story.append(Paragraph("Loan Department", styles['Normal']))
-    story.append(Paragraph("CredSaathi Bank", styles['Normal']))
-    
-    doc.build(story)
+    digest = letter_store.put(render_sanction_letter(letter_fields(state)))
+    return letter_store.location(digest)
+
+
+def speculate_sanction_letter(state: AgentState) -> Optional[str]:
+    """
+    Start rendering the sanction letter before underwriting has run, if the
+    current policy already approves the loan on what is known (priced, no
+    salary slip needed); see services.speculative_letters.
     
-    return str(filepath)
+    Returns:
+        Key of the speculative render for state['speculative_letter'], or None
+    """
+    if underwriting_policy.current().evaluate(underwriting_features(state)).decision != 'approved':
+        return None
+    return speculative_letters.start(letter_fields(state))
 
 
-def sanction_generator_node(state: AgentState) -> AgentState:
+async def sanction_generator_node(state: AgentState) -> dict:
     """
     Sanction Letter Generator Agent.
     
-    Generates PDF sanction letter for approved loans.
-    """
+    Generates PDF sanction letter for approved loans. ReportLab is
+    synchronous and CPU-bound, so the build runs in the renderer's
+    process pool to keep the event loop free for other sessions.
     
-    pdf_path = generate_sanction_letter_pdf(state)
+    Runs in parallel with the approval message, so it returns only the
+    fields it sets; its message goes to branch_replies["sanction"]. A
+    letter pre-rendered by speculate_sanction_letter is used if its fields
+    still match.
+    """
     
-    state['sanction_letter_generated'] = True
-    state['sanction_letter_path'] = pdf_path
+    fields = letter_fields(state)
+    # Usually already rendered while pricing, KYC and underwriting ran
+    pdf = await speculative_letters.take(state.get('speculative_letter'), fields)
+    if pdf is None:
+        pdf = await pdf_renderer.render(fields)
+    digest = await letter_store.aput(pdf)
     
     # Inform user
     message = f"""Your loan sanction letter has been generated successfully!
 
  Document: Sanction Letter
- Reference: SL/{state['customer_id']}/{datetime.now().strftime('%Y%m%d')}
+ Reference: {fields['reference']}
 
 You can download your sanction letter from the link below."""
     
-    state["messages"].append(AIMessage(content=message))
-    
-    state['loan_status'] = 'approved'
-    state['workflow_complete'] = True
-    
-    return state
+    return {
+        "sanction_letter_generated": True,
+        "sanction_letter_id": digest,
+        "sanction_letter_path": letter_store.location(digest),
+        "speculative_letter": None,
+        "loan_status": "approved",
+        "workflow_complete": True,
+        "branch_replies": {"sanction": message},
+    }
 
 
-__all__ = ["sanction_generator_node"]
\ No newline at end of file
+__all__ = ["sanction_generator_node", "speculate_sanction_letter", "generate_sanction_letter_pdf", "letter_fields"]
\ No newline at end of file
@@ -0,0 +1,75 @@
+import itertools
+import os
+from typing import Callable, Dict, List
+
+# "template": deterministic steps (greeting, offer summary, KYC confirmation,
+# approvals) are rendered from the templates below and only open-ended turns
+# go to the LLM. "llm": every step is generated by the LLM, as before.
+RESPONSE_MODE = os.getenv("RESPONSE_MODE", "template")
+
+TEMPLATES: Dict[str, List[str]] = {
+    "greeting": [
+        "Hello {name}, welcome to CredSaathi! 👋 I can help you with a personal loan today. "
+        "How much would you like to borrow?",
+        "Hi {name}, great to have you here! I'm your CredSaathi loan officer and I can set up "
+        "a personal loan for you. What loan amount do you have in mind?",
+        "Welcome {name}! 😊 I'd be happy to help you with a personal loan. "
+        "To get started, how much do you need?",
+    ],
+    "offer_summary": [
+        "Here's your offer, {name}: ₹{amount:,.0f} for {tenure} months at {rate}% p.a., "
+        "with a monthly EMI of ₹{emi:,.0f}. I'm now verifying your KYC details.",
+        "Great choice, {name}! A loan of ₹{amount:,.0f} over {tenure} months at {rate}% p.a. "
+        "works out to an EMI of ₹{emi:,.0f} per month. Let me quickly verify your KYC details.",
+    ],
+    "kyc_verified": [
+        "✅ KYC verified, {name}. Your phone and address match our records. "
+        "I'm now proceeding with your credit check.",
+        "Thanks {name}, your KYC details have been verified against our records. "
+        "Moving on to the credit check now.",
+    ],
+    "kyc_failed": [
+        "{name}, we couldn't fully verify your KYC details from our records, "
+        "but I'm proceeding with the credit check.",
+    ],
+    "instant_approval": [
+        "🎉 Great news, {name}! With an excellent credit score of {credit_score}/900, your loan of "
+        "₹{amount:,.0f} is within your pre-approved limit and has been approved instantly. "
+        "Your sanction letter is being generated.",
+        "Congratulations {name}! Your credit score of {credit_score}/900 qualifies you for instant "
+        "approval of ₹{amount:,.0f}. I'm generating your sanction letter now.",
+    ],
+    "salary_approval": [
+        "✅ Salary verification complete, {name}. Your EMI of ₹{emi:,.0f} is {emi_ratio:.1f}% of your "
+        "monthly salary, well within affordable limits, so your loan is approved. "
+        "Your sanction letter is being generated.",
+        "Thanks {name}, we've verified your salary. An EMI of ₹{emi:,.0f} ({emi_ratio:.1f}% of your "
+        "income) is comfortably affordable and your loan is approved. Generating your sanction letter now.",
+    ],
+}
+
+# Templates are compiled once into bound str.format callables, each paired
+# with a round-robin cursor over its variants.
+_COMPILED: Dict[str, List[Callable[..., str]]] = {
+    name: [variant.format for variant in variants] for name, variants in TEMPLATES.items()
+}
+_CURSORS = {name: itertools.cycle(range(len(variants))) for name, variants in _COMPILED.items()}
+
+
+def use_templates() -> bool:
+    return RESPONSE_MODE == "template"
+
+
+def render(template: str, /, **fields) -> str:
+    """
+    Render the next variant of a template.
+
+    Args:
+        template: key in TEMPLATES (e.g. "kyc_verified")
+        fields: values for the template's placeholders
+    """
+    variants = _COMPILED[template]
+    return variants[next(_CURSORS[template])](**fields)
+
+
+__all__ = ["RESPONSE_MODE", "TEMPLATES", "use_templates", "render"]
@@ -1,80 +1,102 @@
-from langchain_groq import ChatGroq
-from langchain_core.messages import AIMessage, SystemMessage
+import math
+
+from langchain_core.messages import SystemMessage
 from graph.state import AgentState
+from services.llm_gateway import llm_gateway
+from agents.templates import use_templates, render
 from services.data_services import credit_bureau_service
-import os
+from services.rules_engine import underwriting_policy
+from services.speculative_letters import speculative_letters
+
 
-llm = ChatGroq(
-    model="llama-3.1-70b-versatile",
-    temperature=0.7,
-    groq_api_key=os.getenv("GROQ_API_KEY")
-)
+def underwriting_features(state: AgentState) -> dict:
+    """Policy inputs (see config/underwriting_policy.yaml) derived from the session state."""
+    limit = state.get('pre_approved_limit')
+    salary = state.get('monthly_salary')
+    has_salary = bool(state.get('salary_slip_uploaded') and salary)
+    return {
+        'credit_score': state.get('credit_score') or 0,
+        'loan_ratio': state['requested_loan_amount'] / limit if limit else math.inf,
+        'emi_share': (state.get('calculated_emi') or 0) / salary if has_salary else math.inf,
+        'has_salary': 1 if has_salary else 0,
+    }
 
 
-def underwriting_agent_node(state: AgentState) -> AgentState:
+async def underwriting_agent_node(state: AgentState) -> AgentState:
     """
     Underwriting Agent - Credit check and eligibility validation.
-    
-    Business Rules:
-    1. Credit score must be >= 700 (reject if less)
-    2. If loan amount <= pre-approved limit → Instant approval
-    3. If loan amount <= 2x pre-approved limit → Need salary slip
-       - Approve only if EMI <= 50% of monthly salary
-    4. If loan amount > 2x pre-approved limit → Reject
+
+    The eligibility rules (minimum credit score, pre-approved limit ratios,
+    EMI cap) live in config/underwriting_policy.yaml and are evaluated by
+    services.rules_engine; the policy version and matching rule are kept in
+    state['underwriting_decision']. On approval, the message to the customer
+    (approval_message_node) and the sanction letter are produced in parallel.
     """
-    
+
     if not state['credit_score']:
-        credit_score = credit_bureau_service.get_credit_score(state['phone'])
+        credit_score = await credit_bureau_service.aget_credit_score(state['phone'])
         state['credit_score'] = credit_score
-    
-    # Rule 1: Check credit score
-    if state['credit_score'] < 700:
+
+    features = underwriting_features(state)
+    decision = underwriting_policy.current().decide(features, {
+        'amount': state['requested_loan_amount'],
+        'pre_approved_limit': state.get('pre_approved_limit') or 0,
+        'emi': state.get('calculated_emi') or 0,
+        'monthly_salary': state.get('monthly_salary') or 0,
+    })
+    state['underwriting_decision'] = decision
+
+    if decision['decision'] != 'approved':
+        # A letter pre-rendered on a predicted approval won't be needed
+        speculative_letters.discard(state.get('speculative_letter'))
+        state['speculative_letter'] = None
+
+    if decision['decision'] == 'rejected':
         state['loan_status'] = 'rejected'
-        state['rejection_reason'] = f"Credit score ({state['credit_score']}/900) is below minimum requirement of 700"
+        state['rejection_reason'] = decision['reason']
         state['current_agent'] = 'master'
         state['workflow_complete'] = True
         return state
-    
-    # Calculate loan ratio
-    loan_ratio = state['requested_loan_amount'] / state['pre_approved_limit']
-    
-    # Rule 2: Instant approval if within pre-approved limit
-    if loan_ratio <= 1.0:
-        state['loan_status'] = 'approved'
-        state['current_agent'] = 'sanction'
-        
-        approval_prompt = f"""You are an underwriting agent approving a loan.
 
-Customer: {state['customer_name']}
-Credit Score: {state['credit_score']}/900 
-Loan Amount: ₹{state['requested_loan_amount']:,.0f}
-Pre-approved Limit: ₹{state['pre_approved_limit']:,.0f}
+    if decision['decision'] == 'salary_slip_required':
+        state['loan_status'] = 'awaiting_salary_slip'
+        state['salary_slip_required'] = True
+        state['current_agent'] = 'master'
+        return state
 
-Status: INSTANT APPROVAL (within pre-approved limit)
+    state['loan_status'] = 'approved'
+    state['current_agent'] = 'sanction'
+    return state
 
-Generate a brief approval message (2-3 sentences):
-1. Congratulate them on the approval
-2. Mention their excellent credit score
-3. Say the sanction letter is being generated
 
-Keep it enthusiastic and professional."""
-        
-        response = llm.invoke([SystemMessage(content=approval_prompt)])
-        state["messages"].append(AIMessage(content=response.content))
-        
-        return state
-    
-    elif loan_ratio <= 2.0:
-        # Check if salary slip already uploaded
-        if state['salary_slip_uploaded'] and state['monthly_salary']:
-            # Verify EMI is within 50% of salary
-            emi_ratio = (state['calculated_emi'] / state['monthly_salary']) * 100
-            
-            if emi_ratio <= 50:
-                state['loan_status'] = 'approved'
-                state['current_agent'] = 'sanction'
-                
-                approval_prompt = f"""You are an underwriting agent approving a loan after salary verification.
+async def credit_check_node(state: AgentState) -> dict:
+    """
+    Fetch the bureau credit score if the customer record didn't carry one.
+    Runs in parallel with pricing and verification, ahead of underwriting.
+    """
+    if state['credit_score']:
+        return {}
+    return {"credit_score": await credit_bureau_service.aget_credit_score(state['phone'])}
+
+
+async def approval_message_node(state: AgentState) -> dict:
+    """
+    Approval message for the customer, written while the sanction letter
+    is rendered in parallel; it goes to branch_replies["approval"].
+    """
+
+    if state['underwriting_decision']['message'] == 'salary_approval':
+        emi_ratio = underwriting_features(state)['emi_share'] * 100
+
+        if use_templates():
+            return {"branch_replies": {"approval": render(
+                "salary_approval",
+                name=state['customer_name'],
+                emi=state['calculated_emi'],
+                emi_ratio=emi_ratio
+            )}}
+
+        approval_prompt = f"""You are an underwriting agent approving a loan after salary verification.
 
 Customer: {state['customer_name']}
 Monthly Salary: ₹{state['monthly_salary']:,.0f}
@@ -87,30 +109,33 @@ Generate a brief approval message (2-3 sentences):
 1. Confirm salary verification is complete
 2. Mention EMI is well within affordable limits
 3. Say the sanction letter is being generated"""
-                
-                response = llm.invoke([SystemMessage(content=approval_prompt)])
-                state["messages"].append(AIMessage(content=response.content))
-                
-                return state
-            else:
-                state['loan_status'] = 'rejected'
-                state['rejection_reason'] = f"Monthly EMI (₹{state['calculated_emi']:,.0f}) exceeds 50% of your salary (₹{state['monthly_salary']:,.0f})"
-                state['current_agent'] = 'master'
-                state['workflow_complete'] = True
-                return state
-        else:
-            # Need salary slip upload
-            state['loan_status'] = 'awaiting_salary_slip'
-            state['salary_slip_required'] = True
-            state['current_agent'] = 'master'
-            return state
-    
     else:
-        state['loan_status'] = 'rejected'
-        state['rejection_reason'] = f"Requested amount (₹{state['requested_loan_amount']:,.0f}) exceeds 2x pre-approved limit (₹{state['pre_approved_limit'] * 2:,.0f})"
-        state['current_agent'] = 'master'
-        state['workflow_complete'] = True
-        return state
+        if use_templates():
+            return {"branch_replies": {"approval": render(
+                "instant_approval",
+                name=state['customer_name'],
+                credit_score=state['credit_score'],
+                amount=state['requested_loan_amount']
+            )}}
+
+        approval_prompt = f"""You are an underwriting agent approving a loan.
+
+Customer: {state['customer_name']}
+Credit Score: {state['credit_score']}/900 
+Loan Amount: ₹{state['requested_loan_amount']:,.0f}
+Pre-approved Limit: ₹{state['pre_approved_limit']:,.0f}
+
+Status: INSTANT APPROVAL (within pre-approved limit)
+
+Generate a brief approval message (2-3 sentences):
+1. Congratulate them on the approval
+2. Mention their excellent credit score
+3. Say the sanction letter is being generated
+
+Keep it enthusiastic and professional."""
+
+    response = await llm_gateway.ainvoke("underwriting", [SystemMessage(content=approval_prompt)])
+    return {"branch_replies": {"approval": response.content}}
 
 
-_all_ = ["underwriting_agent_node"]
\ No newline at end of file
+__all__ = ["underwriting_agent_node", "credit_check_node", "approval_message_node", "underwriting_features"]
@@ -1,16 +1,10 @@
-from langchain_groq import ChatGroq
-from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.messages import SystemMessage
 from graph.state import AgentState
-import os
+from services.llm_gateway import llm_gateway
+from agents.templates import use_templates, render
 
-llm = ChatGroq(
-    model="llama-3.1-8b-instant",
-    temperature=0.7,
-    groq_api_key=os.getenv("GROQ_API_KEY")
-)
 
-
-def verification_agent_node(state: AgentState) -> AgentState:
+async def verification_agent_node(state: AgentState) -> dict:
     """
     Verification Agent - Verifies KYC details.
     
@@ -18,19 +12,25 @@ def verification_agent_node(state: AgentState) -> AgentState:
     1. Check if KYC already verified
     2. Verify phone and address from CRM (already done in master agent)
     3. Inform customer about verification
-    4. Move to underwriting stage
+    
+    Runs in parallel with pricing and the credit check, so it returns only
+    the fields it sets; the message goes to branch_replies["verification"]
+    and the join node moves the application on to underwriting.
     """
     
-    if state['verified_phone'] and state['verified_address']:
-        state['kyc_verified'] = True
+    kyc_verified = state['kyc_verified'] or bool(state['verified_phone'] and state['verified_address'])
     
-    verification_prompt = f"""You are a verification agent at a bank.
+    if use_templates():
+        template = "kyc_verified" if kyc_verified else "kyc_failed"
+        message = render(template, name=state['customer_name'])
+    else:
+        verification_prompt = f"""You are a verification agent at a bank.
 
 Customer: {state['customer_name']}
 Phone: {state['verified_phone']}
 Address: {state['verified_address']}
 
-KYC Status: {'Verified' if state['kyc_verified'] else 'Failed'}
+KYC Status: {'Verified' if kyc_verified else 'Failed'}
 
 Generate a brief verification message (2-3 sentences):
 1. Confirm that KYC verification is complete
@@ -38,15 +38,11 @@ Generate a brief verification message (2-3 sentences):
 3. Say you're now proceeding with credit check
 
 Keep it professional and reassuring."""
+        
+        response = await llm_gateway.ainvoke("verification", [SystemMessage(content=verification_prompt)])
+        message = response.content
     
-    response = llm.invoke([SystemMessage(content=verification_prompt)])
-    state["messages"].append(AIMessage(content=response.content))
-    
-    # Move to underwriting
-    state["loan_status"] = "underwriting"
-    state["current_agent"] = "underwriting"
-    
-    return state
+    return {"kyc_verified": kyc_verified, "branch_replies": {"verification": message}}
 
 
 __all__ = ["verification_agent_node"]
\ No newline at end of file
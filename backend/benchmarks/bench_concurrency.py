@@ -0,0 +1,125 @@
+# benchmarks/bench_concurrency.py
+"""
+Load benchmark for the async /chat path.
+
+Drives complete loan conversations (greeting -> loan details -> approval)
+through the FastAPI app in-process, with the LLM gateway switched to the
+fake provider, which sleeps for a fixed latency. Because the graph now awaits the LLM
+instead of blocking on it, throughput should grow roughly linearly with
+concurrency until the CPU becomes the bottleneck.
+
+Run from the backend directory:
+    python benchmarks/bench_concurrency.py --latency 0.2 --levels 1 10 50 100 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("SESSION_DB_PATH", str(Path(tempfile.mkdtemp()) / "bench_sessions.db"))
+
+import httpx
+
+import main
+from services import crm_service, credit_bureau_service, customer_service, offer_service
+from services.llm_gateway import llm_gateway, FakeProvider
+
+DATA_DIR = BACKEND_DIR / "data" / "generated_data"
+
+
+def load_reference_data():
+    """
+    Prime the reference-data caches from generated_data instead of the dummy
+    server. Returns (crm, customers by name) for picking test phones.
+    """
+    with (DATA_DIR / "crm.json").open() as f:
+        crm = json.load(f)
+    with (DATA_DIR / "credit_bureau.json").open() as f:
+        credit = json.load(f)
+    with (DATA_DIR / "customers.json").open() as f:
+        customers = {c["name"]: c for c in json.load(f)}
+    with (DATA_DIR / "offers.json").open() as f:
+        offers = {o["phone"]: o for o in json.load(f)}
+
+    crm_service.cache.prime(crm)
+    credit_bureau_service.cache.prime(credit)
+    customer_service.cache.prime(customers)
+    offer_service.cache.prime(offers)
+    return crm, customers
+
+
+def approvable_phones(crm: dict, customers: dict):
+    """Phones whose customer clears the credit-score rule."""
+    return [
+        phone for phone, record in crm.items()
+        if customers.get(record["name"], {}).get("credit_score", 0) >= 700
+    ]
+
+
+async def run_conversation(client: httpx.AsyncClient, phone: str) -> None:
+    first = await client.post("/chat", json={"phone": phone, "message": "Hi, I need a loan"})
+    first.raise_for_status()
+    session_id = first.json()["session_id"]
+
+    second = await client.post("/chat", json={
+        "phone": phone,
+        "message": "50000 for 12 months",
+        "session_id": session_id,
+    })
+    second.raise_for_status()
+
+
+async def run_level(concurrency: int, conversations: int, phones: list) -> dict:
+    transport = httpx.ASGITransport(app=main.app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(i: int):
+            async with semaphore:
+                await run_conversation(client, phones[i % len(phones)])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(conversations)))
+        elapsed = time.perf_counter() - start
+
+    main.session_store.clear_cache()
+    return {
+        "concurrency": concurrency,
+        "conversations": conversations,
+        "seconds": round(elapsed, 3),
+        "conversations_per_sec": round(conversations / elapsed, 1),
+    }
+
+
+async def main_async(args):
+    llm_gateway.use_provider(FakeProvider(latency=args.latency))
+    # Measure raw concurrency: no response cache, no coalescing, no rate limiting
+    llm_gateway.cache = None
+    llm_gateway.coalesce = False
+    llm_gateway.max_concurrency = 10_000
+    llm_gateway.requests_per_minute = llm_gateway.burst = 1e9
+
+    phones = approvable_phones(*load_reference_data())
+
+    print(f"LLM latency: {args.latency * 1000:.0f} ms per call")
+    print(f"{'concurrency':>12} {'convs':>7} {'seconds':>9} {'conv/s':>9}")
+    for level in args.levels:
+        conversations = max(args.conversations, level)
+        result = await run_level(level, conversations, phones)
+        print(f"{result['concurrency']:>12} {result['conversations']:>7} "
+              f"{result['seconds']:>9} {result['conversations_per_sec']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for /chat")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--conversations", type=int, default=50, help="minimum conversations per level")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,95 @@
+# benchmarks/bench_fanout.py
+"""
+Parallel graph steps benchmark.
+
+Runs the turn that completes an application (loan details -> pricing,
+KYC and credit check -> underwriting -> approval message and sanction
+letter) through the workflow with the fake LLM provider, in LLM response
+mode so the offer, KYC and approval messages each cost one LLM call of
+--latency seconds. Prints the node timing trace of one turn (from the
+elapsed_ms of stream_workflow's node_start/node_end events), then over
+--turns turns the median wall time against the median sum of node times:
+the sum is what the turn cost when every step ran one after another.
+
+Reference data is primed from generated_data, so the data-service
+lookups don't need the dummy server.
+
+Run from the backend directory:
+    python benchmarks/bench_fanout.py --latency 0.2 --turns 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("RESPONSE_MODE", "llm")
+os.environ.setdefault("LETTER_STORE_DIR", str(Path(tempfile.mkdtemp()) / "letters"))
+
+from benchmarks.bench_concurrency import approvable_phones, load_reference_data  # noqa: E402
+from graph.streaming import stream_workflow  # noqa: E402
+from graph.workflow import apply_customer_event  # noqa: E402
+from services.llm_gateway import FakeProvider, llm_gateway  # noqa: E402
+from services.pdf_renderer import pdf_renderer  # noqa: E402
+import main  # noqa: E402
+
+
+async def run_turn(state, message: str):
+    """Run one turn; returns (final state, [(node, start_ms, end_ms)], wall ms)."""
+    apply_customer_event(state, {"message": message})
+    starts, trace = {}, []
+    started = time.perf_counter()
+    async for event, data in stream_workflow(state):
+        if event == "node_start":
+            starts[data["node"]] = data["elapsed_ms"]
+        elif event == "node_end":
+            trace.append((data["node"], starts.pop(data["node"]), data["elapsed_ms"]))
+        elif event == "final":
+            state = data["state"]
+    return state, trace, (time.perf_counter() - started) * 1000
+
+
+async def application_turn(phone: str):
+    state = main.initialize_state(phone, "bench")
+    state, _, _ = await run_turn(state, "Hi, I need a loan")
+    state, trace, wall = await run_turn(state, "50000 for 12 months")
+    assert state["loan_status"] == "approved" and state["sanction_letter_generated"], state["loan_status"]
+    return trace, wall
+
+
+async def main_async(args):
+    llm_gateway.use_provider(FakeProvider(latency=args.latency))
+    llm_gateway.cache = None
+    llm_gateway.coalesce = False
+    phones = approvable_phones(*load_reference_data())
+    await application_turn(phones[0])  # warm up the renderer pool and clients
+
+    trace, wall = await application_turn(phones[1 % len(phones)])
+    print(f"LLM latency {args.latency * 1000:.0f} ms, response mode {os.environ['RESPONSE_MODE']}\n")
+    print(f"{'node':>18} {'start ms':>9} {'end ms':>9}  timeline ({wall:.0f} ms)")
+    scale = 50 / max(wall, 1)
+    for node, start, end in sorted(trace, key=lambda row: row[1]):
+        bar = " " * int(start * scale) + "#" * max(1, int((end - start) * scale))
+        print(f"{node:>18} {start:>9.1f} {end:>9.1f}  |{bar}")
+
+    walls, sums = [], []
+    for i in range(args.turns):
+        trace, wall = await application_turn(phones[i % len(phones)])
+        walls.append(wall)
+        sums.append(sum(end - start for _, start, end in trace))
+    wall_ms, sum_ms = statistics.median(walls), statistics.median(sums)
+    print(f"\nover {args.turns} turns: median wall {wall_ms:.0f} ms, "
+          f"median sum of node times {sum_ms:.0f} ms ({sum_ms / wall_ms:.2f}x overlap)")
+    pdf_renderer.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel graph steps benchmark")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--turns", type=int, default=20)
+    asyncio.run(main_async(parser.parse_args()))
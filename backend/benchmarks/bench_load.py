@@ -0,0 +1,419 @@
+# benchmarks/bench_load.py
+"""
+End-to-end load test of the loan API.
+
+Boots the API in-process (lifespan included: job queue, checkpointed
+workflow, reference-data refresher) with the fake LLM provider, and
+serves the reference data from data/dummy-servers/fastapi_server.py on
+uvicorn in a background thread, so data lookups go through the real
+pooled HTTP client and caches. Every run uses fresh session,
+checkpoint, upload and letter stores in a temporary directory.
+
+Scripted conversations cover the three paths a customer can take:
+- instant:     amount within the pre-approved limit -> approved, letter downloaded
+- salary_slip: amount up to 2x the limit -> slip uploaded, job polled to
+               the decision, letter downloaded if approved
+- rejection:   credit score below the minimum (or, if there is no such
+               customer, an amount over 2x the limit) -> rejected
+
+They are mixed by --mix weights and run --concurrency at a time. The run
+is deterministic for a given --seed (scenario order, customers, amounts,
+salary slips, fake LLM jitter), so runs on different commits are
+comparable. Reports throughput, p50/p90/p99 latency per request type and
+per scenario, and memory per session (RSS growth, stored session and
+checkpoint bytes). --output writes the results as JSON, tagged with the
+git commit; --compare prints the change against such a file.
+
+Run from the backend directory:
+    python benchmarks/bench_load.py --conversations 200 --concurrency 20 --latency 0.2 --jitter 0.1
+    python benchmarks/bench_load.py --output before.json     # on the base commit
+    python benchmarks/bench_load.py --compare before.json    # on the change
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+DATA_SERVER_MODULE = BACKEND_DIR / "data" / "dummy-servers" / "fastapi_server.py"
+DEFAULT_DATA_DIR = BACKEND_DIR / "data" / "generated_data"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+WORK_DIR = Path(tempfile.mkdtemp(prefix="bench-load-"))
+DATA_SERVER_PORT = free_port()
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("LLM_PROVIDER", "fake")
+os.environ.setdefault("RESPONSE_MODE", "llm")
+os.environ.setdefault("DATA_SERVER_URL", f"http://127.0.0.1:{DATA_SERVER_PORT}")
+os.environ.setdefault("SESSION_DB_PATH", str(WORK_DIR / "sessions.db"))
+os.environ.setdefault("GRAPH_CHECKPOINT_DB", str(WORK_DIR / "checkpoints.db"))
+os.environ.setdefault("LETTER_STORE_DIR", str(WORK_DIR / "letters"))
+os.environ.setdefault("UPLOAD_DIR", str(WORK_DIR / "uploads"))
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+SCENARIOS = ("instant", "salary_slip", "rejection")
+TENURES = (12, 18, 24, 36)
+JOB_POLL_SECONDS = 0.025
+
+
+class DataServer:
+    """The reference-data server on uvicorn in a daemon thread, serving `data_dir`."""
+
+    def __init__(self, data_dir: Path, port: int):
+        os.environ["GENERATED_DATA_DIR"] = str(data_dir)
+        spec = importlib.util.spec_from_file_location("bench_data_server", DATA_SERVER_MODULE)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        config = uvicorn.Config(module.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="data-server", daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("reference-data server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def load_customers(data_dir: Path):
+    """(phone, pre-approved limit, credit score) for every CRM record with a customer profile."""
+    db_path = data_dir / "reference.db"
+    if db_path.is_file():  # generate_data.py --format sqlite
+        with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+            return conn.execute(
+                "SELECT crm.phone, customers.pre_approved_limit, customers.credit_score "
+                "FROM crm JOIN customers ON customers.name = crm.name ORDER BY crm.phone"
+            ).fetchall()
+    crm = json.loads((data_dir / "crm.json").read_text())
+    profiles = {c["name"]: c for c in json.loads((data_dir / "customers.json").read_text())}
+    customers = []
+    for phone, record in sorted(crm.items()):
+        profile = profiles.get(record["name"])
+        if profile:
+            customers.append((phone, profile["pre_approved_limit"], profile["credit_score"]))
+    return customers
+
+
+def plan_conversations(customers, count: int, weights, rng: random.Random):
+    """Deterministic list of (scenario, phone, amount, tenure)."""
+    eligible = [c for c in customers if c[2] >= 700]
+    below_minimum = [c for c in customers if c[2] < 700]
+    if not eligible:
+        raise SystemExit("no customer with a credit score of 700+ in the dataset")
+
+    plan = []
+    for scenario in rng.choices(SCENARIOS, weights=weights, k=count):
+        tenure = rng.choice(TENURES)
+        if scenario == "instant":
+            phone, limit, _ = rng.choice(eligible)
+            amount = limit * rng.uniform(0.2, 1.0)
+        elif scenario == "salary_slip":
+            phone, limit, _ = rng.choice(eligible)
+            amount = limit * rng.uniform(1.1, 2.0)
+        elif below_minimum:
+            phone, limit, _ = rng.choice(below_minimum)
+            amount = limit * rng.uniform(0.2, 1.0)
+        else:
+            phone, limit, _ = rng.choice(eligible)
+            amount = limit * rng.uniform(2.2, 3.0)
+        plan.append((scenario, phone, max(1000, int(amount) // 1000 * 1000), tenure))
+    return plan
+
+
+def make_salary_slips(count: int, seed: int):
+    from benchmarks.bench_scanpdf import write_slip
+
+    slips = []
+    for i in range(count):
+        path = WORK_DIR / f"slip-{i}.pdf"
+        write_slip(path, random.Random(seed * 1000 + i))
+        slips.append(path.read_bytes())
+    return slips
+
+
+class Recorder:
+    """Latency per request type and per scenario, outcomes and failures."""
+
+    def __init__(self):
+        self.requests = defaultdict(list)
+        self.scenarios = defaultdict(list)
+        self.outcomes = defaultdict(Counter)
+        self.failures = Counter()
+
+    async def call(self, kind: str, request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await request
+        self.requests[kind].append(time.perf_counter() - started)
+        response.raise_for_status()
+        return response
+
+
+class LoadRunner:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, slips):
+        self.client = client
+        self.recorder = recorder
+        self.slips = slips
+
+    async def chat(self, phone: str, message: str, session_id=None) -> dict:
+        body = {"phone": phone, "message": message, "session_id": session_id}
+        return (await self.recorder.call("chat", self.client.post("/chat", json=body))).json()
+
+    async def download(self, session_id: str) -> None:
+        await self.recorder.call("download_letter", self.client.get(f"/download-sanction-letter/{session_id}"))
+
+    async def upload_slip(self, session_id: str, index: int) -> dict:
+        slip = self.slips[index % len(self.slips)]
+        await self.recorder.call("upload_slip", self.client.post(
+            f"/upload-salary-slip/{session_id}",
+            data={"monthly_salary": "150000"},
+            files={"file": ("slip.pdf", slip, "application/pdf")},
+        ))
+        started = time.perf_counter()
+        while True:
+            status = (await self.recorder.call("status", self.client.get(f"/session/{session_id}/status"))).json()
+            job = status["salary_slip_job"]
+            if job and job["status"] in ("completed", "failed"):
+                self.recorder.requests["slip_job"].append(time.perf_counter() - started)
+                if job["status"] == "failed":
+                    raise RuntimeError(f"salary slip job failed: {job['error']}")
+                return status
+            if time.perf_counter() - started > 60:
+                raise TimeoutError("salary slip job still running after 60s")
+            await asyncio.sleep(JOB_POLL_SECONDS)
+
+    async def conversation(self, index: int, scenario: str, phone: str, amount: int, tenure: int) -> str:
+        reply = await self.chat(phone, "Hi, I need a personal loan")
+        session_id = reply["session_id"]
+        reply = await self.chat(phone, f"{amount} for {tenure} months", session_id)
+        status = reply["loan_status"]
+        if status == "awaiting_salary_slip":
+            status = (await self.upload_slip(session_id, index))["loan_status"]
+        if status == "approved":
+            await self.download(session_id)
+        return status
+
+    async def run(self, plan, concurrency: int) -> float:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def worker(index: int, scenario: str, phone: str, amount: int, tenure: int):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    outcome = await self.conversation(index, scenario, phone, amount, tenure)
+                except Exception as e:
+                    self.recorder.failures[f"{scenario}: {type(e).__name__}: {str(e)[:80]}"] += 1
+                    return
+                self.recorder.scenarios[scenario].append(time.perf_counter() - started)
+                self.recorder.outcomes[scenario][outcome] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, *conversation) for i, conversation in enumerate(plan)))
+        return time.perf_counter() - started
+
+
+def rss_bytes() -> int:
+    """Current resident set size (peak on platforms without /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def database_bytes(path: str) -> int:
+    return sum(p.stat().st_size for p in Path(path).parent.glob(Path(path).name + "*"))
+
+
+def distribution(seconds) -> dict:
+    values = sorted(seconds)
+    if not values:
+        return {"count": 0}
+
+    def at(p: float) -> float:
+        return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 2)
+
+    return {"count": len(values), "mean_ms": round(statistics.fmean(values) * 1000, 2),
+            "p50_ms": at(0.50), "p90_ms": at(0.90), "p99_ms": at(0.99), "max_ms": round(values[-1] * 1000, 2)}
+
+
+def git_revision() -> dict:
+    def git(*args):
+        result = subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True)
+        return result.stdout.strip() if result.returncode == 0 else None
+
+    return {"commit": git("rev-parse", "--short", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def print_report(results: dict) -> None:
+    config, throughput, memory = results["config"], results["throughput"], results["memory"]
+    print(f"commit {results['git']['commit']}{' (dirty)' if results['git']['dirty'] else ''}, "
+          f"{config['conversations']} conversations, concurrency {config['concurrency']}, "
+          f"LLM {config['latency'] * 1000:.0f}±{config['jitter'] * 1000:.0f} ms, seed {config['seed']}\n")
+    print(f"{throughput['conversations_per_sec']} conversations/s, {throughput['requests_per_sec']} requests/s "
+          f"over {throughput['seconds']} s, {results['failures']} failed\n")
+    print(f"{'':>16} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for section in ("requests", "scenarios"):
+        for name, stats in results[section].items():
+            if stats["count"]:
+                print(f"{name:>16} {stats['count']:>6} {stats['p50_ms']:>9} {stats['p90_ms']:>9} "
+                      f"{stats['p99_ms']:>9} {stats['max_ms']:>9}")
+    print()
+    for scenario, outcomes in results["outcomes"].items():
+        print(f"{scenario:>16}: {dict(outcomes)}")
+    for failure, count in results["failure_reasons"].items():
+        print(f"  failed {count}x  {failure}")
+    print(f"\nmemory per session: {memory['rss_kb_per_session']} KB RSS growth, "
+          f"{memory['session_bytes_avg']} B session state, {memory['checkpoint_bytes_per_session']} B checkpoints "
+          f"(RSS {memory['rss_mb_before']} -> {memory['rss_mb_after']} MB)")
+
+
+def print_comparison(results: dict, baseline: dict) -> None:
+    def change(new, old, lower_is_better=True):
+        if not old:
+            return "n/a"
+        delta = (new - old) / old * 100
+        better = delta < 0 if lower_is_better else delta > 0
+        return f"{delta:+.1f}%{'' if abs(delta) < 5 else (' better' if better else ' worse')}"
+
+    print(f"\ncompared with {baseline['git']['commit']} ({baseline['config']['conversations']} conversations):")
+    new, old = results["throughput"]["conversations_per_sec"], baseline["throughput"]["conversations_per_sec"]
+    print(f"{'conversations/s':>28} {old:>9} -> {new:>9}  {change(new, old, lower_is_better=False)}")
+    for section in ("requests", "scenarios"):
+        for name, stats in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if not stats["count"] or not before or not before.get("count"):
+                continue
+            for key in ("p50_ms", "p99_ms"):
+                label = f"{name} {key}"
+                print(f"{label:>28} {before[key]:>9} -> {stats[key]:>9}  {change(stats[key], before[key])}")
+    new, old = results["memory"]["session_bytes_avg"], baseline["memory"]["session_bytes_avg"]
+    print(f"{'session bytes':>28} {old:>9} -> {new:>9}  {change(new, old)}")
+
+
+async def main_async(args) -> dict:
+    import main as api
+    from services.llm_gateway import FakeProvider, llm_gateway
+
+    random.seed(args.seed)  # fake LLM jitter
+    llm_gateway.use_provider(FakeProvider(latency=args.latency, jitter=args.jitter))
+    if not args.keep_rate_limits:
+        llm_gateway.max_concurrency = 10_000
+        llm_gateway.requests_per_minute = llm_gateway.burst = 1e9
+
+    rng = random.Random(args.seed)
+    weights = [args.mix.get(scenario, 0) for scenario in SCENARIOS]
+    customers = load_customers(args.data_dir)
+    warmup = plan_conversations(customers, args.warmup, weights, rng)
+    plan = plan_conversations(customers, args.conversations, weights, rng)
+    slips = make_salary_slips(args.slips, args.seed)
+
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            await LoadRunner(client, Recorder(), slips).run(warmup, args.concurrency)
+
+            recorder = Recorder()
+            rss_before = rss_bytes()
+            seconds = await LoadRunner(client, recorder, slips).run(plan, args.concurrency)
+            rss_after = rss_bytes()
+
+    completed = sum(len(times) for times in recorder.scenarios.values())
+    with sqlite3.connect(os.environ["SESSION_DB_PATH"]) as db:
+        session_bytes = db.execute("SELECT AVG(LENGTH(state)) FROM sessions").fetchone()[0] or 0
+    sessions = args.warmup + args.conversations
+    return {
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "conversations": args.conversations, "concurrency": args.concurrency, "latency": args.latency,
+            "jitter": args.jitter, "seed": args.seed, "mix": args.mix, "data_dir": str(args.data_dir),
+            "customers": len(customers), "response_mode": os.environ["RESPONSE_MODE"],
+        },
+        "throughput": {
+            "seconds": round(seconds, 3),
+            "conversations_per_sec": round(completed / seconds, 2),
+            "requests_per_sec": round(sum(len(times) for times in recorder.requests.values()) / seconds, 2),
+        },
+        "requests": {kind: distribution(times) for kind, times in sorted(recorder.requests.items())},
+        "scenarios": {scenario: distribution(recorder.scenarios[scenario]) for scenario in SCENARIOS},
+        "outcomes": {scenario: dict(recorder.outcomes[scenario]) for scenario in SCENARIOS},
+        "failures": sum(recorder.failures.values()),
+        "failure_reasons": dict(recorder.failures.most_common(10)),
+        "memory": {
+            "rss_mb_before": round(rss_before / 2**20, 1),
+            "rss_mb_after": round(rss_after / 2**20, 1),
+            "rss_kb_per_session": round((rss_after - rss_before) / 1024 / max(args.conversations, 1), 1),
+            "session_bytes_avg": round(session_bytes),
+            "checkpoint_bytes_per_session": round(database_bytes(os.environ["GRAPH_CHECKPOINT_DB"]) / sessions),
+        },
+    }
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; use {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end load test of the loan API")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="extra random fake LLM latency, up to this")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("instant=6,salary_slip=2,rejection=2"),
+                        help="scenario weights, e.g. instant=6,salary_slip=2,rejection=2")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=10, help="conversations run before measuring")
+    parser.add_argument("--slips", type=int, default=8, help="distinct salary slip PDFs to upload")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="reference data to serve")
+    parser.add_argument("--keep-rate-limits", action="store_true",
+                        help="keep the gateway's LLM concurrency and rate limits (lifted by default)")
+    parser.add_argument("--output", type=Path, help="write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="results JSON of an earlier run to compare with")
+    args = parser.parse_args()
+
+    with DataServer(args.data_dir, DATA_SERVER_PORT):
+        results = asyncio.run(main_async(args))
+    print_report(results)
+    if args.compare:
+        print_comparison(results, json.loads(args.compare.read_text()))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nresults written to {args.output}")
@@ -0,0 +1,110 @@
+# benchmarks/bench_loan_terms.py
+"""
+Loan amount/tenure extraction benchmark.
+
+Runs the golden corpus in benchmarks/loan_terms_corpus.jsonl (one
+{"message", "amount", "tenure", "expect_tenure"?} object per line: Indian
+number formats, lakh/crore/k units, years and months, Hindi-English
+mixes, and traps like phone numbers, rates and ages) through
+utils.loan_terms.parse_loan_terms and through the regex-and-substring
+extractor the sales agent used before, and reports for each:
+- accuracy (amount, tenure, both), with the first few failures
+- microseconds per message
+
+Exits non-zero if parse_loan_terms misses any golden case, so it can
+double as a check after grammar changes.
+
+Run from the backend directory:
+    python benchmarks/bench_loan_terms.py --repeat 20
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.loan_terms import parse_loan_terms  # noqa: E402
+
+CORPUS = Path(__file__).resolve().parent / "loan_terms_corpus.jsonl"
+
+
+def legacy_extract(user_message: str, expect_tenure: bool = False) -> dict:
+    """The sales agent's previous extract_loan_details (it had no notion of expect_tenure)."""
+    amounts = re.findall(r'(\d+(?:,\d+)*(?:\.\d+)?)\s*(?:lakhs?|lacs?|k|thousand)?', user_message.lower())
+    tenures = re.findall(r'(\d+)\s*(?:months?|years?|yr)', user_message.lower())
+    result = {'amount': None, 'tenure': None}
+    if amounts:
+        amount = float(amounts[0].replace(',', ''))
+        if 'lakh' in user_message.lower() or 'lac' in user_message.lower():
+            amount = amount * 100000
+        elif 'k' in user_message.lower() or 'thousand' in user_message.lower():
+            amount = amount * 1000
+        elif amount < 1000:
+            amount = amount * 100000
+        result['amount'] = amount
+    if tenures:
+        tenure = int(tenures[0])
+        if 'year' in user_message.lower() or 'yr' in user_message.lower():
+            tenure = tenure * 12
+        result['tenure'] = tenure
+    return result
+
+
+def load_corpus():
+    with CORPUS.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score(extract, corpus):
+    amount_ok = tenure_ok = both_ok = 0
+    failures = []
+    for case in corpus:
+        result = extract(case["message"], case.get("expect_tenure", False))
+        amount_match = result["amount"] == case["amount"]
+        tenure_match = result["tenure"] == case["tenure"]
+        amount_ok += amount_match
+        tenure_ok += tenure_match
+        both_ok += amount_match and tenure_match
+        if not (amount_match and tenure_match):
+            failures.append((case, result))
+    n = len(corpus)
+    return amount_ok / n, tenure_ok / n, both_ok / n, failures
+
+
+def timing(extract, corpus, repeat: int) -> float:
+    messages = [(case["message"], case.get("expect_tenure", False)) for case in corpus]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message, expect_tenure in messages:
+            extract(message, expect_tenure)
+    return (time.perf_counter() - start) / (repeat * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Loan amount/tenure extraction benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show", type=int, default=5, help="failures to print per extractor")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    print(f"golden corpus: {len(corpus)} messages\n")
+    print(f"{'extractor':>12} {'amount':>8} {'tenure':>8} {'both':>8} {'µs/msg':>8}")
+    results = {}
+    for label, extract in [("legacy", legacy_extract), ("loan_terms", parse_loan_terms)]:
+        amount, tenure, both, failures = score(extract, corpus)
+        results[label] = failures
+        print(f"{label:>12} {amount:>8.1%} {tenure:>8.1%} {both:>8.1%} {timing(extract, corpus, args.repeat):>8.1f}")
+
+    for label, failures in results.items():
+        for case, result in failures[:args.show]:
+            print(f"  {label} miss: {case['message']!r} -> amount {result['amount']}, tenure {result['tenure']} "
+                  f"(expected {case['amount']}, {case['tenure']})")
+    if results["loan_terms"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_memory.py
+"""
+Conversation memory benchmark.
+
+For chats of growing length, reports the per-turn bookkeeping cost outside
+the LLM calls, in microseconds:
+- legacy: rebuild the list of customer messages to find the last one (as
+  the master and sales agents did), append the reply, then scan the whole
+  history for the last reply (as the chat handler did)
+- pointers: graph.memory's add_user_message / add_reply and the
+  last_user_message / last_reply fields, with history compaction on
+
+and the size of the stored session (serialize_state) after the chat, with
+and without compaction.
+
+Run from the backend directory:
+    python benchmarks/bench_memory.py --turns 10 100 1000 5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from graph.memory import ConversationMemory, conversation_memory  # noqa: E402
+from services.session_store import serialize_state  # noqa: E402
+
+USER_TEXT = "Could you tell me a bit more about the processing fee and prepayment charges?"
+REPLY_TEXT = ("Sure! The processing fee is 1.5% of the loan amount and there are no prepayment "
+              "charges after 12 EMIs. What loan amount are you looking for?")
+
+
+def empty_state() -> dict:
+    return {"messages": [], "last_user_message": None, "last_reply": None, "turn_count": 0,
+            "conversation_summary": None, "summarized_messages": 0, "phone": "+919876543210"}
+
+
+def legacy_turn(state: dict) -> str:
+    state["messages"].append(HumanMessage(content=USER_TEXT))
+    user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
+    assert user_messages[-1].content == USER_TEXT
+    state["messages"].append(AIMessage(content=REPLY_TEXT))
+    ai_messages = [
+        msg.content for msg in state["messages"]
+        if hasattr(msg, 'content') and msg.content and not isinstance(msg, HumanMessage)
+    ]
+    return ai_messages[-1] if ai_messages else ""
+
+
+def pointer_turn(memory: ConversationMemory, state: dict) -> str:
+    memory.add_user_message(state, USER_TEXT)
+    assert state["last_user_message"] == USER_TEXT
+    memory.add_reply(state, REPLY_TEXT)
+    return state["last_reply"]
+
+
+def run(turns: int, turn):
+    """Play `turns` turns; returns (µs per turn over the last 10% of turns, state)."""
+    state = empty_state()
+    tail = max(turns // 10, 1)
+    for _ in range(turns - tail):
+        turn(state)
+    start = time.perf_counter()
+    for _ in range(tail):
+        turn(state)
+    return (time.perf_counter() - start) / tail * 1e6, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversation memory benchmark")
+    parser.add_argument("--turns", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    args = parser.parse_args()
+
+    memory = conversation_memory
+    print(f"compaction: history > {memory.max_messages} messages -> keep {memory.keep_messages}, "
+          f"summary <= {memory.summary_chars} chars\n")
+    print(f"{'turns':>7} {'legacy µs/turn':>15} {'pointers µs/turn':>17} {'legacy session':>15} {'compacted':>10}")
+    for turns in args.turns:
+        legacy_us, legacy_state = run(turns, legacy_turn)
+        pointer_us, pointer_state = run(turns, lambda state: pointer_turn(memory, state))
+        assert pointer_state["turn_count"] == turns
+        assert pointer_state["last_reply"] == legacy_turn(dict(legacy_state, messages=list(legacy_state["messages"])))
+        print(f"{turns:>7} {legacy_us:>15.1f} {pointer_us:>17.1f} "
+              f"{len(serialize_state(legacy_state)):>14,}B {len(serialize_state(pointer_state)):>9,}B")
+
+
+if __name__ == "__main__":
+    main()
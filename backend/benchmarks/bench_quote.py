@@ -0,0 +1,156 @@
+# benchmarks/bench_quote.py
+"""
+Offer grid and /quote benchmark.
+
+Builds the offer grid for a synthetic customer base and reports:
+- full build time and grid size in memory
+- incremental rebuild time when 1% of customers change, and when only
+  the underwriting policy changes
+- per-quote latency (p50/p99) of OfferGrid.quote, and of GET /quote
+  through the ASGI app in-process (middleware, routing, validation and
+  JSON included; no HTTP client or network)
+- for comparison, the per-request pricing the sales agent does
+  (offer rate or default rate, then emi_exact) plus a policy evaluation
+
+Run from the backend directory:
+    python benchmarks/bench_quote.py --customers 10000 --quotes 20000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.batch_underwriting import ReferenceSnapshot  # noqa: E402
+from services.offer_grid import build_grid, offer_grid  # noqa: E402
+from services.pricing import default_rate  # noqa: E402
+from services.rules_engine import compile_policy, underwriting_policy  # noqa: E402
+from utils.emi import emi_exact  # noqa: E402
+
+
+def synthetic_reference(customers: int, rng: random.Random):
+    crm, credit, profiles, offers = {}, {}, [], []
+    for i in range(customers):
+        phone = f"+91{7000000000 + i}"
+        name = f"Customer {i}"
+        crm[phone] = {"name": name, "phone": phone, "address": f"{i} Main Road", "kyc_verified": True}
+        credit[phone] = {"credit_score": rng.randint(600, 900)}
+        profiles.append({"customer_id": i, "name": name, "pre_approved_limit": rng.randrange(100_000, 600_000, 50_000)})
+        if rng.random() < 0.7:
+            offers.append({"phone": phone, "interest_rate": round(rng.uniform(10, 16), 2)})
+    return crm, credit, profiles, offers
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return statistics.median(ordered), ordered[int(len(ordered) * 0.99) - 1]
+
+
+def time_calls(func, requests):
+    samples = []
+    for request in requests:
+        start = time.perf_counter()
+        func(*request)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return percentiles(samples)
+
+
+async def asgi_get(app, path: str, query: str):
+    """One GET through the ASGI app (middleware, routing, validation, JSON) without a client or socket."""
+    messages = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("bench", 1), "root_path": "",
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+async def time_http(app, requests):
+    from urllib.parse import urlencode
+    queries = [urlencode({"phone": phone, "amount": amount, "tenure": tenure}) for phone, amount, tenure in requests]
+    for query in queries[:100]:  # warm up routing and validation
+        await asgi_get(app, "/quote", query)
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        status = await asgi_get(app, "/quote", query)
+        samples.append((time.perf_counter() - start) * 1e6)
+        assert status == 200, query
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offer grid and /quote benchmark")
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--quotes", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    crm, credit, profiles, offers = synthetic_reference(args.customers, rng)
+    policy = underwriting_policy.current()
+    amounts, tenures = offer_grid.amounts, offer_grid.tenures
+
+    start = time.perf_counter()
+    grid = build_grid(ReferenceSnapshot(crm, credit, profiles, offers, {}), policy, amounts, tenures)
+    full = time.perf_counter() - start
+    print(f"grid: {len(grid)} customers x {len(amounts)} amounts x {len(tenures)} tenures, "
+          f"{grid.nbytes / 2**20:.1f} MiB ({grid.nbytes / len(grid):.0f} B/customer)")
+
+    for phone in rng.sample(list(crm), args.customers // 100):
+        credit[phone] = {"credit_score": rng.randint(600, 900)}
+    start = time.perf_counter()
+    updated = build_grid(ReferenceSnapshot(crm, credit, profiles, offers, {}), policy, amounts, tenures, grid)
+    incremental = time.perf_counter() - start
+
+    raw = {"version": "bench", "rules": [{"id": "all", "decision": "approved", "when": {"loan_ratio": {"lte": 1.5}}}],
+           "default": {"id": "none", "decision": "rejected"}}
+    start = time.perf_counter()
+    build_grid(updated.source, compile_policy(raw), amounts, tenures, updated)
+    policy_only = time.perf_counter() - start
+
+    print(f"\n{'build':>24} {'seconds':>9} {'re-priced':>10}")
+    print(f"{'full':>24} {full:>9.3f} {len(grid):>10}")
+    print(f"{'1% customers changed':>24} {incremental:>9.3f} {updated.recomputed:>10}")
+    print(f"{'policy changed':>24} {policy_only:>9.3f} {0:>10}")
+
+    phones = list(crm)
+    requests = [(rng.choice(phones), rng.randrange(10_000, 1_000_000, 5_000), rng.choice(tenures)) for _ in range(args.quotes)]
+    offer_rates = {offer["phone"]: offer["interest_rate"] for offer in offers}
+    limits = {f"+91{7000000000 + profile['customer_id']}": profile["pre_approved_limit"] for profile in profiles}
+
+    def per_request(phone, amount, tenure):
+        rate = offer_rates.get(phone) or default_rate(tenure)
+        instalment = float(emi_exact(amount, rate, tenure))
+        policy.decide({"credit_score": credit[phone]["credit_score"], "loan_ratio": amount / limits[phone],
+                       "emi_share": float("inf"), "has_salary": 0})
+        return instalment
+
+    import main as app_module
+    app_module.offer_grid.grid = updated
+    http_p50, http_p99 = asyncio.run(time_http(app_module.app, requests))
+
+    print(f"\n{'quote path':>24} {'p50 µs':>9} {'p99 µs':>9}")
+    for label, (p50, p99) in [
+        ("per-request pricing", time_calls(per_request, requests)),
+        ("OfferGrid.quote", time_calls(updated.quote, requests)),
+        ("GET /quote (ASGI)", (http_p50, http_p99)),
+    ]:
+        print(f"{label:>24} {p50:>9.1f} {p99:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/bench_rules.py
+"""
+Underwriting rules engine benchmark.
+
+Compares, in microseconds per decision:
+- the hard-coded if-branches the underwriting agent used before the policy
+  file (reproduced here as legacy_decide)
+- the compiled policy, one decision at a time (CompiledPolicy.evaluate)
+- the compiled policy, vectorised over a batch (CompiledPolicy.evaluate_many)
+- a naive first-match scan over the rule list
+
+for the shipped policy and for synthetic policies of growing size, to show
+that compiled evaluation cost stays flat as the rule count grows while
+the scan grows linearly. Decisions are checked against each other first.
+
+Run from the backend directory:
+    python benchmarks/bench_rules.py --decisions 50000
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.rules_engine import FEATURES, compile_policy, underwriting_policy  # noqa: E402
+
+
+def legacy_decide(features: dict) -> str:
+    """The agent's original branches, returning the equivalent rule id."""
+    if features["credit_score"] <= 0:
+        return "credit_score_unavailable"
+    if features["credit_score"] < 700:
+        return "credit_score_below_minimum"
+    if features["loan_ratio"] <= 1.0:
+        return "within_pre_approved_limit"
+    if features["loan_ratio"] <= 2.0:
+        if not features["has_salary"]:
+            return "salary_slip_required"
+        if features["emi_share"] <= 0.5:
+            return "emi_within_salary_cap"
+        return "emi_exceeds_salary_cap"
+    return "exceeds_max_loan_ratio"
+
+
+def linear_scan(policy, features: dict):
+    for rule in policy.rules:
+        if rule.matches(features):
+            return rule
+    return policy.default
+
+
+def sample_features(rng: random.Random) -> dict:
+    has_salary = rng.random() < 0.5
+    return {
+        "credit_score": rng.choice([0] + [rng.randint(550, 900)] * 9),
+        "loan_ratio": rng.uniform(0.1, 3.0),
+        "emi_share": rng.uniform(0.1, 0.9) if has_salary else math.inf,
+        "has_salary": 1 if has_salary else 0,
+    }
+
+
+def synthetic_policy(rule_count: int, rng: random.Random):
+    """A random policy with `rule_count` rules over all four features."""
+    rules = []
+    for i in range(rule_count):
+        when = {
+            "credit_score": {"gte": rng.randint(600, 900)},
+            "loan_ratio": {"lte": round(rng.uniform(0.2, 3.0), 3)},
+        }
+        if i % 3 == 0:
+            when["emi_share"] = {"lt": round(rng.uniform(0.1, 0.9), 3)}
+        if i % 5 == 0:
+            when["has_salary"] = {"eq": 1}
+        rules.append({"id": f"rule_{i}", "decision": rng.choice(["approved", "rejected"]), "when": when})
+    return compile_policy({"version": f"synthetic-{rule_count}", "rules": rules,
+                           "default": {"id": "default", "decision": "rejected"}})
+
+
+def per_decision(func, samples) -> float:
+    start = time.perf_counter()
+    for features in samples:
+        func(features)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+def vectorised(policy, samples) -> float:
+    import numpy as np
+    columns = {feature: np.array([s[feature] for s in samples], dtype=float) for feature in FEATURES}
+    policy.evaluate_many({feature: column[:10] for feature, column in columns.items()})  # build the masks
+    start = time.perf_counter()
+    policy.evaluate_many(columns)
+    return (time.perf_counter() - start) / len(samples) * 1e6
+
+
+def check(policy, samples) -> None:
+    import numpy as np
+    columns = {feature: np.array([s[feature] for s in samples], dtype=float) for feature in FEATURES}
+    batch = policy.evaluate_many(columns)
+    for features, index in zip(samples, batch):
+        expected = linear_scan(policy, features)
+        assert policy.evaluate(features) is expected, features
+        assert policy.rule_at(int(index)) is expected, features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Underwriting rules engine benchmark")
+    parser.add_argument("--decisions", type=int, default=50_000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = [sample_features(rng) for _ in range(args.decisions)]
+
+    policy = underwriting_policy.current()
+    check(policy, samples[:5000])
+    mismatches = sum(policy.evaluate(s).id != legacy_decide(s) for s in samples)
+    print(f"policy {policy.version}: {len(policy.rules)} rules, "
+          f"{mismatches} mismatches vs legacy branches over {len(samples)} decisions")
+
+    print(f"\n{'policy':>14} {'rules':>6} {'legacy µs':>10} {'scan µs':>8} {'compiled µs':>12} {'vector µs':>10}")
+    print(f"{'shipped':>14} {len(policy.rules):>6} {per_decision(legacy_decide, samples):>10.2f} "
+          f"{per_decision(lambda f: linear_scan(policy, f), samples):>8.2f} "
+          f"{per_decision(policy.evaluate, samples):>12.2f} {vectorised(policy, samples):>10.3f}")
+
+    for rule_count in args.rules:
+        compile_start = time.perf_counter()
+        synthetic = synthetic_policy(rule_count, rng)
+        compile_seconds = time.perf_counter() - compile_start
+        check(synthetic, samples[:500])
+        scan_samples = samples[: max(1000, args.decisions // rule_count)]
+        print(f"{'synthetic':>14} {rule_count:>6} {'-':>10} "
+              f"{per_decision(lambda f: linear_scan(synthetic, f), scan_samples):>8.2f} "
+              f"{per_decision(synthetic.evaluate, samples):>12.2f} {vectorised(synthetic, samples):>10.3f}"
+              f"   (compiled in {compile_seconds * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
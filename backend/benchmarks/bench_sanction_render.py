@@ -0,0 +1,81 @@
+# benchmarks/bench_sanction_render.py
+"""
+Sanction letter rendering throughput.
+
+Compares, for the same batch of letters:
+- legacy: styles rebuilt for every letter (the old generate_sanction_letter_pdf)
+- serial: precompiled styles, one letter after another in this process
+- pool:   precompiled styles, SanctionLetterRenderer process pool
+
+and reports letters/second and letters/second per worker (core).
+
+Run from the backend directory:
+    python benchmarks/bench_sanction_render.py --letters 200 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.pdf_renderer import SanctionLetterRenderer  # noqa: E402
+from utils import sanction_pdf  # noqa: E402
+
+
+def sample_fields(i: int) -> dict:
+    return {
+        "date": "January 15, 2025",
+        "reference": f"SL/CUST{i:05d}/20250115",
+        "customer_name": f"Customer {i}",
+        "address": f"{i} MG Road, Bengaluru",
+        "phone": f"98{i:08d}",
+        "customer_id": f"CUST{i:05d}",
+        "amount": 100000 + i * 1000,
+        "rate": 11.5,
+        "tenure": 24,
+        "emi": 4684.5 + i,
+        "total_interest": (4684.5 + i) * 24 - (100000 + i * 1000),
+        "total_repayment": (4684.5 + i) * 24,
+    }
+
+
+def legacy_render(fields: dict) -> bytes:
+    """Old behaviour: a cold style cache for every letter."""
+    sanction_pdf._compiled.cache_clear()
+    return sanction_pdf.render_sanction_letter(fields)
+
+
+def timed(label: str, letters: int, workers: int, fn) -> None:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = letters / elapsed
+    print(f"{label:>8} {workers:>8} {elapsed:>9.2f} {rate:>11.1f} {rate / workers:>13.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sanction letter rendering benchmark")
+    parser.add_argument("--letters", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    batch = [sample_fields(i) for i in range(args.letters)]
+
+    # Import ReportLab before timing so every mode starts equally warm.
+    sanction_pdf.warm_up()
+
+    print(f"{'mode':>8} {'workers':>8} {'seconds':>9} {'letters/s':>11} {'per worker/s':>13}")
+    timed("legacy", args.letters, 1, lambda: [legacy_render(fields) for fields in batch])
+    sanction_pdf.warm_up()
+    timed("serial", args.letters, 1, lambda: [sanction_pdf.render_sanction_letter(fields) for fields in batch])
+
+    renderer = SanctionLetterRenderer(workers=args.workers, mode="process")
+    renderer.render_batch_sync(batch[:args.workers])  # start and warm the workers
+    timed("pool", args.letters, args.workers, lambda: renderer.render_batch_sync(batch))
+    renderer.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/bench_scanpdf.py
+"""
+Salary slip extraction benchmark.
+
+Generates a corpus of synthetic salary slips (ReportLab, varied layouts,
+labels and page counts) with known gross/net/employer, then reports:
+- accuracy of the extracted fields against the ground truth
+- pages/second and documents/second, serial and in the extractor pool
+- peak Python memory per document (tracemalloc, serial run)
+
+Run from the backend directory:
+    python benchmarks/bench_scanpdf.py --docs 100 --workers 2
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.slip_extractor import SalarySlipExtractor  # noqa: E402
+from utils.scanpdf import extract_salary_slip  # noqa: E402
+
+EMPLOYERS = [
+    "Infosys Limited", "Acme Analytics Pvt Ltd", "Bharat Steel Corporation",
+    "Nimbus Software LLP", "Sahyadri Foods Private Limited", "Orion Fintech Inc",
+]
+LAYOUTS = [
+    # (employer label, gross label, deductions label, net label, currency prefix)
+    ("Employer Name:", "Gross Salary", "Total Deductions", "Net Salary", "Rs."),
+    ("Company:", "Total Earnings", "Total Deductions", "Net Pay", "INR"),
+    (None, "Gross Pay", "Total Deduction", "Take Home Pay", ""),
+]
+
+
+def write_slip(path: Path, rng: random.Random) -> dict:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    employer = rng.choice(EMPLOYERS)
+    employer_label, gross_label, deduction_label, net_label, currency = rng.choice(LAYOUTS)
+    gross = rng.randrange(25_000, 400_000, 500)
+    deductions = round(gross * rng.uniform(0.08, 0.3))
+    net = gross - deductions
+    extra_pages = rng.choice([0, 0, 1, 2])
+
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    _, height = A4
+    y = height - 72
+
+    def line(text, size=10, gap=16):
+        nonlocal y
+        pdf.setFont("Helvetica", size)
+        pdf.drawString(60, y, text)
+        y -= gap
+
+    line(employer if employer_label is None else "PAYSLIP", 14, 24)
+    if employer_label:
+        line(f"{employer_label} {employer}")
+    line(f"Employee: Employee {rng.randint(1, 9999)}    Month: {rng.choice(['Jan', 'Feb', 'Mar'])} 2025")
+    line("")
+    basic = round(gross * 0.5)
+    hra = round(gross * 0.2)
+    for label, amount in [("Basic", basic), ("HRA", hra), ("Special Allowance", gross - basic - hra)]:
+        line(f"{label:<30} {currency} {amount:,.2f}")
+    line(f"{gross_label:<30} {currency} {gross:,.2f}")
+    for label, amount in [("Provident Fund", round(deductions * 0.6)), ("Income Tax", deductions - round(deductions * 0.6))]:
+        line(f"{label:<30} {currency} {amount:,.2f}")
+    line(f"{deduction_label:<30} {currency} {deductions:,.2f}")
+    line(f"{net_label:<30} {currency} {net:,.2f}", 11)
+    pdf.showPage()
+
+    for page in range(extra_pages):
+        y = height - 72
+        line(f"Annexure {page + 1}: leave and attendance summary", 12, 24)
+        for day in range(30):
+            line(f"Day {day + 1:>2}  present  08:{rng.randint(10, 59)} - 17:{rng.randint(10, 59)}")
+        pdf.showPage()
+
+    pdf.save()
+    return {"employer": employer, "gross": gross, "net": net, "pages": 1 + extra_pages}
+
+
+def accuracy(results, truths) -> dict:
+    def correct(result, field, expected):
+        return bool(result[field]) and result[field]["value"] == expected
+
+    n = len(truths)
+    return {
+        "gross": sum(correct(r, "gross_salary", t["gross"]) for r, t in zip(results, truths)) / n,
+        "net": sum(correct(r, "net_salary", t["net"]) for r, t in zip(results, truths)) / n,
+        "employer": sum(correct(r, "employer", t["employer"]) for r, t in zip(results, truths)) / n,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Salary slip extraction benchmark")
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=min(2, os.cpu_count() or 1))
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        paths = [Path(corpus_dir) / f"slip_{i}.pdf" for i in range(args.docs)]
+        truths = [write_slip(path, rng) for path in paths]
+        total_pages = sum(t["pages"] for t in truths)
+        print(f"corpus: {args.docs} slips, {total_pages} pages")
+
+        extract_salary_slip(paths[0], ocr=False)  # import pdfplumber before timing
+
+        peaks = []
+        results = []
+        start = time.perf_counter()
+        for path in paths:
+            tracemalloc.start()
+            results.append(extract_salary_slip(path, ocr=False))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        serial_traced = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for path in paths:
+            extract_salary_slip(path, ocr=False)
+        serial = time.perf_counter() - start
+
+        extractor = SalarySlipExtractor(workers=args.workers, mode="process", ocr=False)
+        extractor.extract_many_sync(paths[:args.workers])  # start and warm the workers
+        start = time.perf_counter()
+        extractor.extract_many_sync(paths)
+        pooled = time.perf_counter() - start
+        extractor.shutdown()
+
+    read_pages = sum(r["pages"] for r in results)
+    print("accuracy: " + ", ".join(f"{field} {rate:.1%}" for field, rate in accuracy(results, truths).items()))
+    print(f"pages read: {read_pages} of {total_pages} (reading stops once every field is found)")
+    print(f"\n{'mode':>8} {'workers':>8} {'seconds':>9} {'docs/s':>8} {'pages/s':>8} {'pages/s/worker':>15}")
+    for label, workers, elapsed in [("serial", 1, serial), ("pool", args.workers, pooled)]:
+        print(f"{label:>8} {workers:>8} {elapsed:>9.2f} {args.docs / elapsed:>8.1f} "
+              f"{read_pages / elapsed:>8.1f} {read_pages / elapsed / workers:>15.1f}")
+    print(f"\npeak Python memory per document: median {statistics.median(peaks) / 1024:.0f} KiB, "
+          f"max {max(peaks) / 1024:.0f} KiB (tracemalloc run took {serial_traced:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# benchmarks/bench_speculation.py
+"""
+Speculative sanction letter benchmark.
+
+Runs the turn that completes an application (loan details -> pricing,
+KYC and credit check -> underwriting -> approval message and sanction
+letter) through the workflow with the fake LLM provider, with
+speculative letter rendering off and on, and prints for each the median
+wall time of the turn and of the sanction step alone (from the
+node_start/node_end events of stream_workflow). With speculation the
+letter is rendered while pricing, KYC, the credit check and
+underwriting run, so the sanction step only stores it. --concurrency
+completes that many applications at once, which queues their renders
+in the renderer pool.
+
+Then runs --turns applications over the pre-approved limit, which are
+predicted to need a salary slip and so should start no renders, and
+prints the speculation stats. RESPONSE_MODE defaults to template (no
+LLM calls); with RESPONSE_MODE=llm the approval message's --latency
+second LLM call already hides most of the render.
+
+Run from the backend directory:
+    python benchmarks/bench_speculation.py --turns 40 --concurrency 8
+    RESPONSE_MODE=llm python benchmarks/bench_speculation.py --latency 0.1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("RESPONSE_MODE", "template")
+os.environ.setdefault("LETTER_STORE_DIR", str(Path(tempfile.mkdtemp()) / "letters"))
+
+from benchmarks.bench_concurrency import approvable_phones, load_reference_data  # noqa: E402
+from benchmarks.bench_fanout import run_turn  # noqa: E402
+from services.llm_gateway import FakeProvider, llm_gateway  # noqa: E402
+from services.pdf_renderer import pdf_renderer  # noqa: E402
+from services.speculative_letters import speculative_letters  # noqa: E402
+import main  # noqa: E402
+
+
+async def application_turn(phone: str, details: str = "50000 for 12 months"):
+    """Returns (final state, turn wall ms, sanction node ms or None)."""
+    state = main.initialize_state(phone, "bench")
+    state, _, _ = await run_turn(state, "Hi, I need a loan")
+    state, trace, wall = await run_turn(state, details)
+    sanction = next((end - start for node, start, end in trace if node == "sanction"), None)
+    return state, wall, sanction
+
+
+async def measure(phones, turns: int, concurrency: int):
+    walls, sanctions = [], []
+    for start in range(0, turns, concurrency):
+        batch = [phones[i % len(phones)] for i in range(start, min(start + concurrency, turns))]
+        for state, wall, sanction in await asyncio.gather(*(application_turn(phone) for phone in batch)):
+            assert state["sanction_letter_generated"], state["loan_status"]
+            walls.append(wall)
+            sanctions.append(sanction)
+    return statistics.median(walls), statistics.median(sanctions)
+
+
+async def main_async(args):
+    llm_gateway.use_provider(FakeProvider(latency=args.latency))
+    llm_gateway.cache = None
+    crm, customers = load_reference_data()
+    phones = approvable_phones(crm, customers)
+    await application_turn(phones[0])  # warm up the renderer pool and clients
+
+    print(f"response mode {os.environ['RESPONSE_MODE']}, LLM latency {args.latency * 1000:.0f} ms, "
+          f"{args.concurrency} applications at a time\n")
+    print(f"{'speculation':>12} {'turn ms':>9} {'sanction ms':>12}")
+    results = {}
+    for enabled in (False, True):
+        speculative_letters.enabled = enabled
+        results[enabled] = await measure(phones, args.turns, args.concurrency)
+        wall, sanction = results[enabled]
+        print(f"{'on' if enabled else 'off':>12} {wall:>9.1f} {sanction:>12.1f}")
+    print(f"\nturn {results[False][0] / results[True][0]:.2f}x faster, "
+          f"sanction step {results[False][1] / max(results[True][1], 0.01):.1f}x faster")
+
+    # Over the pre-approved limit: predicted to need a salary slip, so
+    # nothing is rendered ahead; the commit rate counts only real bets
+    before = speculative_letters.stats()
+    for i in range(args.turns):
+        phone = phones[i % len(phones)]
+        limit = customers[crm[phone]["name"]]["pre_approved_limit"]
+        state, _, _ = await application_turn(phone, f"{int(limit * 1.5)} for 24 months")
+        assert state["loan_status"] == "awaiting_salary_slip", state["loan_status"]
+    after = speculative_letters.stats()
+    print(f"\n{args.turns} over-limit applications: {after['started'] - before['started']} speculative renders started")
+    print(f"speculation stats: {after}")
+    pdf_renderer.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speculative sanction letter benchmark")
+    parser.add_argument("--latency", type=float, default=0.1, help="fake LLM latency in seconds")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1, help="applications completed at the same time")
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,69 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start benchmark for the API.
+
+Each run starts a fresh interpreter, imports main and enters the FastAPI
+lifespan (what uvicorn does before accepting traffic), then reports:
+- import: seconds to `import main`
+- ready: seconds until the lifespan has started, i.e. the worker can serve
+- total: import + ready
+
+The dummy data server does not need to be running: nothing blocks on it
+during startup any more.
+
+Run from the backend directory:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def enter_lifespan():
+    async with main.lifespan(main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(enter_lifespan())
+print(json.dumps({"import": imported - start, "ready": ready - imported, "total": ready - start}))
+"""
+
+
+def run_once(db_dir: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env["SESSION_DB_PATH"] = str(Path(db_dir) / "startup_sessions.db")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as db_dir:
+        runs = [run_once(db_dir) for _ in range(args.runs)]
+
+    print(f"{'phase':>8} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for phase in ("import", "ready", "total"):
+        values = [run[phase] for run in runs]
+        print(f"{phase:>8} {statistics.median(values):>9.3f} {min(values):>7.3f} {max(values):>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_telemetry.py
+"""
+Tracing and metrics overhead benchmark.
+
+Measures the cost of one span (with a histogram observation) with spans
+only feeding metrics and with every span exported to an NDJSON file,
+then runs --turns application turns (template responses, fake LLM)
+with the file exporter on and prints where the time went: the p50/p99 of
+each node, LLM call and session load/save, computed from the exported
+spans, the way you'd read them from a production trace file. Also times
+one /metrics render.
+
+Reference data is primed from generated_data, so the data-service
+lookups don't need the dummy server.
+
+Run from the backend directory:
+    python benchmarks/bench_telemetry.py --turns 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GROQ_API_KEY", "benchmark")
+os.environ.setdefault("RESPONSE_MODE", "template")
+os.environ.setdefault("LETTER_STORE_DIR", str(Path(tempfile.mkdtemp()) / "letters"))
+
+from benchmarks.bench_concurrency import approvable_phones, load_reference_data  # noqa: E402
+from benchmarks.bench_fanout import application_turn  # noqa: E402
+from services.llm_gateway import FakeProvider, llm_gateway  # noqa: E402
+from services.pdf_renderer import pdf_renderer  # noqa: E402
+from services.telemetry import FileSpanExporter, MetricsRegistry, Tracer, metrics, tracer  # noqa: E402
+
+
+def span_cost_us(span_tracer: Tracer, n: int = 100_000) -> float:
+    histogram = MetricsRegistry().histogram("bench_seconds", "benchmark", ("name",))
+    started = time.perf_counter()
+    for _ in range(n):
+        with span_tracer.span("bench", metric=histogram, labels=("bench",), key="value"):
+            pass
+    return (time.perf_counter() - started) / n * 1e6
+
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+
+async def main_async(args):
+    workdir = Path(tempfile.mkdtemp())
+    print(f"span, metrics only:     {span_cost_us(Tracer()):.2f} µs")
+    exporter = FileSpanExporter(workdir / "bench-spans.ndjson")
+    print(f"span, exported to file: {span_cost_us(Tracer(exporter)):.2f} µs")
+    exporter.flush()
+
+    llm_gateway.use_provider(FakeProvider(latency=args.latency))
+    phones = approvable_phones(*load_reference_data())
+    trace_file = workdir / "spans.ndjson"
+    tracer.exporter = FileSpanExporter(trace_file)
+    for i in range(args.turns):
+        await application_turn(phones[i % len(phones)])
+    tracer.flush()
+
+    durations = defaultdict(list)
+    with trace_file.open() as f:
+        for line in f:
+            span = json.loads(line)
+            durations[span["name"]].append(span["duration_ms"])
+    print(f"\n{args.turns} applications, {sum(map(len, durations.values()))} spans\n")
+    print(f"{'span':>24} {'count':>6} {'p50 ms':>8} {'p99 ms':>8} {'total ms':>9}")
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+        print(f"{name:>24} {len(values):>6} {statistics.median(values):>8.2f} "
+              f"{percentile(values, 0.99):>8.2f} {sum(values):>9.1f}")
+
+    started = time.perf_counter()
+    text = metrics.render()
+    print(f"\n/metrics: {len(text.splitlines())} lines rendered in {(time.perf_counter() - started) * 1000:.2f} ms")
+    pdf_renderer.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tracing and metrics overhead benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="fake LLM latency in seconds")
+    parser.add_argument("--turns", type=int, default=50)
+    asyncio.run(main_async(parser.parse_args()))
@@ -1,12 +1,18 @@
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+import hashlib
 import uvicorn
 import json
+import os
+import sqlite3
+import threading
 
-BASE_DIR = Path(__file__).resolve().parent.parent / "generated_data"
+# Override with GENERATED_DATA_DIR to serve another dataset (e.g. a larger generated one)
+BASE_DIR = Path(os.getenv("GENERATED_DATA_DIR", Path(__file__).resolve().parent.parent / "generated_data"))
 
 app = FastAPI(title="Cred Saathi Dummy Data API")
 
@@ -20,42 +26,208 @@ app.add_middleware(
 )
 
 
-def load_json_file(relative_name: str) -> Any:
-    """Load a JSON file from the generated_data directory."""
+DATASETS = {
+    "crm": "crm.json",
+    "credit-bureau": "credit_bureau.json",
+    "customers": "customers.json",
+    "offers": "offers.json",
+}
+
+# A reference.db from data/scripts/generate_data.py --format sqlite, if
+# present, is served instead of the JSON files: lookups are indexed queries,
+# so datasets of millions of customers don't have to fit in memory.
+# table -> (key column for object-shaped datasets, columns of a record)
+SQLITE_FILE = "reference.db"
+SQLITE_LAYOUT = {
+    "crm": ("phone", ("name", "phone", "address")),
+    "credit_bureau": ("phone", ("credit_score",)),
+    "customers": (None, ("customer_id", "name", "age", "city", "current_loan_details", "credit_score", "pre_approved_limit")),
+    "offers": (None, ("phone", "offer_amount", "interest_rate", "tenure_months")),
+}
+_sqlite = threading.local()
+
+
+def sqlite_db() -> Optional[sqlite3.Connection]:
+    """Read-only connection to reference.db for this thread, or None when serving JSON files."""
+    path = BASE_DIR / SQLITE_FILE
+    if not path.is_file():
+        return None
+    conn = getattr(_sqlite, "conn", None)
+    if conn is None:
+        conn = _sqlite.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    return conn
+
+
+def _table(relative_name: str) -> str:
+    return relative_name.removesuffix(".json")
+
+
+# relative_name -> (mtime_ns, version, data); files are re-read only when they change
+_file_cache: Dict[str, Tuple[int, str, Any]] = {}
+# (relative_name, key field) -> (version, index)
+_index_cache: Dict[Tuple[str, str], Tuple[str, Dict[str, Any]]] = {}
+
+
+def _load_cached(relative_name: str) -> Tuple[str, Any]:
     file_path = BASE_DIR / relative_name
     if not file_path.is_file():
         raise HTTPException(status_code=404, detail=f"File {relative_name} not found")
 
-    with file_path.open("r", encoding="utf-8") as f:
-        return json.load(f)
+    mtime = file_path.stat().st_mtime_ns
+    cached = _file_cache.get(relative_name)
+    if cached is None or cached[0] != mtime:
+        raw = file_path.read_bytes()
+        version = hashlib.sha1(raw).hexdigest()[:16]
+        cached = (mtime, version, json.loads(raw))
+        _file_cache[relative_name] = cached
+    return cached[1], cached[2]
+
+
+def load_json_file(relative_name: str) -> Any:
+    """Load a JSON file from the generated_data directory."""
+    return _load_cached(relative_name)[1]
+
+
+def dataset_version(relative_name: str) -> str:
+    """Content hash of a dataset file; changes whenever the file does."""
+    db = sqlite_db()
+    if db is not None:
+        row = db.execute("SELECT version FROM versions WHERE dataset = ?", (_table(relative_name),)).fetchone()
+        return row[0] if row else "missing"
+    return _load_cached(relative_name)[0]
+
+
+def find_record(relative_name: str, key: str, value: str) -> Tuple[str, Optional[Any]]:
+    """(dataset version, the record whose `key` is `value`, or None)."""
+    db = sqlite_db()
+    if db is not None:
+        table = _table(relative_name)
+        columns = SQLITE_LAYOUT[table][1]
+        row = db.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {key} = ?", (value,)).fetchone()
+        return dataset_version(relative_name), dict(zip(columns, row)) if row else None
+    if relative_name in ("crm.json", "credit_bureau.json"):
+        version, data = _load_cached(relative_name)
+        return version, data.get(value)
+    version, index = load_index(relative_name, key)
+    return version, index.get(value)
+
+
+def dataset_response(relative_name: str) -> Any:
+    """A whole dataset: the JSON file's content, or streamed from reference.db in the same layout."""
+    db = sqlite_db()
+    if db is None:
+        return load_json_file(relative_name)
+    table = _table(relative_name)
+    key, columns = SQLITE_LAYOUT[table]
+
+    def stream():
+        # A connection of its own: Starlette pulls each chunk on whichever
+        # threadpool thread is free, one at a time
+        conn = sqlite3.connect(f"file:{BASE_DIR / SQLITE_FILE}?mode=ro", uri=True, check_same_thread=False)
+        select = f"SELECT {key + ', ' if key else ''}{', '.join(columns)} FROM {table}"
+        try:
+            yield "{" if key else "["
+            for i, row in enumerate(conn.execute(select)):
+                if key:
+                    item = f"{json.dumps(row[0])}:{json.dumps(dict(zip(columns, row[1:])))}"
+                else:
+                    item = json.dumps(dict(zip(columns, row)))
+                yield item if i == 0 else "," + item
+            yield "}" if key else "]"
+        finally:
+            conn.close()
+
+    return StreamingResponse(stream(), media_type="application/json")
+
+
+def load_index(relative_name: str, key: str) -> Tuple[str, Dict[str, Any]]:
+    """Return (version, {key value: record}) for a list-shaped dataset."""
+    version, data = _load_cached(relative_name)
+    cached = _index_cache.get((relative_name, key))
+    if cached is None or cached[0] != version:
+        cached = (version, {str(record[key]): record for record in data})
+        _index_cache[(relative_name, key)] = cached
+    return cached
+
+
+def record_response(request: Request, response: Response, record: Optional[Any], version: str, what: str) -> Any:
+    """
+    Per-key lookup result with an ETag derived from the record itself, so
+    clients can revalidate with If-None-Match and get a bodyless 304.
+    """
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"{what} not found")
+
+    etag = '"' + hashlib.sha1(json.dumps(record, sort_keys=True).encode()).hexdigest()[:16] + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    response.headers["X-Dataset-Version"] = version
+    return record
+
+
+@app.get("/version", summary="Dataset versions")
+def get_version(request: Request, response: Response) -> Any:
+    """
+    Content hash of every dataset. The ETag covers all of them, so a poller
+    can send If-None-Match and only act when something changed.
+    """
+    versions = {name: dataset_version(file_name) for name, file_name in DATASETS.items()}
+    etag = '"' + hashlib.sha1(json.dumps(versions, sort_keys=True).encode()).hexdigest()[:16] + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return versions
 
 
 @app.get("/credit-bureau", summary="Get all credit bureau entries")
 def get_credit_bureau() -> Dict[str, Dict[str, int]]:
     """Return the full credit_bureau.json content."""
-    data = load_json_file("credit_bureau.json")
-    return data
+    return dataset_response("credit_bureau.json")
 
 
 @app.get("/crm", summary="Get all CRM entries")
 def get_crm() -> Dict[str, Dict[str, str]]:
     """Return the full crm.json content."""
-    data = load_json_file("crm.json")
-    return data
+    return dataset_response("crm.json")
 
 
 @app.get("/customers", summary="Get all customers")
 def get_customers() -> List[Dict[str, Any]]:
     """Return the full customers.json content."""
-    data = load_json_file("customers.json")
-    return data
+    return dataset_response("customers.json")
 
 
 @app.get("/offers", summary="Get all offers")
 def get_offers() -> List[Dict[str, Any]]:
     """Return the full offers.json content."""
-    data = load_json_file("offers.json")
-    return data
+    return dataset_response("offers.json")
+
+
+@app.get("/credit-bureau/{phone}", summary="Get one credit bureau entry")
+def get_credit_bureau_entry(phone: str, request: Request, response: Response) -> Any:
+    version, record = find_record("credit_bureau.json", "phone", phone)
+    return record_response(request, response, record, version, "Credit bureau entry")
+
+
+@app.get("/crm/{phone}", summary="Get one CRM entry")
+def get_crm_entry(phone: str, request: Request, response: Response) -> Any:
+    version, record = find_record("crm.json", "phone", phone)
+    return record_response(request, response, record, version, "CRM entry")
+
+
+@app.get("/customers/by-name/{name}", summary="Get one customer by name")
+def get_customer_by_name(name: str, request: Request, response: Response) -> Any:
+    version, record = find_record("customers.json", "name", name)
+    return record_response(request, response, record, version, "Customer")
+
+
+@app.get("/offers/{phone}", summary="Get the offer for one phone")
+def get_offer(phone: str, request: Request, response: Response) -> Any:
+    version, record = find_record("offers.json", "phone", phone)
+    return record_response(request, response, record, version, "Offer")
 
 
 if __name__ == "__main__":
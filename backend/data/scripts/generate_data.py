@@ -1,68 +1,398 @@
 # scripts/generate_data.py
+"""
+Synthetic reference data: customers, CRM records, credit bureau scores and
+pre-approved offers, consistent with each other (one phone, name and
+score per customer across all four datasets).
+
+Records are generated one customer at a time and streamed to the output,
+so memory stays flat however many are asked for. The same --seed and
+options always produce the same data. Phones and names are unique by
+construction (an affine permutation of the phone space; first x last
+name pairs, then middle initials), so phone and name lookups stay
+unambiguous at millions of customers.
+
+Formats:
+- json     crm.json, credit_bureau.json, customers.json, offers.json in
+           the layout data/dummy-servers/fastapi_server.py serves (default)
+- ndjson   the four datasets as one JSON object per line
+- sqlite   reference.db with one table per dataset, indexed on phone and
+           name; the dummy server serves it directly when present
+- parquet  one file per dataset (needs pyarrow)
+
+Distributions are "value=weight" lists: --score-bands 300-649=15,700-900=85
+picks a band by weight and a score uniformly within it.
+
+Run from data/scripts:
+    python generate_data.py                                   # 10 customers into ../generated_data
+    python generate_data.py --customers 1000000 --format sqlite --output /tmp/refdata --seed 42
+    python ../dummy-servers/fastapi_server.py                 # with GENERATED_DATA_DIR=/tmp/refdata
+"""
+import argparse
+import bisect
+import hashlib
 import json
 import os
 import random
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Sequence, Tuple
 
-BASE_DIR = os.path.dirname(__file__) 
+BASE_DIR = os.path.dirname(__file__)
 OUTPUT_DIR = os.path.join(BASE_DIR, "../generated_data")
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-names = [
-    "Amit Sharma", "Riya Patel", "Kunal Verma", "Sneha Mehta", "Arjun Singh",
-    "Priya Nair", "Rahul Khanna", "Neha Desai", "Vikram Rao", "Ananya Bose"
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Amit", "Ananya", "Anjali", "Arjun", "Aryan", "Bhavna", "Chetan",
+    "Deepa", "Deepak", "Divya", "Farhan", "Gaurav", "Geeta", "Harish", "Isha", "Ishaan", "Jaya",
+    "Karan", "Kavya", "Kiran", "Kunal", "Lakshmi", "Manish", "Meera", "Mohit", "Nandini", "Neha",
+    "Nikhil", "Nisha", "Pooja", "Pranav", "Priya", "Rahul", "Rajesh", "Ravi", "Rhea", "Riya",
+    "Rohan", "Sachin", "Sakshi", "Sameer", "Sanjay", "Shreya", "Siddharth", "Simran", "Sneha", "Suresh",
+    "Tanvi", "Tarun", "Uday", "Varun", "Vidya", "Vikram", "Vivek", "Yash", "Zara", "Zoya",
+]
+LAST_NAMES = [
+    "Agarwal", "Ahuja", "Bajaj", "Banerjee", "Bhat", "Bose", "Chatterjee", "Chauhan", "Chopra", "Das",
+    "Desai", "Dutta", "Gill", "Goel", "Gupta", "Iyer", "Jain", "Joshi", "Kapoor", "Kaur",
+    "Khan", "Khanna", "Kulkarni", "Kumar", "Malhotra", "Mehta", "Menon", "Mishra", "Mukherjee", "Naidu",
+    "Nair", "Pandey", "Patel", "Pillai", "Rao", "Reddy", "Saxena", "Sen", "Sethi", "Shah",
+    "Sharma", "Shetty", "Singh", "Sinha", "Srinivasan", "Subramanian", "Thakur", "Tiwari", "Trivedi", "Varma",
+    "Verma", "Yadav", "Bhatt", "Dubey", "Ghosh", "Hegde", "Kamath", "Lal", "Mathur", "Rastogi",
 ]
+LOCALITIES = ["MG Road", "Station Road", "Park Street", "Nehru Nagar", "Gandhi Nagar", "Civil Lines",
+              "Model Town", "Shivaji Nagar", "Anna Nagar", "Indiranagar", "Salt Lake", "Banjara Hills"]
+
+DEFAULT_SCORE_BANDS = "300-599=5,600-649=10,650-699=20,700-749=30,750-799=25,800-900=10"
+DEFAULT_LIMITS = "50000=20,100000=30,150000=20,200000=15,300000=10,500000=5"
+DEFAULT_CITIES = ("Mumbai=18,Delhi=18,Bengaluru=16,Hyderabad=12,Chennai=12,"
+                  "Pune=8,Kolkata=8,Ahmedabad=5,Jaipur=3")
+DEFAULT_LOANS = "None=50,Car Loan=15,Bike Loan=15,Personal Loan=10,Home Loan=10"
+DEFAULT_TENURES = "12=25,18=20,24=30,36=20,48=5"
+
+# Mobile numbers: +91 followed by 10 digits starting with 6-9
+PHONE_BASE = 6_000_000_000
+PHONE_SPACE = 4_000_000_000
+
+DATASETS = ("crm", "credit_bureau", "customers", "offers")
+
+
+class Weighted:
+    """Weighted choice among values, by one bisect on the cumulative weights."""
+
+    def __init__(self, spec: str, parse=str):
+        self.values: List = []
+        cumulative: List[float] = []
+        total = 0.0
+        for part in spec.split(","):
+            value, _, weight = part.rpartition("=")
+            if not value:
+                value, weight = weight, "1"
+            total += float(weight)
+            self.values.append(parse(value.strip()))
+            cumulative.append(total)
+        if not self.values or total <= 0:
+            raise argparse.ArgumentTypeError(f"no positive weights in {spec!r}")
+        self.cumulative = [c / total for c in cumulative]
+
+    def pick(self, rng: random.Random):
+        return self.values[min(bisect.bisect_right(self.cumulative, rng.random()), len(self.values) - 1)]
 
-cities = ["Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Chennai"]
-
-customers = []
-crm = {}
-credit_bureau = {}
-offers = []
-
-for i, name in enumerate(names, start=1):
-
-    age = random.randint(22, 55)
-    city = random.choice(cities)
-    phone = f"+91{random.randint(6000000000, 9999999999)}"
-    credit_score = random.randint(650, 900)
-    pre_limit = random.choice([50000, 100000, 150000, 200000, 300000])
-
-    customers.append({
-        "customer_id": i,
-        "name": name,
-        "age": age,
-        "city": city,
-        "current_loan_details": random.choice(["None", "Car Loan", "Bike Loan", "Personal Loan"]),
-        "credit_score": credit_score,
-        "pre_approved_limit": pre_limit
-    })
-
-    crm[phone] = {
-        "name": name,
-        "phone": phone,
-        "address": f"House No {random.randint(1, 300)}, {city}"
-    }
 
-    credit_bureau[phone] = {
-        "credit_score": credit_score
+def score_band(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    low, high = int(low), int(high or low)
+    if not 300 <= low <= high <= 900:
+        raise argparse.ArgumentTypeError(f"score band {value!r} must be within 300-900")
+    return low, high
+
+
+def bijective_letters(n: int) -> str:
+    """0 -> A, 25 -> Z, 26 -> AA, ..."""
+    letters = ""
+    n += 1
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+class CustomerGenerator:
+    """
+    Deterministic stream of customers. Each record carries every field of
+    the four datasets; see split().
+    """
+
+    def __init__(self, seed: int, score_bands: Weighted, limits: Weighted, cities: Weighted,
+                 loans: Weighted, tenures: Weighted, bureau_missing: float = 0.0):
+        self.rng = random.Random(seed)
+        self.score_bands = score_bands
+        self.limits = limits
+        self.cities = cities
+        self.loans = loans
+        self.tenures = tenures
+        self.bureau_missing = bureau_missing
+
+        # Seeded name order, and an affine permutation of the phone space
+        # (multiplier coprime with PHONE_SPACE) so phones look random but
+        # never repeat
+        self.first_names = self.rng.sample(FIRST_NAMES, len(FIRST_NAMES))
+        self.last_names = self.rng.sample(LAST_NAMES, len(LAST_NAMES))
+        self.phone_step = self.rng.randrange(1, PHONE_SPACE // 10) * 10 + self.rng.choice((1, 3, 7, 9))
+        self.phone_offset = self.rng.randrange(PHONE_SPACE)
+
+    def name(self, i: int) -> str:
+        firsts, lasts = len(self.first_names), len(self.last_names)
+        variant, i = divmod(i, firsts * lasts)
+        q, r = divmod(i, firsts)
+        first, last = self.first_names[r], self.last_names[(q + r) % lasts]
+        if not variant:
+            return f"{first} {last}"
+        initials = " ".join(f"{letter}." for letter in bijective_letters(variant - 1))
+        return f"{first} {initials} {last}"
+
+    def phone(self, i: int) -> str:
+        return f"+91{PHONE_BASE + (self.phone_step * i + self.phone_offset) % PHONE_SPACE}"
+
+    def __call__(self, count: int) -> Iterator[Dict]:
+        if count > PHONE_SPACE:
+            raise ValueError(f"at most {PHONE_SPACE:,} unique phones")
+        rng = self.rng
+        for i in range(count):
+            low, high = self.score_bands.pick(rng)
+            score = rng.randint(low, high)
+            limit = self.limits.pick(rng)
+            city = self.cities.pick(rng)
+            # Better scores get better rates: 15% at 300 down to 10% at 900, +-0.75
+            rate = 15 - (score - 300) / 600 * 5 + rng.uniform(-0.75, 0.75)
+            yield {
+                "customer_id": i + 1,
+                "name": self.name(i),
+                "phone": self.phone(i),
+                "age": rng.randint(21, 60),
+                "city": city,
+                "address": f"House No {rng.randint(1, 999)}, {rng.choice(LOCALITIES)}, {city}",
+                "current_loan_details": self.loans.pick(rng),
+                "credit_score": score,
+                "in_bureau": rng.random() >= self.bureau_missing,
+                "pre_approved_limit": limit,
+                "interest_rate": round(min(max(rate, 9.5), 16.0), 2),
+                "tenure_months": self.tenures.pick(rng),
+            }
+
+
+def split(record: Dict) -> Dict[str, Tuple]:
+    """The record's entry in each dataset, as (key, row) with row in the JSON layout."""
+    phone = record["phone"]
+    return {
+        "crm": (phone, {"name": record["name"], "phone": phone, "address": record["address"]}),
+        "credit_bureau": (phone, {"credit_score": record["credit_score"]}) if record["in_bureau"] else None,
+        "customers": (None, {field: record[field] for field in (
+            "customer_id", "name", "age", "city", "current_loan_details", "credit_score", "pre_approved_limit")}),
+        "offers": (None, {"phone": phone, "offer_amount": record["pre_approved_limit"],
+                          "interest_rate": record["interest_rate"], "tenure_months": record["tenure_months"]}),
     }
 
-    offers.append({
-        "phone": phone,
-        "offer_amount": pre_limit,
-        "interest_rate": round(random.uniform(10.0, 15.0), 2),
-        "tenure_months": random.choice([12, 18, 24, 36])
-    })
 
-with open(os.path.join(OUTPUT_DIR, "customers.json"), "w") as f:
-    json.dump(customers, f, indent=2)
+# One compact encoder for every record (json.dumps with options builds a new one per call)
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+class JSONWriter:
+    """
+    The dummy server's layout: crm and credit_bureau are objects keyed by
+    phone, customers and offers are arrays. Written incrementally, one
+    record per line.
+    """
+
+    KEYED = {"crm", "credit_bureau"}
+
+    def __init__(self, output: Path):
+        self.files = {name: (output / f"{name}.json").open("w", encoding="utf-8") for name in DATASETS}
+        self.first = {name: True for name in DATASETS}
+        for name, f in self.files.items():
+            f.write("{\n" if name in self.KEYED else "[\n")
+
+    def write(self, entries: Dict[str, Tuple]) -> None:
+        for name, entry in entries.items():
+            if entry is None:
+                continue
+            key, row = entry
+            line = f"{_dumps(key)}: {_dumps(row)}" if name in self.KEYED else _dumps(row)
+            self.files[name].write(line if self.first[name] else ",\n" + line)
+            self.first[name] = False
+
+    def close(self) -> None:
+        for name, f in self.files.items():
+            f.write("\n}\n" if name in self.KEYED else "\n]\n")
+            f.close()
+
+
+class NDJSONWriter:
+    """One JSON object per line per dataset; credit bureau rows carry their phone."""
+
+    def __init__(self, output: Path):
+        self.files = {name: (output / f"{name}.ndjson").open("w", encoding="utf-8") for name in DATASETS}
+
+    def write(self, entries: Dict[str, Tuple]) -> None:
+        for name, entry in entries.items():
+            if entry is None:
+                continue
+            key, row = entry
+            if name == "credit_bureau":
+                row = {"phone": key, **row}
+            self.files[name].write(_dumps(row) + "\n")
+
+    def close(self) -> None:
+        for f in self.files.values():
+            f.close()
+
+
+SQLITE_SCHEMA = {
+    "crm": ("phone TEXT PRIMARY KEY, name TEXT NOT NULL, address TEXT NOT NULL", ("phone", "name", "address")),
+    "credit_bureau": ("phone TEXT PRIMARY KEY, credit_score INTEGER NOT NULL", ("phone", "credit_score")),
+    "customers": ("customer_id INTEGER PRIMARY KEY, name TEXT NOT NULL, age INTEGER, city TEXT, "
+                  "current_loan_details TEXT, credit_score INTEGER, pre_approved_limit INTEGER",
+                  ("customer_id", "name", "age", "city", "current_loan_details", "credit_score", "pre_approved_limit")),
+    "offers": ("phone TEXT PRIMARY KEY, offer_amount INTEGER, interest_rate REAL, tenure_months INTEGER",
+               ("phone", "offer_amount", "interest_rate", "tenure_months")),
+}
+
+
+class SQLiteWriter:
+    """
+    reference.db: one table per dataset, bulk-loaded in batches with the
+    name index built at the end, plus a `versions` table with a content
+    hash per dataset (what the dummy server reports at /version).
+    """
+
+    def __init__(self, output: Path, batch_size: int = 50_000):
+        path = output / "reference.db"
+        path.unlink(missing_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        for name, (columns, _) in SQLITE_SCHEMA.items():
+            self.conn.execute(f"CREATE TABLE {name} ({columns})")
+        self.conn.execute("CREATE TABLE versions (dataset TEXT PRIMARY KEY, version TEXT NOT NULL)")
+        self.batch_size = batch_size
+        self.batches: Dict[str, List[Tuple]] = {name: [] for name in DATASETS}
+        self.digests = {name: hashlib.sha1() for name in DATASETS}
+
+    def write(self, entries: Dict[str, Tuple]) -> None:
+        for name, entry in entries.items():
+            if entry is None:
+                continue
+            key, row = entry
+            row = {"phone": key, **row} if key is not None and "phone" not in row else row
+            values = tuple(row[column] for column in SQLITE_SCHEMA[name][1])
+            self.digests[name].update(_dumps(values).encode())
+            batch = self.batches[name]
+            batch.append(values)
+            if len(batch) >= self.batch_size:
+                self._flush(name)
+
+    def _flush(self, name: str) -> None:
+        columns = SQLITE_SCHEMA[name][1]
+        self.conn.executemany(
+            f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", self.batches[name]
+        )
+        self.batches[name] = []
+
+    def close(self) -> None:
+        for name in DATASETS:
+            self._flush(name)
+        self.conn.execute("CREATE UNIQUE INDEX idx_customers_name ON customers(name)")
+        self.conn.executemany("INSERT INTO versions VALUES (?, ?)",
+                              [(name, digest.hexdigest()[:16]) for name, digest in self.digests.items()])
+        self.conn.commit()
+        self.conn.close()
+
+
+class ParquetWriter:
+    """One Parquet file per dataset, written in row groups of batch_size."""
+
+    def __init__(self, output: Path, batch_size: int = 100_000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.output = output
+        self.batch_size = batch_size
+        self.writers: Dict[str, object] = {}
+        self.batches: Dict[str, List[Dict]] = {name: [] for name in DATASETS}
+
+    def write(self, entries: Dict[str, Tuple]) -> None:
+        for name, entry in entries.items():
+            if entry is None:
+                continue
+            key, row = entry
+            self.batches[name].append({"phone": key, **row} if key is not None and "phone" not in row else row)
+            if len(self.batches[name]) >= self.batch_size:
+                self._flush(name)
+
+    def _flush(self, name: str) -> None:
+        rows = self.batches[name]
+        if not rows:
+            return
+        table = self.pa.Table.from_pylist(rows)
+        if name not in self.writers:
+            self.writers[name] = self.pq.ParquetWriter(str(self.output / f"{name}.parquet"), table.schema)
+        self.writers[name].write_table(table)
+        self.batches[name] = []
+
+    def close(self) -> None:
+        for name in DATASETS:
+            self._flush(name)
+        for writer in self.writers.values():
+            writer.close()
+
+
+WRITERS = {"json": JSONWriter, "ndjson": NDJSONWriter, "sqlite": SQLiteWriter, "parquet": ParquetWriter}
+
+
+def generate(count: int, output: Path, fmt: str, generator: CustomerGenerator, progress_every: int = 100_000) -> Dict:
+    """Stream `count` customers into `output` in `fmt`; returns a summary."""
+    output.mkdir(parents=True, exist_ok=True)
+    writer = WRITERS[fmt](output)
+    started = time.perf_counter()
+    scores = {"below_700": 0, "700_plus": 0}
+    try:
+        for i, record in enumerate(generator(count), start=1):
+            writer.write(split(record))
+            scores["700_plus" if record["credit_score"] >= 700 else "below_700"] += 1
+            if progress_every and i % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"🔄 {i:,} / {count:,} customers ({i / elapsed:,.0f}/s)", flush=True)
+    finally:
+        writer.close()
+    return {"customers": count, "seconds": round(time.perf_counter() - started, 2), "scores": scores}
+
+
+def main(argv: Sequence[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate synthetic customer, CRM, bureau and offer data")
+    parser.add_argument("--customers", type=int, default=10)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="json")
+    parser.add_argument("--output", type=Path, default=Path(OUTPUT_DIR))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--score-bands", type=lambda spec: Weighted(spec, score_band), default=DEFAULT_SCORE_BANDS,
+                        help=f"credit score bands and weights (default {DEFAULT_SCORE_BANDS})")
+    parser.add_argument("--limits", type=lambda spec: Weighted(spec, int), default=DEFAULT_LIMITS,
+                        help=f"pre-approved limits and weights (default {DEFAULT_LIMITS})")
+    parser.add_argument("--cities", type=Weighted, default=DEFAULT_CITIES, help="cities and weights")
+    parser.add_argument("--loans", type=Weighted, default=DEFAULT_LOANS, help="current loans and weights")
+    parser.add_argument("--tenures", type=lambda spec: Weighted(spec, int), default=DEFAULT_TENURES,
+                        help="offer tenures in months and weights")
+    parser.add_argument("--bureau-missing", type=float, default=0.0,
+                        help="share of customers without a credit bureau record")
+    args = parser.parse_args(argv)
 
-with open(os.path.join(OUTPUT_DIR, "crm.json"), "w") as f:
-    json.dump(crm, f, indent=2)
+    generator = CustomerGenerator(args.seed, args.score_bands, args.limits, args.cities,
+                                  args.loans, args.tenures, bureau_missing=args.bureau_missing)
+    summary = generate(args.customers, args.output, args.format, generator)
+    print(f"✅ {summary['customers']:,} customers written to {args.output} as {args.format} "
+          f"in {summary['seconds']} s (credit score 700+: {summary['scores']['700_plus']:,})")
 
-with open(os.path.join(OUTPUT_DIR, "credit_bureau.json"), "w") as f:
-    json.dump(credit_bureau, f, indent=2)
 
-with open(os.path.join(OUTPUT_DIR, "offers.json"), "w") as f:
-    json.dump(offers, f, indent=2)
+if __name__ == "__main__":
+    main()
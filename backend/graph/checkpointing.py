@@ -0,0 +1,216 @@
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.messages import RemoveMessage
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.types import Command
+from graph.state import AgentState
+from graph.workflow import apply_customer_event, create_loan_workflow, loan_workflow
+
+DEFAULT_CHECKPOINT_DB = Path(__file__).parent.parent / "data" / "checkpoints.db"
+
+
+class ResumableWorkflow:
+    """
+    Runs chat turns and salary-slip results through the loan workflow as one
+    checkpointed LangGraph thread per session (thread_id = session_id).
+
+    A turn resumes the thread where it paused (waiting for the customer's
+    reply or for the salary slip), so only the nodes after that point run.
+    Every finished node is checkpointed, so if a worker dies mid-turn the
+    next turn for that session first completes the interrupted run from the
+    last finished node instead of starting the application over. If that
+    fails too, the thread is dropped and the turn starts from the session
+    store's state.
+
+    A thread that has finished (approved, rejected) is started again at
+    Master from its final state; a session without a thread (new, or saved
+    before checkpointing) from the session store's state, as without
+    checkpointing.
+
+    Only the latest checkpoint of each thread is kept, and threads idle
+    past the session TTL are dropped with evict_idle. start() has to be
+    awaited on the serving event loop; until then, or with checkpointing
+    off, turns run on the plain workflow.
+    """
+
+    def __init__(self, db_path: Optional[Path] = DEFAULT_CHECKPOINT_DB):
+        self.db_path = db_path
+        self.graph = loan_workflow
+        self.saver = None
+        self._conn = None
+        self.resumed = 0
+        self.started = 0
+        self.recovered = 0
+        self.recovery_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.saver is not None
+
+    async def start(self) -> None:
+        """Open the checkpoint database and compile the checkpointed workflow."""
+        if self.db_path is None or self.enabled:
+            return
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError:
+            print("⚠️ Warning: langgraph-checkpoint-sqlite is not installed; running without graph checkpoints")
+            return
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = await aiosqlite.connect(str(self.db_path))
+        await self._conn.execute("PRAGMA journal_mode=WAL")
+        await self._conn.execute("PRAGMA synchronous=NORMAL")
+        saver = AsyncSqliteSaver(self._conn)
+        await saver.setup()
+        await self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS thread_activity (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        await self._conn.commit()
+        self.saver = saver
+        self.graph = create_loan_workflow(checkpointer=saver)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+        self._conn = None
+        self.saver = None
+        self.graph = loan_workflow
+
+    @staticmethod
+    def _config(session_id: str) -> Dict:
+        return {"configurable": {"thread_id": session_id}}
+
+    async def prepare(self, session_id: str, state: AgentState, event: Dict) -> Tuple[Any, Any, Optional[Dict]]:
+        """
+        Work out how to run this turn.
+
+        Args:
+            session_id: the session (and thread) id
+            state: the session's current state from the session store
+            event: what the customer sent, see graph.workflow.apply_customer_event
+
+        Returns:
+            (graph, input, config) to pass to ainvoke/astream_events
+        """
+        if not self.enabled:
+            apply_customer_event(state, event)
+            return self.graph, state, None
+
+        config = self._config(session_id)
+        snapshot = await self.graph.aget_state(config)
+        if snapshot.next and not any(task.interrupts for task in snapshot.tasks):
+            # A worker stopped mid-run (or the run failed): finish it from the last checkpoint first
+            print(f"🔄 Resuming interrupted workflow run for session {session_id} at {', '.join(snapshot.next)}")
+            try:
+                await self.graph.ainvoke(None, config)
+                self.recovered += 1
+            except Exception as e:
+                # Failing again would fail every later turn too: drop the
+                # thread and start this turn over from the session store's state
+                print(f"⚠️ Warning: Could not resume workflow for session {session_id}, starting over: {e}")
+                await self.delete(session_id)
+                self.recovery_failures += 1
+            snapshot = await self.graph.aget_state(config)
+
+        if snapshot.next:
+            self.resumed += 1
+            return self.graph, Command(resume=event), config
+
+        # Nothing to resume: start at Master, from the thread's final state
+        # if it has run before (the session store may be a step behind after
+        # a recovered run). The leading marker replaces the thread's history
+        # with the given one, so compaction sticks.
+        if snapshot.values:
+            state = AgentState(**snapshot.values)
+        apply_customer_event(state, event)
+        self.started += 1
+        graph_input = dict(state)
+        graph_input["messages"] = [RemoveMessage(id=REMOVE_ALL_MESSAGES), *state["messages"]]
+        return self.graph, graph_input, config
+
+    async def finish(self, session_id: str, output: Dict) -> AgentState:
+        """
+        Tidy up after a run: drop the thread's older checkpoints and record
+        its activity for idle eviction.
+
+        Returns:
+            The updated session state (the run's output)
+        """
+        state = {key: value for key, value in output.items() if key != "__interrupt__"}
+        if self.enabled:
+            async with self.saver.lock:
+                await self._conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ? AND checkpoint_id < "
+                    "(SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?)",
+                    (session_id, session_id),
+                )
+                await self._conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_id < "
+                    "(SELECT MAX(checkpoint_id) FROM checkpoints WHERE thread_id = ?)",
+                    (session_id, session_id),
+                )
+                await self._conn.execute(
+                    "INSERT INTO thread_activity (thread_id, updated_at) VALUES (?, ?) "
+                    "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                    (session_id, time.time()),
+                )
+                await self._conn.commit()
+        return AgentState(**state)
+
+    async def run(self, session_id: str, state: AgentState, event: Dict) -> AgentState:
+        """Run one turn to completion (or to the next pause) and return the updated state."""
+        graph, graph_input, config = await self.prepare(session_id, state, event)
+        output = await graph.ainvoke(graph_input, config)
+        return await self.finish(session_id, output)
+
+    async def delete(self, session_id: str) -> None:
+        if self.enabled:
+            await self.saver.adelete_thread(session_id)
+            async with self.saver.lock:
+                await self._conn.execute("DELETE FROM thread_activity WHERE thread_id = ?", (session_id,))
+                await self._conn.commit()
+
+    async def evict_idle(self, idle_seconds: float) -> int:
+        """Drop the threads of sessions idle for longer than idle_seconds."""
+        if not self.enabled:
+            return 0
+        async with self.saver.lock:
+            cursor = await self._conn.execute(
+                "SELECT thread_id FROM thread_activity WHERE updated_at < ?", (time.time() - idle_seconds,)
+            )
+            idle = [row[0] for row in await cursor.fetchall()]
+        for thread_id in idle:
+            await self.delete(thread_id)
+        return len(idle)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "db_path": str(self.db_path) if self.db_path else None,
+            "turns_resumed": self.resumed,
+            "turns_started": self.started,
+            "runs_recovered": self.recovered,
+            "recovery_failures": self.recovery_failures,
+        }
+
+
+def create_resumable_workflow() -> ResumableWorkflow:
+    """
+    Build the checkpointed workflow runner from environment configuration.
+
+    GRAPH_CHECKPOINTS     sqlite (default) or off
+    GRAPH_CHECKPOINT_DB   SQLite file for the checkpoints (default data/checkpoints.db)
+    """
+    if os.getenv("GRAPH_CHECKPOINTS", "sqlite") == "off":
+        return ResumableWorkflow(db_path=None)
+    return ResumableWorkflow(Path(os.getenv("GRAPH_CHECKPOINT_DB", DEFAULT_CHECKPOINT_DB)))
+
+
+resumable_workflow = create_resumable_workflow()
+
+__all__ = ["ResumableWorkflow", "create_resumable_workflow", "resumable_workflow"]
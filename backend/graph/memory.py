@@ -0,0 +1,127 @@
+import os
+from typing import List
+
+from langchain_core.messages import AIMessage, HumanMessage
+from graph.state import AgentState
+
+
+class ConversationMemory:
+    """
+    Keeps per-turn conversation bookkeeping O(1) in the length of the chat.
+
+    Agents read the last customer message and the chat handler reads the
+    last reply from pointers on the state (last_user_message, last_reply,
+    turn_count) that are updated as messages are added, instead of scanning
+    state["messages"]. Once the history grows past max_messages, the oldest
+    messages are folded into a rolling plain-text summary
+    (conversation_summary, capped at summary_chars) and dropped, so a
+    session's size stays bounded however long the chat runs.
+
+    Compaction only runs when a customer message is added, at the start of
+    a turn, never while an agent node is working on the history.
+    """
+
+    def __init__(self, max_messages: int = 40, keep_messages: int = 20,
+                 summary_chars: int = 2000, line_chars: int = 200):
+        self.max_messages = max(max_messages, 2)
+        self.keep_messages = min(max(keep_messages, 1), self.max_messages - 1)
+        self.summary_chars = summary_chars
+        self.line_chars = line_chars
+
+    def add_user_message(self, state: AgentState, content: str) -> int:
+        """
+        Append the customer's message for a new turn and compact old history if due.
+
+        Returns:
+            Number of messages folded into the summary (0 if none)
+        """
+        self.ensure(state)
+        state["messages"].append(HumanMessage(content=content))
+        state["last_user_message"] = content
+        state["turn_count"] += 1
+        if len(state["messages"]) > self.max_messages:
+            return self.compact(state)
+        return 0
+
+    @staticmethod
+    def add_reply(state: AgentState, content: str) -> None:
+        """Append an assistant message and point last_reply at it."""
+        state["messages"].append(AIMessage(content=content))
+        if content:
+            state["last_reply"] = content
+
+    def compact(self, state: AgentState) -> int:
+        """
+        Fold all but the newest keep_messages messages into the summary.
+
+        Returns:
+            Number of messages removed from the history
+        """
+        messages = state["messages"]
+        folded = len(messages) - self.keep_messages
+        if folded <= 0:
+            return 0
+
+        lines = [self._summary_line(msg) for msg in messages[:folded] if msg.content]
+        summary = "\n".join(filter(None, [state.get("conversation_summary") or "", *lines]))
+        if len(summary) > self.summary_chars:
+            # Keep the most recent part, starting at a line boundary
+            summary = summary[-self.summary_chars:]
+            summary = summary[summary.find("\n") + 1:] if "\n" in summary else summary
+
+        state["messages"] = messages[folded:]
+        state["conversation_summary"] = summary
+        state["summarized_messages"] += folded
+        return folded
+
+    def ensure(self, state: AgentState) -> None:
+        """
+        Backfill the memory fields on sessions saved before they existed
+        (a one-off scan of the stored history).
+        """
+        if "turn_count" in state:
+            return
+        messages: List = state["messages"]
+        humans = [msg for msg in messages if isinstance(msg, HumanMessage)]
+        replies = [msg.content for msg in messages if msg.content and not isinstance(msg, HumanMessage)]
+        state["last_user_message"] = humans[-1].content if humans else None
+        state["last_reply"] = replies[-1] if replies else None
+        state["turn_count"] = len(humans)
+        state["conversation_summary"] = None
+        state["summarized_messages"] = 0
+
+    def _summary_line(self, msg) -> str:
+        speaker = "Customer" if isinstance(msg, HumanMessage) else "Assistant"
+        text = " ".join(str(msg.content).split())
+        if len(text) > self.line_chars:
+            text = text[:self.line_chars - 1] + "…"
+        return f"{speaker}: {text}"
+
+    def stats(self, state: AgentState) -> dict:
+        return {
+            "turns": state.get("turn_count", 0),
+            "messages": len(state["messages"]),
+            "summarized_messages": state.get("summarized_messages", 0),
+            "summary_chars": len(state.get("conversation_summary") or ""),
+        }
+
+
+def create_conversation_memory() -> ConversationMemory:
+    """
+    Build the conversation memory policy from environment configuration.
+
+    CHAT_HISTORY_MAX_MESSAGES   compact once the history is longer than this (default 40)
+    CHAT_HISTORY_KEEP_MESSAGES  messages kept verbatim after compaction (default 20)
+    CHAT_SUMMARY_MAX_CHARS      size cap of the rolling summary (default 2000)
+    """
+    return ConversationMemory(
+        max_messages=int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", 40)),
+        keep_messages=int(os.getenv("CHAT_HISTORY_KEEP_MESSAGES", 20)),
+        summary_chars=int(os.getenv("CHAT_SUMMARY_MAX_CHARS", 2000)),
+    )
+
+
+conversation_memory = create_conversation_memory()
+add_reply = ConversationMemory.add_reply
+
+__all__ = ["ConversationMemory", "conversation_memory", "create_conversation_memory", "add_reply"]
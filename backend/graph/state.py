@@ -1,6 +1,14 @@
-from typing import TypedDict, Annotated, Literal, Optional
+from typing import TypedDict, Annotated, Literal, Optional, Dict
 from langgraph.graph.message import add_messages
 
+
+def merge_replies(left: Optional[Dict[str, str]], right: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Reducer for branch_replies: parallel branches add entries, None clears them."""
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+
 class AgentState(TypedDict):
     """
     This state object is passed between all agents.
@@ -13,6 +21,17 @@ class AgentState(TypedDict):
     # Chat history 
     messages: Annotated[list, add_messages] 
     
+    # Kept up to date as messages are added (see graph.memory), so no turn
+    # has to scan the history
+    last_user_message: Optional[str]
+    last_reply: Optional[str]
+    turn_count: int
+    conversation_summary: Optional[str]  # older messages folded out of `messages`
+    summarized_messages: int
+    # Replies from steps that run in parallel, keyed by step; the join node
+    # after them adds them to `messages` in a fixed order
+    branch_replies: Annotated[Dict[str, str], merge_replies]
+    
     phone: str  
     customer_name: Optional[str] 
     customer_id: Optional[int]  
@@ -38,6 +57,7 @@ class AgentState(TypedDict):
     salary_slip_required: bool 
     salary_slip_uploaded: bool  
     monthly_salary: Optional[float]  
+    salary_verification: Optional[Dict]  # declared vs extracted salary from the slip
     calculated_emi: Optional[float] 
     
     loan_status: Literal[
@@ -51,9 +71,12 @@ class AgentState(TypedDict):
     ]
     
     rejection_reason: Optional[str]  
+    underwriting_decision: Optional[Dict]  # matching policy rule and policy version
     
     sanction_letter_generated: bool
     sanction_letter_path: Optional[str] 
+    sanction_letter_id: Optional[str]  # content hash in the letter store
+    speculative_letter: Optional[str]  # key of a letter pre-rendered before underwriting decided
     
     current_agent: str
     workflow_complete: bool  
\ No newline at end of file
@@ -0,0 +1,83 @@
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from langchain_core.messages import HumanMessage
+from graph.state import AgentState
+from graph.workflow import WAIT_NODES, loan_workflow
+
+
+def requires_action_for(state: AgentState) -> Optional[str]:
+    """Action the frontend should offer the customer after this turn."""
+    if state["loan_status"] == "awaiting_salary_slip":
+        return "upload_salary_slip"
+    elif state["sanction_letter_generated"]:
+        return "download_sanction_letter"
+    return None
+
+
+async def stream_workflow(
+    graph_input: Any, graph=loan_workflow, config: Optional[Dict] = None
+) -> AsyncIterator[Tuple[str, Dict]]:
+    """
+    Run the loan workflow and yield (event, data) pairs as it progresses.
+    
+    graph_input, graph and config are as returned by
+    ResumableWorkflow.prepare; by default the state is run through the
+    plain workflow. Wait nodes (where a checkpointed run pauses or resumes)
+    produce no events.
+
+    Events:
+    - node_start: an agent node began ({"node", "elapsed_ms"})
+    - token: a chunk of LLM output ({"node", "content"})
+    - node_end: an agent node finished ({"node", "elapsed_ms", "loan_status", "requires_action", "messages"});
+      "messages" holds the AI messages the node added, including template
+      messages that never went through the LLM (steps that run in parallel
+      add none; their replies come with the join node after them)
+    - final: the workflow finished ({"state"}); always the last event
+    
+    elapsed_ms is the time since the run started, so node_start/node_end
+    pairs form a timing trace in which parallel steps overlap.
+    """
+    # Agents append to the message list in place, so the count has to be
+    # captured when a node starts rather than read from its end event.
+    message_counts: Dict[str, int] = {}
+    # Parallel steps return only the fields they change; this is the state
+    # their status and actions are read against
+    latest: Dict = {}
+    started = time.perf_counter()
+    
+    async for event in graph.astream_events(graph_input, config, version="v2"):
+        kind = event["event"]
+        depth = len(event["parent_ids"])
+        node = event["metadata"].get("langgraph_node")
+
+        if kind == "on_chat_model_stream":
+            content = event["data"]["chunk"].content
+            if content:
+                yield "token", {"node": node, "content": content}
+
+        elif depth == 1 and event["name"] == node and node not in WAIT_NODES:
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            if kind == "on_chain_start":
+                latest = event["data"]["input"]
+                message_counts[node] = len(latest["messages"])
+                yield "node_start", {"node": node, "elapsed_ms": elapsed_ms}
+            elif kind == "on_chain_end":
+                before = message_counts.pop(node, 0)
+                output = event["data"]["output"]
+                view = output if "messages" in output else {**latest, **output}
+                yield "node_end", {
+                    "node": node,
+                    "elapsed_ms": elapsed_ms,
+                    "loan_status": view["loan_status"],
+                    "requires_action": requires_action_for(view),
+                    "messages": [
+                        msg.content for msg in output["messages"][before:]
+                        if msg.content and not isinstance(msg, HumanMessage)
+                    ] if "messages" in output else [],
+                }
+
+        elif depth == 0 and kind == "on_chain_end":
+            yield "final", {"state": event["data"]["output"]}
+
+
+__all__ = ["stream_workflow", "requires_action_for"]
@@ -1,9 +1,16 @@
+from functools import wraps
+from typing import Dict, List, Sequence, Union
+from langchain_core.messages import RemoveMessage
 from langgraph.graph import StateGraph, END
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+from langgraph.types import interrupt
 from graph.state import AgentState
+from graph.memory import add_reply, conversation_memory
+from services.telemetry import node_seconds, tracer
 from agents.master_agent import master_agent_node
-from agents.sales_agent import sales_agent_node
+from agents.sales_agent import sales_agent_node, price_offer_node
 from agents.verification_agent import verification_agent_node
-from agents.underwritting_agent import underwriting_agent_node
+from agents.underwritting_agent import underwriting_agent_node, credit_check_node, approval_message_node
 from agents.sanction_generator import sanction_generator_node
 
 
@@ -13,50 +20,58 @@ def route_after_master(state: AgentState) -> str:
     
     Routes:
     - If initial greeting, go to sales
-    - If approved/rejected/awaiting_salary, end workflow
+    - If a salary slip has just been uploaded, resume underwriting
+    - If awaiting the salary slip, wait for it
+    - If approved/rejected, end workflow
     - Otherwise, continue to appropriate agent
     """
     status = state['loan_status']
     
     if status == 'negotiating':
         return 'sales'
-    elif status in ['approved', 'rejected', 'awaiting_salary_slip']:
+    elif status == 'underwriting':
+        return 'underwriting'
+    elif status == 'awaiting_salary_slip':
+        return 'wait_for_salary_slip'
+    elif status in ['approved', 'rejected']:
         return END
     else:
         return END
 
 
-def route_after_sales(state: AgentState) -> str:
-    """
-    After sales, always go to verification if we have complete loan details.
-    """
-    if state['requested_loan_amount'] and state['requested_tenure']:
-        return 'verification'
-    else:
-        # Still collecting information, stay in sales
-        return END
+# Independent steps that run in parallel once the loan details are
+# complete, and after approval; each join adds their replies in this order
+APPLICATION_CHECKS = ("price_offer", "verification", "credit_check")
+APPLICATION_REPLIES = ("offer", "verification")
+APPROVAL_STEPS = ("approval_message", "sanction")
+APPROVAL_REPLIES = ("approval", "sanction")
 
 
-def route_after_verification(state: AgentState) -> str:
+def route_after_sales(state: AgentState) -> Union[str, List[str]]:
     """
-    After verification, always go to underwriting.
+    Once we have complete loan details, price the offer, verify KYC and
+    check credit in parallel.
     """
-    return 'underwriting'
+    if state['requested_loan_amount'] and state['requested_tenure']:
+        return list(APPLICATION_CHECKS)
+    else:
+        # Still collecting information, wait for the customer's reply
+        return 'wait_for_customer'
 
 
-def route_after_underwriting(state: AgentState) -> str:
+def route_after_underwriting(state: AgentState) -> Union[str, List[str]]:
     """
     Route based on underwriting decision.
     
     Routes:
-    - If approved, go to sanction letter generation
+    - If approved, write the approval message and the sanction letter in parallel
     - If rejected or needs salary slip, go back to master for final message
     - Otherwise, end
     """
     status = state['loan_status']
     
     if status == 'approved':
-        return 'sanction'
+        return list(APPROVAL_STEPS)
     elif status == 'rejected':
         return 'master_final'
     elif status == 'awaiting_salary_slip':
@@ -65,30 +80,132 @@ def route_after_underwriting(state: AgentState) -> str:
         return END
 
 
-def route_after_sanction(state: AgentState) -> str:
+def add_branch_replies(state: AgentState, order: Sequence[str]) -> None:
+    """Move the parallel steps' replies into the conversation, in `order`."""
+    replies = state.get('branch_replies') or {}
+    for step in order:
+        if replies.get(step):
+            add_reply(state, replies[step])
+    state['branch_replies'] = None  # cleared by the reducer
+
+
+async def join_checks_node(state: AgentState) -> AgentState:
+    """Join pricing, verification and the credit check, then on to underwriting."""
+    add_branch_replies(state, APPLICATION_REPLIES)
+    state['loan_status'] = 'underwriting'
+    state['current_agent'] = 'underwriting'
+    return state
+
+
+async def join_approval_node(state: AgentState) -> AgentState:
+    """Join the approval message and the sanction letter."""
+    add_branch_replies(state, APPROVAL_REPLIES)
+    return state
+
+
+def apply_customer_event(state: AgentState, event: Dict) -> None:
     """
-    After sanction letter generation, go to master for final congratulations.
+    Apply what the customer sent to the state: {"message": text} for a chat
+    message, {"salary_slip": {field: value}} for the state changes from an
+    uploaded salary slip.
     """
-    return 'master_final'
+    if "message" in event:
+        if conversation_memory.add_user_message(state, event["message"]):
+            # History was compacted; the reducer would otherwise merge the
+            # dropped messages back in
+            state["messages"] = [RemoveMessage(id=REMOVE_ALL_MESSAGES), *state["messages"]]
+    if "salary_slip" in event:
+        state.update(event["salary_slip"])
+
 
+async def wait_for_customer_node(state: AgentState) -> AgentState:
+    """Pause until the customer's next chat message (resumed with {"message": ...})."""
+    apply_customer_event(state, interrupt({"waiting_for": "message"}))
+    return state
 
-def create_loan_workflow():
+
+async def wait_for_salary_slip_node(state: AgentState) -> AgentState:
+    """
+    Pause until the salary slip has been read (resumed with
+    {"salary_slip": ...}); a chat message meanwhile gets the document
+    request again.
+    """
+    apply_customer_event(state, interrupt({"waiting_for": "salary_slip"}))
+    return state
+
+
+def route_after_customer_message(state: AgentState) -> str:
+    """Back to negotiating, or to master for anything else."""
+    return 'sales' if state['loan_status'] == 'negotiating' else 'master'
+
+
+def route_after_salary_slip(state: AgentState) -> str:
+    """Underwrite once the slip is in; otherwise repeat the document request."""
+    return 'underwriting' if state['loan_status'] == 'underwriting' else 'master_final'
+
+
+# Nodes that only pause the graph; they produce no messages of their own
+WAIT_NODES = ("wait_for_customer", "wait_for_salary_slip")
+
+
+def traced_node(name: str, node):
+    """Run a node inside a "node <name>" span, timed into loan_graph_node_duration_seconds."""
+    @wraps(node)
+    async def run(state: AgentState):
+        with tracer.span(f"node {name}", metric=node_seconds, labels=(name,), node=name):
+            return await node(state)
+    return run
+
+
+def create_loan_workflow(checkpointer=None):
     """
     Create the complete LangGraph workflow.
     
     Flow:
-    START → Master (greet) → Sales (negotiate) → Verification (KYC) 
-    → Underwriting (credit check) → Sanction (PDF) → Master (final) → END
+    START → Master (greet) → Sales (negotiate)
+    → [Pricing | Verification (KYC) | Credit check] → join
+    → Underwriting → [Approval message | Sanction (PDF)] → join
+    → Master (final) → END
+    
+    Steps in brackets don't depend on each other and run concurrently; the
+    join after them waits for all of them and adds their replies to the
+    conversation in a fixed order, so a turn costs about as much as its
+    slowest branch rather than the sum.
+    
+    With a checkpointer the graph runs as one thread per session: where it
+    needs the customer (more loan details, the salary slip) it pauses in a
+    wait node, and the next turn resumes there instead of re-entering at
+    Master. Without one, those points end the run and every turn starts
+    at Master, routing forward from loan_status.
+    
+    Every working node runs in a tracing span (services.telemetry), so a
+    turn's trace shows each node with the LLM and upstream calls it made;
+    the wait nodes only pause the graph and aren't traced.
+    
+    Args:
+        checkpointer: LangGraph checkpoint saver, or None
     """
+    resumable = checkpointer is not None
     
     workflow = StateGraph(AgentState)
     
-    workflow.add_node("master", master_agent_node)
-    workflow.add_node("sales", sales_agent_node)
-    workflow.add_node("verification", verification_agent_node)
-    workflow.add_node("underwriting", underwriting_agent_node)
-    workflow.add_node("sanction", sanction_generator_node)
-    workflow.add_node("master_final", master_agent_node)  # For final messages
+    workflow.add_node("master", traced_node("master", master_agent_node))
+    workflow.add_node("sales", traced_node("sales", sales_agent_node))
+    workflow.add_node("price_offer", traced_node("price_offer", price_offer_node))
+    workflow.add_node("verification", traced_node("verification", verification_agent_node))
+    workflow.add_node("credit_check", traced_node("credit_check", credit_check_node))
+    workflow.add_node("join_checks", traced_node("join_checks", join_checks_node))
+    workflow.add_node("underwriting", traced_node("underwriting", underwriting_agent_node))
+    workflow.add_node("approval_message", traced_node("approval_message", approval_message_node))
+    workflow.add_node("sanction", traced_node("sanction", sanction_generator_node))
+    workflow.add_node("join_approval", traced_node("join_approval", join_approval_node))
+    workflow.add_node("master_final", traced_node("master_final", master_agent_node))  # For final messages
+    if resumable:
+        workflow.add_node("wait_for_customer", wait_for_customer_node)
+        workflow.add_node("wait_for_salary_slip", wait_for_salary_slip_node)
+    
+    wait_for_customer = "wait_for_customer" if resumable else END
+    wait_for_salary_slip = "wait_for_salary_slip" if resumable else END
     
     workflow.set_entry_point("master")
     
@@ -97,6 +214,8 @@ def create_loan_workflow():
         route_after_master,
         {
             "sales": "sales",
+            "underwriting": "underwriting",
+            "wait_for_salary_slip": wait_for_salary_slip,
             END: END
         }
     )
@@ -105,42 +224,63 @@ def create_loan_workflow():
         "sales",
         route_after_sales,
         {
-            "verification": "verification",
-            END: END
-        }
-    )
-    
-    workflow.add_conditional_edges(
-        "verification",
-        route_after_verification,
-        {
-            "underwriting": "underwriting"
+            **{step: step for step in APPLICATION_CHECKS},
+            "wait_for_customer": wait_for_customer
         }
     )
+    workflow.add_edge(list(APPLICATION_CHECKS), "join_checks")
+    workflow.add_edge("join_checks", "underwriting")
     
     workflow.add_conditional_edges(
         "underwriting",
         route_after_underwriting,
         {
-            "sanction": "sanction",
+            **{step: step for step in APPROVAL_STEPS},
             "master_final": "master_final",
             END: END
         }
     )
+    workflow.add_edge(list(APPROVAL_STEPS), "join_approval")
+    workflow.add_edge("join_approval", "master_final")
     
-    workflow.add_conditional_edges(
-        "sanction",
-        route_after_sanction,
-        {
-            "master_final": "master_final"
-        }
-    )
-    
-    workflow.add_edge("master_final", END)
+    if resumable:
+        workflow.add_conditional_edges(
+            "master_final",
+            route_after_master,
+            {
+                "wait_for_salary_slip": "wait_for_salary_slip",
+                "sales": "sales",
+                "underwriting": "underwriting",
+                END: END
+            }
+        )
+        workflow.add_conditional_edges(
+            "wait_for_customer",
+            route_after_customer_message,
+            {
+                "sales": "sales",
+                "master": "master"
+            }
+        )
+        workflow.add_conditional_edges(
+            "wait_for_salary_slip",
+            route_after_salary_slip,
+            {
+                "underwriting": "underwriting",
+                "master_final": "master_final"
+            }
+        )
+    else:
+        workflow.add_edge("master_final", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
 
 
 loan_workflow = create_loan_workflow()
 
-__all__ = ["loan_workflow", "create_loan_workflow"]
\ No newline at end of file
+__all__ = [
+    "loan_workflow",
+    "create_loan_workflow",
+    "apply_customer_event",
+    "WAIT_NODES",
+]
@@ -1,19 +1,129 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from models.customer import ChatRequest, ChatResponse
 from graph.state import AgentState
-from graph.workflow import loan_workflow
-from langchain_core.messages import HumanMessage
+from graph.streaming import stream_workflow, requires_action_for
+from graph.memory import conversation_memory
+from graph.checkpointing import resumable_workflow
+from services.session_store import session_store
+from services.data_services import http_client, reference_data_refresher, reference_data_stats
+from services.llm_gateway import llm_gateway
+from services.pdf_renderer import pdf_renderer
+from services.letter_store import letter_store
+from services.speculative_letters import speculative_letters
+from services.jobs import job_queue, QueueFull
+from services.uploads import salary_slip_receiver, ReceivedFile, UploadRejected
+from services.slip_extractor import slip_extractor
+from services.batch_underwriting import batch_underwriter, iter_ndjson, parse_rows
+from services.http_client import UpstreamError
+from services.rules_engine import underwriting_policy
+from services.offer_grid import offer_grid, QuoteError
+from services.telemetry import metrics, tracer, TracingMiddleware
+from pydantic import ValidationError
+from contextlib import asynccontextmanager
+import asyncio
+import httpx
+import json
+import os
 import uuid
 from typing import Dict, Optional
 from pathlib import Path
-import shutil
+
+SESSION_EVICTION_INTERVAL = 600  # seconds
+LETTER_GC_INTERVAL = float(os.getenv("LETTER_GC_INTERVAL", 3600))  # seconds
+# Browsers may reuse a downloaded letter without asking again; after that
+# they revalidate with If-None-Match and get a 304 while it is unchanged.
+LETTER_CACHE_MAX_AGE = int(os.getenv("LETTER_CACHE_MAX_AGE", 86400))
+# Minimum extraction confidence for the slip's net salary to replace the declared one
+SALARY_CONFIDENCE_THRESHOLD = float(os.getenv("SALARY_CONFIDENCE_THRESHOLD", 0.8))
+BATCH_MAX_ROWS = int(os.getenv("BATCH_MAX_ROWS", 100000))
+BATCH_MAX_BYTES = int(float(os.getenv("BATCH_MAX_MB", 32)) * 1024 * 1024)
+BATCH_CHUNK_SIZE = 5000
+OFFER_GRID_REFRESH_INTERVAL = float(os.getenv("OFFER_GRID_REFRESH_INTERVAL", 30))  # seconds
+
+
+async def evict_idle_sessions():
+    """Periodically drop sessions that have been idle past SESSION_IDLE_TTL."""
+    while True:
+        await asyncio.sleep(SESSION_EVICTION_INTERVAL)
+        try:
+            evicted = await session_store.evict_idle()
+            evicted_threads = await resumable_workflow.evict_idle(session_store.idle_ttl)
+        except Exception as e:
+            print(f"⚠️ Warning: Session eviction failed: {e}")
+            continue
+        if evicted_threads:
+            print(f"🧹 Evicted {evicted_threads} idle workflow threads")
+        if evicted:
+            print(f"🧹 Evicted {evicted} idle sessions")
+
+
+async def collect_letters():
+    """Periodically apply the letter store's retention period and size cap."""
+    while True:
+        await asyncio.sleep(LETTER_GC_INTERVAL)
+        try:
+            removed = await letter_store.acollect_garbage()
+        except OSError as e:
+            print(f"⚠️ Warning: Sanction letter cleanup failed: {e}")
+            continue
+        if removed:
+            print(f"🧹 Removed {removed} expired sanction letters")
+
+
+async def refresh_offer_grid():
+    """Build the offer grid, then keep it in step with reference data and policy changes."""
+    while True:
+        try:
+            await offer_grid.refresh()
+        except (UpstreamError, httpx.HTTPError) as e:
+            print(f"⚠️ Warning: Could not refresh offer grid: {e}")
+        except Exception as e:
+            print(f"⚠️ Warning: Offer grid build failed: {type(e).__name__}: {e}")
+        await asyncio.sleep(OFFER_GRID_REFRESH_INTERVAL)
+
+
+async def warm_up():
+    """
+    Build the LLM clients in the background, so the worker starts serving
+    immediately and the first chat doesn't pay for client construction.
+    Anything that fails here is retried on first use.
+    """
+    try:
+        await asyncio.to_thread(llm_gateway.warm_up)
+    except Exception as e:
+        print(f"⚠️ Warning: Could not initialise LLM clients: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = [
+        asyncio.create_task(evict_idle_sessions()),
+        asyncio.create_task(collect_letters()),
+        asyncio.create_task(reference_data_refresher.run()),
+        asyncio.create_task(refresh_offer_grid()),
+    ]
+    if os.getenv("WARM_UP_ON_STARTUP", "1") == "1":
+        background_tasks.append(asyncio.create_task(warm_up()))
+    await resumable_workflow.start()
+    job_queue.start()
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await job_queue.stop()
+    await resumable_workflow.close()
+    await http_client.aclose()
+    await asyncio.to_thread(pdf_renderer.shutdown)
+    await asyncio.to_thread(slip_extractor.shutdown)
+    await asyncio.to_thread(tracer.flush)
+
 
 app = FastAPI(
     title="CredSaathi Loan Agent API",
     description="Agentic AI system for personal loan processing with multi-agent workflow",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -23,13 +133,49 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TracingMiddleware)
 
-sessions: Dict[str, AgentState] = {}
 
+def cache_lookup_samples():
+    """Lookups of every cache on the chat path, by outcome, from the caches' own counters."""
+    if llm_gateway.cache is not None:
+        for agent, counts in llm_gateway.cache.stats()["agents"].items():
+            for result in ("exact_hits", "similar_hits", "misses"):
+                yield {"cache": "llm_response", "key": agent, "result": result}, counts[result]
+    for cache in reference_data_refresher.caches.values():
+        for result, count in (("hits", cache.hits), ("negative_hits", cache.negative_hits), ("misses", cache.misses)):
+            yield {"cache": "reference_data", "key": cache.name, "result": result}, count
+    yield {"cache": "session", "key": "all", "result": "hits"}, session_store.hits
+    yield {"cache": "session", "key": "all", "result": "misses"}, session_store.misses
+
+
+def cache_hit_ratio_samples():
+    totals: Dict[tuple, list] = {}
+    for labels, count in cache_lookup_samples():
+        entry = totals.setdefault((labels["cache"], labels["key"]), [0, 0])
+        entry[1] += count
+        if labels["result"] != "misses":
+            entry[0] += count
+    for (cache, key), (hits, lookups) in totals.items():
+        yield {"cache": cache, "key": key}, round(hits / lookups, 4) if lookups else 0.0
+
+
+metrics.register_collector("cache_lookups_total", "counter", "Cache lookups by outcome", cache_lookup_samples)
+metrics.register_collector("cache_hit_ratio", "gauge", "Share of cache lookups served from the cache", cache_hit_ratio_samples)
+metrics.register_collector(
+    "trace_spans_exported_total", "counter", "Spans written by the trace file exporter",
+    lambda: [({}, tracer.exporter.exported)] if tracer.exporter is not None else [],
+)
 
 def initialize_state(phone: str, session_id: str) -> AgentState:
     return AgentState(
         messages=[],
+        last_user_message=None,
+        last_reply=None,
+        turn_count=0,
+        conversation_summary=None,
+        summarized_messages=0,
+        branch_replies={},
         phone=phone,
         customer_name=None,
         customer_id=None,
@@ -47,11 +193,15 @@ def initialize_state(phone: str, session_id: str) -> AgentState:
         salary_slip_required=False,
         salary_slip_uploaded=False,
         monthly_salary=None,
+        salary_verification=None,
         calculated_emi=None,
         loan_status="initial",
         rejection_reason=None,
+        underwriting_decision=None,
         sanction_letter_generated=False,
         sanction_letter_path=None,
+        sanction_letter_id=None,
+        speculative_letter=None,
         current_agent="master",
         workflow_complete=False
     )
@@ -66,130 +216,390 @@ async def root():
         "agents": ["Master", "Sales", "Verification", "Underwriting", "Sanction Generator"],
         "endpoints": {
             "chat": "POST /chat",
+            "chat_stream": "POST /chat/stream (SSE)",
+            "chat_websocket": "WS /ws/chat",
             "upload_salary": "POST /upload-salary-slip",
             "session_status": "GET /session/{session_id}/status",
             "download_letter": "GET /download-sanction-letter/{session_id}",
             "list_sessions": "GET /sessions",
-            "delete_session": "DELETE /session/{session_id}"
+            "delete_session": "DELETE /session/{session_id}",
+            "reference_data_stats": "GET /reference-data/stats",
+            "llm_stats": "GET /llm/stats",
+            "pdf_stats": "GET /pdf/stats",
+            "workflow_stats": "GET /workflow/stats",
+            "metrics": "GET /metrics (Prometheus)",
+            "underwrite_batch": "POST /underwrite/batch (NDJSON)"
         }
     }
 
 
+async def load_chat_state(request: ChatRequest, session_id: str) -> AgentState:
+    """Fetch (or start) the session for a chat turn; call under session_store.locked."""
+    state = await session_store.get(session_id)
+    if state is None:
+        state = initialize_state(request.phone, session_id)
+    
+    return state
+
+
+def build_chat_response(session_id: str, updated_state: AgentState) -> ChatResponse:
+    last_response = updated_state.get("last_reply") or "Processing your request..."
+    
+    return ChatResponse(
+        response=last_response,
+        session_id=session_id,
+        loan_status=updated_state["loan_status"],
+        requires_action=requires_action_for(updated_state)
+    )
+
+
+async def chat_events(request: ChatRequest):
+    """
+    Run one chat turn as a stream of (event, data) pairs.
+
+    Starts with a `session` event carrying the session id, relays the
+    workflow's node/token events, and finishes with `done` (the same payload
+    /chat returns) once the updated session has been saved, or `error`.
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+    yield "session", {"session_id": session_id}
+    
+    async with session_store.locked(session_id):
+        state = await load_chat_state(request, session_id)
+        try:
+            graph, graph_input, config = await resumable_workflow.prepare(session_id, state, {"message": request.message})
+            async for event, data in stream_workflow(graph_input, graph, config):
+                if event == "final":
+                    updated_state = await resumable_workflow.finish(session_id, data["state"])
+                    await session_store.put(session_id, updated_state)
+                    yield "done", build_chat_response(session_id, updated_state).model_dump()
+                else:
+                    yield event, data
+        except Exception as e:
+            yield "error", {"detail": f"Error processing request: {str(e)}"}
+
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest):
     session_id = request.session_id or str(uuid.uuid4())
     
-    if session_id not in sessions:
-        sessions[session_id] = initialize_state(request.phone, session_id)
-    
-    state = sessions[session_id]
+    async with session_store.locked(session_id):
+        state = await load_chat_state(request, session_id)
+        try:
+            updated_state = await resumable_workflow.run(session_id, state, {"message": request.message})
+            await session_store.put(session_id, updated_state)
+            return build_chat_response(session_id, updated_state)
+            
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Server-Sent Events version of /chat: node progress and LLM tokens as they happen."""
+    async def sse():
+        async for event, data in chat_events(request):
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
     
-    state["messages"].append(HumanMessage(content=request.message))
+    return StreamingResponse(
+        sse(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket):
+    """
+    WebSocket version of /chat/stream. Each incoming JSON message is a
+    ChatRequest; every event is sent back as {"event": ..., "data": ...}.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            try:
+                request = ChatRequest(**await websocket.receive_json())
+            except (ValidationError, ValueError, TypeError) as e:
+                await websocket.send_json({"event": "error", "data": {"detail": str(e)}})
+                continue
+            
+            async for event, data in chat_events(request):
+                await websocket.send_json({"event": event, "data": data})
+    except WebSocketDisconnect:
+        pass
+
+
+# What an uploaded slip changes in the session, handed to the paused workflow
+SALARY_SLIP_STATE_FIELDS = (
+    "salary_slip_uploaded", "monthly_salary", "salary_verification", "loan_status", "current_agent",
+)
+
+
+def apply_salary_slip(state: AgentState, slip: Dict) -> None:
+    """
+    Underwrite on the salary read from the slip when it was extracted
+    confidently; otherwise keep the declared figure and flag it unverified.
+    """
+    declared = state['monthly_salary']
+    net = slip['net_salary']
+    verified = bool(net and net['confidence'] >= SALARY_CONFIDENCE_THRESHOLD)
+    if verified:
+        state['monthly_salary'] = net['value']
     
+    state['salary_verification'] = {
+        "verified": verified,
+        "declared_salary": declared,
+        "net_salary": net['value'] if net else None,
+        "gross_salary": slip['gross_salary']['value'] if slip['gross_salary'] else None,
+        "employer": slip['employer']['value'] if slip['employer'] else None,
+        "confidence": net['confidence'] if net else 0.0,
+        "warnings": slip['warnings'],
+    }
+
+
+async def process_salary_slip(session_id: str, upload: ReceivedFile) -> Dict:
+    """Background job: read the uploaded salary slip, run underwriting and save the session."""
     try:
-        updated_state = loan_workflow.invoke(state)
-        sessions[session_id] = updated_state
-        
-        ai_messages = [
-            msg.content for msg in updated_state["messages"] 
-            if hasattr(msg, 'content') and msg.content and not isinstance(msg, HumanMessage)
-        ]
-        last_response = ai_messages[-1] if ai_messages else "Processing your request..."
-        
-        requires_action = None
-        if updated_state["loan_status"] == "awaiting_salary_slip":
-            requires_action = "upload_salary_slip"
-        elif updated_state["sanction_letter_generated"]:
-            requires_action = "download_sanction_letter"
+        slip = await slip_extractor.extract(upload.path, upload.sha256)
+    except Exception as e:
+        # Passes the magic-byte check but can't be parsed (or OCR failed):
+        # underwrite on the declared salary, flagged unverified
+        print(f"⚠️ Warning: Could not read salary slip for session {session_id}: {e}")
+        slip = {
+            "gross_salary": None, "net_salary": None, "total_deductions": None, "employer": None,
+            "pages": 0, "ocr_pages": 0, "warnings": [f"salary slip could not be read: {e}"],
+        }
+    
+    async with session_store.locked(session_id):
+        state = await session_store.get(session_id)
+        if state is None:
+            raise ValueError("Session no longer exists")
+        conversation_memory.ensure(state)
+        apply_salary_slip(state, slip)
         
-        return ChatResponse(
-            response=last_response,
-            session_id=session_id,
-            loan_status=updated_state["loan_status"],
-            requires_action=requires_action
+        updated_state = await resumable_workflow.run(
+            session_id, state, {"salary_slip": {field: state[field] for field in SALARY_SLIP_STATE_FIELDS}}
         )
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+        await session_store.put(session_id, updated_state)
+    
+    response = build_chat_response(session_id, updated_state)
+    return {
+        "status": updated_state["loan_status"],
+        "response": response.response,
+        "requires_action": "download_sanction_letter" if updated_state["sanction_letter_generated"] else None,
+        "sha256": upload.sha256,
+        "salary_verification": updated_state["salary_verification"],
+    }
+
 
+SALARY_SLIP_FORM = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "monthly_salary"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary", "description": "PDF, JPG or PNG, max 5MB"},
+                        "monthly_salary": {"type": "number"},
+                    },
+                }
+            }
+        },
+    }
+}
 
-@app.post("/upload-salary-slip/{session_id}")
-async def upload_salary_slip(
-    session_id: str,
-    file: UploadFile = File(...),
-    monthly_salary: float = Form(...)
-):
+
+@app.post("/upload-salary-slip/{session_id}", status_code=202, openapi_extra=SALARY_SLIP_FORM)
+async def upload_salary_slip(session_id: str, request: Request):
+    """
+    Stream a salary slip to disk and queue underwriting in the background.
     
-    if session_id not in sessions:
+    Returns a job id straight away; poll GET /session/{session_id}/status
+    (salary_slip_job) for the outcome.
+    """
+    state = await session_store.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
+    if state['loan_status'] != 'awaiting_salary_slip':
+        raise HTTPException(status_code=409, detail=f"Session is not awaiting a salary slip (status: {state['loan_status']})")
     
-    state = sessions[session_id]
-    
-    upload_dir = Path(__file__).parent / "data" / "uploaded_salary_slips"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    file_ext = Path(file.filename).suffix
-    saved_filename = f"salary_slip_{state['customer_id']}_{uuid.uuid4().hex[:8]}{file_ext}"
-    file_path = upload_dir / saved_filename
-    
-    with file_path.open("wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    state['salary_slip_uploaded'] = True
-    state['monthly_salary'] = monthly_salary
-    
-    state['loan_status'] = 'underwriting'
-    state['current_agent'] = 'underwriting'
+    try:
+        upload = await salary_slip_receiver.receive(
+            request.stream(),
+            request.headers.get("content-type"),
+            request.headers.get("content-length"),
+            name_prefix=f"salary_slip_{state['customer_id']}",
+        )
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
     try:
-        updated_state = loan_workflow.invoke(state)
-        sessions[session_id] = updated_state
+        monthly_salary = float(upload.fields.get("monthly_salary", ""))
+    except ValueError:
+        monthly_salary = 0
+    if monthly_salary <= 0:
+        upload.path.unlink(missing_ok=True)
+        raise HTTPException(status_code=422, detail="monthly_salary must be a positive number")
+    
+    async with session_store.locked(session_id):
+        # Re-read: a chat turn or another upload may have moved it on while the file streamed
+        state = await session_store.get(session_id)
+        if state is None or state['loan_status'] != 'awaiting_salary_slip':
+            upload.path.unlink(missing_ok=True)
+            raise HTTPException(status_code=409, detail="Session is no longer awaiting a salary slip")
         
-        ai_messages = [
-            msg.content for msg in updated_state["messages"] 
-            if hasattr(msg, 'content') and msg.content and not isinstance(msg, HumanMessage)
-        ]
-        last_response = ai_messages[-1] if ai_messages else "Processing your salary slip..."
+        previous = {field: state[field] for field in ('salary_slip_uploaded', 'monthly_salary', 'loan_status', 'current_agent')}
+        state['salary_slip_uploaded'] = True
+        state['monthly_salary'] = monthly_salary
         
-        return {
-            "message": "Salary slip uploaded successfully",
-            "status": updated_state["loan_status"],
-            "response": last_response,
-            "requires_action": "download_sanction_letter" if updated_state["sanction_letter_generated"] else None
-        }
+        state['loan_status'] = 'underwriting'
+        state['current_agent'] = 'underwriting'
+        # Saved before the job is queued: the job reads the session back
+        await session_store.put(session_id, state)
         
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing salary slip: {str(e)}")
+        try:
+            job = job_queue.submit("salary_slip", session_id, lambda: process_salary_slip(session_id, upload))
+        except QueueFull as e:
+            # No job will pick this up: put the session back and drop the file
+            state.update(previous)
+            await session_store.put(session_id, state)
+            upload.path.unlink(missing_ok=True)
+            raise HTTPException(status_code=503, detail=str(e))
+    
+    return {
+        "message": "Salary slip uploaded successfully",
+        "job_id": job.id,
+        "status": job.status,
+        "size": upload.size,
+        "sha256": upload.sha256,
+        "poll": f"/session/{session_id}/status"
+    }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
 
 
 @app.get("/download-sanction-letter/{session_id}")
-async def download_sanction_letter(session_id: str):
-    if session_id not in sessions:
+async def download_sanction_letter(session_id: str, request: Request):
+    state = await session_store.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    state = sessions[session_id]
-    
     if not state['sanction_letter_generated'] or not state['sanction_letter_path']:
         raise HTTPException(status_code=404, detail="Sanction letter not yet generated")
     
-    pdf_path = Path(state['sanction_letter_path'])
+    filename = f"sanction_letter_{state['customer_name'].replace(' ', '_')}.pdf"
+    digest = state.get('sanction_letter_id')
+    
+    if not digest:
+        # Letters issued before the letter store existed
+        pdf_path = Path(state['sanction_letter_path'])
+        if not pdf_path.exists():
+            raise HTTPException(status_code=404, detail="Sanction letter file not found")
+        return FileResponse(path=pdf_path, filename=filename, media_type="application/pdf")
+    
+    # Letters are content-addressed, so the hash is a strong ETag and a
+    # matching revalidation is answered without touching the store.
+    headers = {
+        "ETag": f'"{digest}"',
+        "Cache-Control": f"private, max-age={LETTER_CACHE_MAX_AGE}, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
     
-    if not pdf_path.exists():
-        raise HTTPException(status_code=404, detail="Sanction letter file not found")
+    pdf_path = await letter_store.alocal_path(digest)
+    if pdf_path is None:
+        raise HTTPException(status_code=410, detail="Sanction letter has expired")
     
+    # FileResponse handles Range/If-Range and uses zero-copy sendfile on
+    # servers that support the ASGI pathsend extension.
     return FileResponse(
         path=pdf_path,
-        filename=f"sanction_letter_{state['customer_name'].replace(' ', '_')}.pdf",
-        media_type="application/pdf"
+        filename=filename,
+        media_type="application/pdf",
+        headers=headers
+    )
+
+
+@app.post("/underwrite/batch")
+async def underwrite_batch(request: Request):
+    """
+    Pre-screen many applications with the underwriting rules.
+    
+    Body: NDJSON (or a JSON array), one {"phone", "amount", "tenure",
+    "salary"?, "id"?} object per row. Responds with one NDJSON decision
+    per row, in order, streamed as each chunk of rows is evaluated.
+    """
+    too_large = HTTPException(status_code=413, detail=f"Batch body larger than {BATCH_MAX_BYTES // (1024 * 1024)} MB")
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > BATCH_MAX_BYTES:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > BATCH_MAX_BYTES:
+            raise too_large
+    
+    try:
+        rows = parse_rows(bytes(body))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch: {e}")
+    if len(rows) > BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ROWS} rows per batch")
+    
+    try:
+        snapshot = await batch_underwriter.snapshot()
+    except (UpstreamError, httpx.HTTPError) as e:
+        raise HTTPException(status_code=503, detail=f"Reference data unavailable: {e}")
+    
+    # A plain generator: Starlette iterates it in a worker thread, so the
+    # evaluation and JSON encoding stay off the event loop.
+    return StreamingResponse(
+        iter_ndjson(snapshot, rows, BATCH_CHUNK_SIZE, underwriting_policy.current()),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Rows": str(len(rows))}
     )
 
 
+@app.get("/quote")
+async def get_quote(phone: str, amount: float, tenure: int, salary: Optional[float] = None):
+    """
+    Instant quote from the precomputed offer grid: rate, EMI and the
+    underwriting outcome for a customer, without running the workflow.
+    
+    `amount` is rounded up to the grid's amount step; `tenure` must be one
+    of the grid's tenures. With `salary` the outcome accounts for it as if
+    a salary slip had been verified.
+    """
+    try:
+        quote = offer_grid.quote(phone, amount, tenure, salary)
+    except LookupError:
+        raise HTTPException(status_code=503, detail="Offer grid is still loading")
+    except QuoteError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if quote is None:
+        raise HTTPException(status_code=404, detail="No pre-approved limit for this customer")
+    return quote
+
+
+@app.get("/quote/stats")
+async def get_quote_stats():
+    return offer_grid.stats()
+
+
 @app.get("/session/{session_id}/status")
 async def get_session_status(session_id: str):    
-    if session_id not in sessions:
+    state = await session_store.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    state = sessions[session_id]
+    job = job_queue.latest_for(session_id)
     
     return {
         "session_id": session_id,
@@ -206,39 +616,93 @@ async def get_session_status(session_id: str):
         "kyc_verified": state["kyc_verified"],
         "salary_slip_required": state["salary_slip_required"],
         "salary_slip_uploaded": state["salary_slip_uploaded"],
+        "salary_verification": state.get("salary_verification"),
         "sanction_letter_generated": state["sanction_letter_generated"],
         "workflow_complete": state["workflow_complete"],
-        "rejection_reason": state["rejection_reason"]
+        "rejection_reason": state["rejection_reason"],
+        "underwriting_decision": state.get("underwriting_decision"),
+        "conversation": conversation_memory.stats(state),
+        "salary_slip_job": job.to_dict() if job else None
     }
 
 
 @app.delete("/session/{session_id}")
 async def delete_session(session_id: str):    
-    if session_id in sessions:
-        del sessions[session_id]
+    await resumable_workflow.delete(session_id)
+    if await session_store.delete(session_id):
         return {"message": "Session deleted successfully", "session_id": session_id}
     
     raise HTTPException(status_code=404, detail="Session not found")
 
 
 @app.get("/sessions")
-async def list_sessions():    
+async def list_sessions(limit: int = Query(100, ge=1, le=1000), offset: int = Query(0, ge=0)):
+    summaries = await session_store.list_summaries(limit=limit, offset=offset)
     return {
-        "total_sessions": len(sessions),
+        "total_sessions": await session_store.count(),
+        "limit": limit,
+        "offset": offset,
         "sessions": [
             {
-                "session_id": sid,
-                "customer_name": state["customer_name"],
-                "phone": state["phone"],
-                "status": state["loan_status"],
-                "current_agent": state["current_agent"],
-                "workflow_complete": state["workflow_complete"]
+                "session_id": summary["session_id"],
+                "customer_name": summary["customer_name"],
+                "phone": summary["phone"],
+                "status": summary["loan_status"],
+                "current_agent": summary["current_agent"],
+                "workflow_complete": summary["workflow_complete"]
             }
-            for sid, state in sessions.items()
+            for summary in summaries
         ]
     }
 
 
+@app.get("/reference-data/stats")
+async def get_reference_data_stats():
+    return reference_data_stats()
+
+
+@app.get("/llm/stats")
+async def get_llm_stats():
+    return llm_gateway.stats()
+
+
+@app.get("/pdf/stats")
+async def get_pdf_stats():
+    return {
+        "renderer": pdf_renderer.stats(),
+        "store": await asyncio.to_thread(letter_store.stats),
+        "speculative": speculative_letters.stats(),
+    }
+
+
+@app.get("/workflow/stats")
+async def get_workflow_stats():
+    """Checkpointed workflow runs: turns resumed at a pause vs started at Master, crashed runs recovered."""
+    return resumable_workflow.stats()
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text format: request, node, LLM, upstream, session and PDF latency histograms, LLM tokens, cache hit rates."""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/underwriting/policy")
+async def get_underwriting_policy():
+    underwriting_policy.current()
+    return underwriting_policy.stats()
+
+
+@app.post("/underwriting/policy/reload")
+async def reload_underwriting_policy():
+    """Recompile the policy file now instead of waiting for the next change check."""
+    await asyncio.to_thread(underwriting_policy.reload)
+    stats = underwriting_policy.stats()
+    if stats["last_error"]:
+        raise HTTPException(status_code=422, detail=f"Policy not reloaded: {stats['last_error']}")
+    return stats
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -2,12 +2,18 @@ from .data_services import (
     crm_service,
     credit_bureau_service,
     customer_service,
-    offer_service
+    offer_service,
+    reference_data_refresher,
+    reference_data_stats
 )
+from .session_store import session_store
 
 __all__ = [
     "crm_service",
     "credit_bureau_service", 
     "customer_service",
-    "offer_service"
+    "offer_service",
+    "reference_data_refresher",
+    "reference_data_stats",
+    "session_store"
 ]
\ No newline at end of file
@@ -0,0 +1,273 @@
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from services.data_services import http_client, reference_data_refresher
+from services.http_client import PooledHTTPClient
+from services.pricing import default_rates
+from services.rules_engine import CompiledPolicy, underwriting_policy
+from utils.emi import emi_booked
+
+# Outcomes decided before the policy runs (the row can't be evaluated);
+# every other reason_code is the id of the policy rule that matched.
+INPUT_OUTCOMES = ["invalid_input", "customer_not_found"]
+
+
+class ReferenceSnapshot:
+    """
+    Columnar copy of the reference datasets, indexed by phone, for
+    vectorised lookups: one NumPy array per attribute, with missing
+    values as 0 (credit score) or NaN (limit, offer rate).
+    """
+
+    def __init__(self, crm: Dict, credit_bureau: Dict, customers: List[Dict], offers: List[Dict], versions: Dict):
+        import numpy as np
+
+        customers_by_name = {customer["name"]: customer for customer in customers}
+        offers_by_phone = {offer["phone"]: offer for offer in offers}
+
+        self.phones = list(crm)
+        self.index = {phone: i for i, phone in enumerate(self.phones)}
+        self.names = [crm[phone]["name"] for phone in self.phones]
+        self.credit_score = np.array(
+            [(credit_bureau.get(phone) or {}).get("credit_score") or 0 for phone in self.phones], dtype=np.int32
+        )
+        self.pre_approved_limit = np.array(
+            [customers_by_name.get(name, {}).get("pre_approved_limit", math.nan) for name in self.names], dtype=float
+        )
+        self.offer_rate = np.array(
+            [offers_by_phone.get(phone, {}).get("interest_rate", math.nan) for phone in self.phones], dtype=float
+        )
+        self.versions = versions
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self.phones)
+
+
+class BatchUnderwriter:
+    """
+    Loads the bulk reference datasets once into a ReferenceSnapshot and
+    reloads it when the reference-data refresher sees a new dataset
+    version (or after `max_age` seconds).
+    """
+
+    DATASETS = {"crm": "/crm", "credit-bureau": "/credit-bureau", "customers": "/customers", "offers": "/offers"}
+
+    def __init__(self, client: PooledHTTPClient, caches: Dict, max_age: float = 300):
+        self.client = client
+        self.caches = caches
+        self.max_age = max_age
+        self._snapshot: Optional[ReferenceSnapshot] = None
+        self._lock = asyncio.Lock()
+        self.loads = 0
+
+    def _current_versions(self) -> Dict:
+        return {name: cache.version for name, cache in self.caches.items()}
+
+    def _is_fresh(self, snapshot: ReferenceSnapshot) -> bool:
+        return (
+            time.monotonic() - snapshot.loaded_at < self.max_age
+            and snapshot.versions == self._current_versions()
+        )
+
+    async def snapshot(self) -> ReferenceSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and self._is_fresh(snapshot):
+            return snapshot
+
+        async with self._lock:
+            if self._snapshot is not None and self._is_fresh(self._snapshot):
+                return self._snapshot
+            versions = self._current_versions()
+            responses = await asyncio.gather(
+                *(self.client.aget(path, endpoint=path) for path in self.DATASETS.values())
+            )
+            for response in responses:
+                response.raise_for_status()
+            crm, credit, customers, offers = (response.content for response in responses)
+            self._snapshot = await asyncio.to_thread(
+                lambda: ReferenceSnapshot(json.loads(crm), json.loads(credit), json.loads(customers), json.loads(offers), versions)
+            )
+            self.loads += 1
+            return self._snapshot
+
+    def stats(self) -> Dict:
+        return {
+            "loads": self.loads,
+            "customers": len(self._snapshot) if self._snapshot else 0,
+            "versions": self._snapshot.versions if self._snapshot else None,
+        }
+
+
+def _number(value) -> float:
+    if value is None or value == "":
+        return math.nan
+    number = float(value)
+    return number if math.isfinite(number) else math.nan
+
+
+def parse_rows(body: bytes) -> List[Dict]:
+    """
+    Parse a batch request body: NDJSON (one JSON object per line) or a
+    JSON array of objects.
+
+    Raises:
+        ValueError: with the offending line number if the body isn't valid
+    """
+    text = body.decode("utf-8").strip()
+    if text.startswith("["):
+        rows = json.loads(text)
+    else:
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                raise ValueError(f"line {number}: {e}") from None
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError("every row must be a JSON object")
+    return rows
+
+
+def decide(snapshot: ReferenceSnapshot, rows: List[Dict], policy: Optional[CompiledPolicy] = None) -> List[Dict]:
+    """
+    Underwrite many rows in one vectorised pass.
+
+    Args:
+        snapshot: reference data to look customers up in
+        rows: dicts with phone, amount, tenure and optional salary
+            (monthly) and id (echoed back)
+        policy: compiled underwriting policy (default: the current one)
+
+    Returns:
+        One decision dict per row, in order
+    """
+    import numpy as np
+
+    n = len(rows)
+    phones, amounts, tenures, salaries = [], np.full(n, math.nan), np.zeros(n), np.full(n, math.nan)
+    valid = np.ones(n, dtype=bool)
+    for i, row in enumerate(rows):
+        phones.append(str(row.get("phone", "")))
+        try:
+            amounts[i] = _number(row.get("amount"))
+            tenures[i] = _number(row.get("tenure"))
+            salaries[i] = _number(row.get("salary"))
+        except (TypeError, ValueError):
+            valid[i] = False
+    # Tenures are whole months; 12.5 is rejected, not truncated to 12
+    valid &= (amounts > 0) & (tenures >= 1) & ~np.isnan(tenures) & (tenures == np.floor(tenures))
+    tenures = np.where(valid, tenures, 1).astype(int)
+    amounts = np.where(valid, amounts, 0.0)
+
+    idx = np.fromiter((snapshot.index.get(phone, -1) for phone in phones), dtype=np.int64, count=n)
+    found = idx >= 0
+    safe_idx = np.where(found, idx, 0)
+    if len(snapshot):
+        score = np.where(found, snapshot.credit_score[safe_idx], 0)
+        limit = np.where(found, snapshot.pre_approved_limit[safe_idx], math.nan)
+        offer_rate = np.where(found, snapshot.offer_rate[safe_idx], math.nan)
+    else:
+        score, limit, offer_rate = np.zeros(n, dtype=int), np.full(n, math.nan), np.full(n, math.nan)
+
+    rate = np.where(np.isnan(offer_rate), default_rates(tenures), offer_rate)
+    # Rounded to paise exactly like the chat's emi_exact, so both make the same call at a rule's boundary
+    instalment = np.asarray(emi_booked(amounts, rate, tenures), dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        loan_ratio = amounts / limit
+        emi_share = instalment / salaries
+    has_salary = ~np.isnan(salaries) & (salaries > 0)
+
+    policy = policy or underwriting_policy.current()
+    unevaluable = ~valid | ~found | np.isnan(limit)
+    matched = policy.evaluate_many({
+        "credit_score": score,
+        "loan_ratio": np.where(np.isnan(loan_ratio), math.inf, loan_ratio),
+        "emi_share": np.where(has_salary, emi_share, math.inf),
+        "has_salary": has_salary.astype(float),
+    })
+    rules = [policy.rule_at(index) for index in range(len(policy.rules) + 1)]
+
+    decisions = []
+    for i in range(n):
+        if unevaluable[i]:
+            code = INPUT_OUTCOMES[0] if not valid[i] else INPUT_OUTCOMES[1]
+            entry = {"row": i, "phone": phones[i], "decision": "rejected", "reason_code": code}
+        else:
+            rule = rules[matched[i]]
+            entry = {"row": i, "phone": phones[i], "decision": rule.decision, "reason_code": rule.id}
+        entry["policy_version"] = policy.version
+        if "id" in rows[i]:
+            entry["id"] = rows[i]["id"]
+        if not unevaluable[i]:
+            entry.update(
+                credit_score=int(score[i]) or None,
+                pre_approved_limit=float(limit[i]),
+                interest_rate=float(rate[i]),
+                emi=float(instalment[i]),
+                loan_ratio=round(float(loan_ratio[i]), 4),
+                emi_ratio=round(float(emi_share[i]), 4) if has_salary[i] else None,
+            )
+        decisions.append(entry)
+    return decisions
+
+
+def iter_ndjson(
+    snapshot: ReferenceSnapshot, rows: Iterable[Dict], chunk_size: int = 5000, policy: Optional[CompiledPolicy] = None
+) -> Iterator[str]:
+    """Decisions as NDJSON text, one chunk of rows at a time (for streaming responses)."""
+    lines = []
+    for decision in iter_decisions(snapshot, rows, chunk_size, policy):
+        lines.append(json.dumps(decision, separators=(",", ":")))
+        if len(lines) >= chunk_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_decisions(
+    snapshot: ReferenceSnapshot, rows: Iterable[Dict], chunk_size: int = 5000, policy: Optional[CompiledPolicy] = None
+) -> Iterator[Dict]:
+    """decide() over an iterable of rows, chunk by chunk, with row numbers kept global."""
+    chunk: List[Dict] = []
+    offset = 0
+    policy = policy or underwriting_policy.current()  # one policy version for the whole batch
+
+    def flush():
+        for decision in decide(snapshot, chunk, policy):
+            decision["row"] += offset
+            yield decision
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield from flush()
+            offset += len(chunk)
+            chunk = []
+    if chunk:
+        yield from flush()
+
+
+batch_underwriter = BatchUnderwriter(
+    http_client,
+    reference_data_refresher.caches,
+    max_age=float(os.getenv("REFERENCE_CACHE_TTL", 300)),
+)
+
+__all__ = [
+    "BatchUnderwriter",
+    "ReferenceSnapshot",
+    "batch_underwriter",
+    "decide",
+    "iter_decisions",
+    "iter_ndjson",
+    "parse_rows",
+    "INPUT_OUTCOMES",
+]
@@ -1,28 +1,40 @@
-import requests
-from typing import Optional, Dict, List
+import os
+from typing import Optional, Dict
+from urllib.parse import quote
 from models.customer import Customer, CRMData, CreditScore, Offer
+from services.http_client import create_http_client
+from services.reference_data import ReferenceDataCache, ReferenceDataRefresher
 
-DUMMY_SERVER_URL = "http://localhost:8001"
+# Reference-data server (data/dummy-servers/fastapi_server.py in development)
+DUMMY_SERVER_URL = os.getenv("DATA_SERVER_URL", "http://localhost:8001")
+
+# One keep-alive connection pool for every service calling the dummy server
+http_client = create_http_client(DUMMY_SERVER_URL)
+
+# Cache sizing, shared by all four services
+CACHE_MAX_SIZE = int(os.getenv("REFERENCE_CACHE_SIZE", 10000))
+CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", 300))
+NEGATIVE_CACHE_TTL = float(os.getenv("REFERENCE_NEGATIVE_TTL", 60))
+REFRESH_INTERVAL = float(os.getenv("REFERENCE_REFRESH_INTERVAL", 30))
+
+
+def _make_cache(dataset: str, endpoint: str, path_for) -> ReferenceDataCache:
+    return ReferenceDataCache(
+        dataset,
+        path_for,
+        http_client,
+        endpoint=endpoint,
+        max_size=CACHE_MAX_SIZE,
+        ttl=CACHE_TTL,
+        negative_ttl=NEGATIVE_CACHE_TTL,
+    )
 
 
 class CRMService:
     """Fetches customer KYC data from CRM API"""
     
     def __init__(self):
-        self.crm_data: Optional[Dict] = None
-        self._load_data()
-    
-    def _load_data(self):
-        """Load CRM data from dummy server"""
-        try:
-            response = requests.get(f"{DUMMY_SERVER_URL}/crm", timeout=5)
-            response.raise_for_status()
-            self.crm_data = response.json()
-            print(f"✅ CRM data loaded: {len(self.crm_data)} records")
-        except requests.RequestException as e:
-            print(f"⚠️ Warning: Could not load CRM data from dummy server: {e}")
-            print(f"   Make sure dummy server is running on {DUMMY_SERVER_URL}")
-            self.crm_data = {}
+        self.cache = _make_cache("crm", "/crm/{phone}", lambda phone: f"/crm/{quote(phone)}")
     
     def verify_customer(self, phone: str) -> Optional[CRMData]:
         """
@@ -34,10 +46,14 @@ class CRMService:
         Returns:
             CRMData if found, None otherwise
         """
-        if not self.crm_data:
-            self._load_data()
-        
-        data = self.crm_data.get(phone)
+        data = self.cache.get(phone)
+        if data:
+            return CRMData(**data)
+        return None
+    
+    async def averify_customer(self, phone: str) -> Optional[CRMData]:
+        """Async variant of verify_customer; upstream fetches run off the event loop."""
+        data = await self.cache.aget(phone)
         if data:
             return CRMData(**data)
         return None
@@ -47,19 +63,7 @@ class CreditBureauService:
     """Fetches credit scores from Credit Bureau API"""
     
     def __init__(self):
-        self.credit_data: Optional[Dict] = None
-        self._load_data()
-    
-    def _load_data(self):
-        """Load credit bureau data from dummy server"""
-        try:
-            response = requests.get(f"{DUMMY_SERVER_URL}/credit-bureau", timeout=5)
-            response.raise_for_status()
-            self.credit_data = response.json()
-            print(f"✅ Credit bureau data loaded: {len(self.credit_data)} records")
-        except requests.RequestException as e:
-            print(f"⚠️ Warning: Could not load credit data from dummy server: {e}")
-            self.credit_data = {}
+        self.cache = _make_cache("credit-bureau", "/credit-bureau/{phone}", lambda phone: f"/credit-bureau/{quote(phone)}")
     
     def get_credit_score(self, phone: str) -> Optional[int]:
         """
@@ -71,10 +75,14 @@ class CreditBureauService:
         Returns:
             Credit score (300-900) or None
         """
-        if not self.credit_data:
-            self._load_data()
-        
-        data = self.credit_data.get(phone)
+        data = self.cache.get(phone)
+        if data:
+            return data["credit_score"]
+        return None
+    
+    async def aget_credit_score(self, phone: str) -> Optional[int]:
+        """Async variant of get_credit_score; upstream fetches run off the event loop."""
+        data = await self.cache.aget(phone)
         if data:
             return data["credit_score"]
         return None
@@ -84,24 +92,7 @@ class CustomerService:
     """Fetches customer profile from Customers API"""
     
     def __init__(self):
-        self.customers: Optional[List[Dict]] = None
-        self.customer_by_name: Optional[Dict] = None
-        self._load_data()
-    
-    def _load_data(self):
-        """Load customer data from dummy server"""
-        try:
-            response = requests.get(f"{DUMMY_SERVER_URL}/customers", timeout=5)
-            response.raise_for_status()
-            self.customers = response.json()
-            
-            # Create a lookup by name for easier searching
-            self.customer_by_name = {c["name"]: c for c in self.customers}
-            print(f"✅ Customer data loaded: {len(self.customers)} customers")
-        except requests.RequestException as e:
-            print(f"⚠️ Warning: Could not load customer data from dummy server: {e}")
-            self.customers = []
-            self.customer_by_name = {}
+        self.cache = _make_cache("customers", "/customers/by-name/{name}", lambda name: f"/customers/by-name/{quote(name)}")
     
     def get_customer_by_name(self, name: str) -> Optional[Customer]:
         """
@@ -113,10 +104,14 @@ class CustomerService:
         Returns:
             Customer object or None
         """
-        if not self.customer_by_name:
-            self._load_data()
-        
-        data = self.customer_by_name.get(name)
+        data = self.cache.get(name)
+        if data:
+            return Customer(**data)
+        return None
+    
+    async def aget_customer_by_name(self, name: str) -> Optional[Customer]:
+        """Async variant of get_customer_by_name; upstream fetches run off the event loop."""
+        data = await self.cache.aget(name)
         if data:
             return Customer(**data)
         return None
@@ -126,24 +121,7 @@ class OfferService:
     """Fetches pre-approved offers from Offers API"""
     
     def __init__(self):
-        self.offers: Optional[List[Dict]] = None
-        self.offer_by_phone: Optional[Dict] = None
-        self._load_data()
-    
-    def _load_data(self):
-        """Load offers data from dummy server"""
-        try:
-            response = requests.get(f"{DUMMY_SERVER_URL}/offers", timeout=5)
-            response.raise_for_status()
-            self.offers = response.json()
-            
-            # Create lookup by phone
-            self.offer_by_phone = {o["phone"]: o for o in self.offers}
-            print(f"✅ Offers data loaded: {len(self.offers)} offers")
-        except requests.RequestException as e:
-            print(f"⚠️ Warning: Could not load offers data from dummy server: {e}")
-            self.offers = []
-            self.offer_by_phone = {}
+        self.cache = _make_cache("offers", "/offers/{phone}", lambda phone: f"/offers/{quote(phone)}")
     
     def get_offer(self, phone: str) -> Optional[Offer]:
         """
@@ -155,10 +133,14 @@ class OfferService:
         Returns:
             Offer object or None
         """
-        if not self.offer_by_phone:
-            self._load_data()
-        
-        data = self.offer_by_phone.get(phone)
+        data = self.cache.get(phone)
+        if data:
+            return Offer(**data)
+        return None
+    
+    async def aget_offer(self, phone: str) -> Optional[Offer]:
+        """Async variant of get_offer; upstream fetches run off the event loop."""
+        data = await self.cache.aget(phone)
         if data:
             return Offer(**data)
         return None
@@ -167,4 +149,26 @@ class OfferService:
 crm_service = CRMService()
 credit_bureau_service = CreditBureauService()
 customer_service = CustomerService()
-offer_service = OfferService()
\ No newline at end of file
+offer_service = OfferService()
+
+reference_data_refresher = ReferenceDataRefresher(
+    http_client,
+    {
+        "crm": crm_service.cache,
+        "credit-bureau": credit_bureau_service.cache,
+        "customers": customer_service.cache,
+        "offers": offer_service.cache,
+    },
+    interval=REFRESH_INTERVAL,
+)
+
+
+def reference_data_stats() -> Dict:
+    """Hit rate, size and staleness of every reference-data cache."""
+    return {
+        "refresh_interval_seconds": reference_data_refresher.interval,
+        "version_checks": reference_data_refresher.checks,
+        "last_version_check": reference_data_refresher.last_checked,
+        "caches": [cache.stats() for cache in reference_data_refresher.caches.values()],
+        "http": http_client.stats(),
+    }
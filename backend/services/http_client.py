@@ -0,0 +1,314 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Mapping, Optional
+
+import httpx
+
+from services.telemetry import tracer, upstream_seconds
+
+
+class UpstreamError(Exception):
+    """The upstream server could not be reached, kept failing, or its circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls fail fast for `reset_timeout` seconds. Then one trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 10):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Let another caller try: the trial call ended without telling us anything (e.g. cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    self.times_opened += 1
+                self.opened_at = time.monotonic()
+
+
+class EndpointMetrics:
+    """Request count, errors, retries and latency percentiles for one endpoint."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._recent = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.requests += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self._recent.append(seconds)
+
+    def snapshot(self) -> Dict:
+        recent = sorted(self._recent)
+
+        def percentile(p: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 2)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "avg_ms": round(self.total_seconds / self.requests * 1000, 2) if self.requests else 0.0,
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_seconds * 1000, 2),
+        }
+
+
+class PooledHTTPClient:
+    """
+    Keep-alive HTTP client shared by every service talking to one upstream.
+
+    Wraps one httpx.Client and one httpx.AsyncClient (created on first use)
+    with a bounded connection pool. Connection errors, timeouts and 5xx
+    responses are retried with jittered exponential backoff; other
+    responses (including 304 and 404) are returned to the caller as-is.
+    A circuit breaker stops retry storms when the upstream is down. Each
+    call, retries included, is one tracing span.
+    """
+
+    RETRYABLE_STATUS = {502, 503, 504}
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 20,
+        timeout: float = 5,
+        connect_timeout: float = 1,
+        retries: int = 2,
+        backoff: float = 0.1,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.base_url = base_url
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._client_lock = threading.Lock()
+        self.metrics: Dict[str, EndpointMetrics] = {}
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(base_url=self.base_url, limits=self._limits, timeout=self._timeout)
+        return self._client
+
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(base_url=self.base_url, limits=self._limits, timeout=self._timeout)
+        return self._async_client
+
+    def _metrics_for(self, endpoint: str) -> EndpointMetrics:
+        metrics = self.metrics.get(endpoint)
+        if metrics is None:
+            metrics = self.metrics.setdefault(endpoint, EndpointMetrics())
+        return metrics
+
+    def _delay(self, attempt: int) -> float:
+        # Full jitter: spreads retries from many callers over the window
+        return random.uniform(0, self.backoff * (2 ** attempt))
+
+    def _check_circuit(self, path: str) -> None:
+        if not self.breaker.allow():
+            raise UpstreamError(f"circuit open for {self.base_url}, skipping {path}")
+
+    def _should_retry(self, response: Optional[httpx.Response]) -> bool:
+        return response is None or response.status_code in self.RETRYABLE_STATUS
+
+    def get(self, path: str, headers: Optional[Mapping[str, str]] = None, endpoint: Optional[str] = None) -> httpx.Response:
+        """
+        GET `path` from the upstream.
+
+        Args:
+            path: request path, e.g. "/crm/+917835414968"
+            headers: extra request headers (If-None-Match...)
+            endpoint: label for metrics, e.g. "/crm/{phone}" (defaults to path)
+
+        Raises:
+            UpstreamError if every attempt failed or the circuit is open
+        """
+        metrics = self._metrics_for(endpoint or path)
+        last_error: Optional[str] = None
+
+        with tracer.span(f"GET {endpoint or path}", kind="client", metric=upstream_seconds,
+                         labels=(endpoint or path, "error"), upstream=self.base_url, path=path) as span:
+            for attempt in range(self.retries + 1):
+                self._check_circuit(path)
+                if attempt:
+                    metrics.retries += 1
+
+                start = time.perf_counter()
+                response = None
+                try:
+                    response = self.client.get(path, headers=headers)
+                except httpx.HTTPError as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                except asyncio.CancelledError:
+                    # Says nothing about the upstream; just free a half-open trial
+                    self.breaker.release_trial()
+                    raise
+                except BaseException:
+                    self.breaker.record_failure()
+                    raise
+                metrics.observe(time.perf_counter() - start)
+
+                if not self._should_retry(response):
+                    self.breaker.record_success()
+                    span.labels = (endpoint or path, str(response.status_code))
+                    span.set(status_code=response.status_code, attempts=attempt + 1)
+                    return response
+
+                if response is not None:
+                    last_error = f"HTTP {response.status_code}"
+                metrics.errors += 1
+                self.breaker.record_failure()
+                if attempt < self.retries:
+                    time.sleep(self._delay(attempt))
+
+            raise UpstreamError(f"GET {path} failed after {self.retries + 1} attempts ({last_error})")
+
+    async def aget(self, path: str, headers: Optional[Mapping[str, str]] = None, endpoint: Optional[str] = None) -> httpx.Response:
+        """Async variant of get, on the shared httpx.AsyncClient."""
+        metrics = self._metrics_for(endpoint or path)
+        last_error: Optional[str] = None
+
+        with tracer.span(f"GET {endpoint or path}", kind="client", metric=upstream_seconds,
+                         labels=(endpoint or path, "error"), upstream=self.base_url, path=path) as span:
+            for attempt in range(self.retries + 1):
+                self._check_circuit(path)
+                if attempt:
+                    metrics.retries += 1
+
+                start = time.perf_counter()
+                response = None
+                try:
+                    response = await self.async_client.get(path, headers=headers)
+                except httpx.HTTPError as e:
+                    last_error = f"{type(e).__name__}: {e}"
+                except asyncio.CancelledError:
+                    # Says nothing about the upstream; just free a half-open trial
+                    self.breaker.release_trial()
+                    raise
+                except BaseException:
+                    self.breaker.record_failure()
+                    raise
+                metrics.observe(time.perf_counter() - start)
+
+                if not self._should_retry(response):
+                    self.breaker.record_success()
+                    span.labels = (endpoint or path, str(response.status_code))
+                    span.set(status_code=response.status_code, attempts=attempt + 1)
+                    return response
+
+                if response is not None:
+                    last_error = f"HTTP {response.status_code}"
+                metrics.errors += 1
+                self.breaker.record_failure()
+                if attempt < self.retries:
+                    await asyncio.sleep(self._delay(attempt))
+
+            raise UpstreamError(f"GET {path} failed after {self.retries + 1} attempts ({last_error})")
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    def stats(self) -> Dict:
+        return {
+            "base_url": self.base_url,
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.times_opened,
+            "endpoints": {endpoint: m.snapshot() for endpoint, m in self.metrics.items()},
+        }
+
+
+def create_http_client(base_url: str) -> PooledHTTPClient:
+    """
+    Build a pooled client from environment configuration.
+
+    HTTP_POOL_SIZE          max connections to the upstream (default 20)
+    HTTP_TIMEOUT            read/write timeout in seconds (default 5)
+    HTTP_CONNECT_TIMEOUT    connect timeout in seconds (default 1)
+    HTTP_RETRIES            retries after the first attempt (default 2)
+    HTTP_BACKOFF            base backoff in seconds, jittered (default 0.1)
+    HTTP_BREAKER_THRESHOLD  consecutive failures that open the circuit (default 5)
+    HTTP_BREAKER_RESET      seconds before a half-open trial call (default 10)
+    """
+    return PooledHTTPClient(
+        base_url,
+        pool_size=int(os.getenv("HTTP_POOL_SIZE", 20)),
+        timeout=float(os.getenv("HTTP_TIMEOUT", 5)),
+        connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", 1)),
+        retries=int(os.getenv("HTTP_RETRIES", 2)),
+        backoff=float(os.getenv("HTTP_BACKOFF", 0.1)),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("HTTP_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("HTTP_BREAKER_RESET", 10)),
+        ),
+    )
+
+
+__all__ = ["PooledHTTPClient", "CircuitBreaker", "UpstreamError", "create_http_client"]
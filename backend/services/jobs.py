@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+JobFunc = Callable[[], Awaitable[Optional[Dict]]]
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the caller should retry later."""
+
+
+class Job:
+    def __init__(self, job_id: str, kind: str, session_id: str, func: JobFunc):
+        self.id = job_id
+        self.kind = kind
+        self.session_id = session_id
+        self.func = func
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """
+    In-process background job queue.
+
+    Requests submit work and return immediately with a job id; `workers`
+    tasks drain the queue. Finished jobs are kept for `result_ttl` seconds
+    so clients can poll them, and the latest job per session is indexed for
+    /session/{id}/status. Jobs live in this worker's memory only, so a
+    multi-worker deployment needs sticky sessions for polling.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 1000, result_ttl: float = 3600, timeout: float = 300):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: Dict[str, Job] = {}
+        self._latest: Dict[str, str] = {}
+        self.completed = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the worker tasks (call from the running event loop)."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kind: str, session_id: str, func: JobFunc) -> Job:
+        """
+        Queue `func` for a session.
+
+        Args:
+            kind: short job type, e.g. "salary_slip"
+            session_id: session the job belongs to
+            func: coroutine function run by a worker; its return value
+                becomes the job result
+
+        Raises:
+            QueueFull: when max_pending jobs are already waiting
+        """
+        if self._queue is None:
+            self.start()
+        self._expire()
+
+        job = Job(uuid.uuid4().hex, kind, session_id, func)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull("Too many jobs queued, please retry shortly")
+        self._jobs[job.id] = job
+        self._latest[session_id] = job.id
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def latest_for(self, session_id: str) -> Optional[Job]:
+        job_id = self._latest.get(session_id)
+        return self._jobs.get(job_id) if job_id else None
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        expired = [job for job in self._jobs.values() if job.finished_at is not None and job.finished_at < cutoff]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._latest.get(job.session_id) == job.id:
+                del self._latest[job.session_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+            try:
+                job.result = await asyncio.wait_for(job.func(), self.timeout)
+                job.status = "completed"
+                self.completed += 1
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                job.status = "failed"
+                job.error = f"timed out after {self.timeout:g} s"
+                self.failed += 1
+                print(f"⚠️ Warning: {job.kind} job {job.id} timed out after {self.timeout:g} s")
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+                self.failed += 1
+                print(f"⚠️ Warning: {job.kind} job {job.id} failed: {e}")
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "max_pending": self.max_pending,
+            "tracked": len(self._jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+def create_job_queue() -> JobQueue:
+    """
+    Build the job queue from environment configuration.
+
+    JOB_WORKERS         concurrent background jobs (default 4)
+    JOB_MAX_PENDING     queued jobs before uploads get 503 (default 1000)
+    JOB_RESULT_TTL      seconds finished jobs stay pollable (default 3600)
+    JOB_TIMEOUT         seconds a job may run before it is failed (default 300)
+    """
+    return JobQueue(
+        workers=int(os.getenv("JOB_WORKERS", 4)),
+        max_pending=int(os.getenv("JOB_MAX_PENDING", 1000)),
+        result_ttl=float(os.getenv("JOB_RESULT_TTL", 3600)),
+        timeout=float(os.getenv("JOB_TIMEOUT", 300)),
+    )
+
+
+job_queue = create_job_queue()
+
+__all__ = ["JobQueue", "Job", "QueueFull", "create_job_queue", "job_queue"]
@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+DEFAULT_LETTER_DIR = Path(__file__).parent.parent / "data" / "sanction_letters"
+DEFAULT_OBJECT_DIR = Path(__file__).parent.parent / "data" / "object_store"
+
+
+def letter_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class LocalLetterBackend:
+    """
+    Letters as files under `root`, sharded by hash prefix:
+    root/ab/abcdef....pdf. Files are served straight from here.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.pdf"
+
+    def put(self, digest: str, data: bytes) -> bool:
+        """Store a letter. Returns False if identical content was already stored."""
+        path = self._path(digest)
+        if path.exists():
+            os.utime(path)  # a re-issued letter restarts its retention period
+            return False
+        _atomic_write(path, data)
+        return True
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        path = self._path(digest)
+        return path if path.exists() else None
+
+    def location(self, digest: str) -> str:
+        return str(self._path(digest))
+
+    def delete(self, digest: str) -> None:
+        self._path(digest).unlink(missing_ok=True)
+
+    def objects(self) -> Iterator[Tuple[str, int, float]]:
+        """(digest, size, last written) for every stored letter."""
+        if not self.root.exists():
+            return
+        for path in self.root.glob("??/*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield path.stem, stat.st_size, stat.st_mtime
+
+
+class ObjectStoreLetterBackend:
+    """
+    Local stand-in for an S3-style bucket: objects under
+    bucket/letters/<digest> with a JSON metadata sidecar, accessed only
+    through put/get/delete/list. Nothing is served from the bucket directly;
+    LetterStore pulls objects into a local read-through cache for that.
+    """
+
+    name = "object"
+
+    def __init__(self, bucket: Path, prefix: str = "letters"):
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, digest: str) -> Path:
+        return self.bucket / self.prefix / digest
+
+    def put(self, digest: str, data: bytes) -> bool:
+        key = self._key(digest)
+        meta = key.with_suffix(".meta.json")
+        created = not key.exists()
+        if created:
+            _atomic_write(key, data)
+        _atomic_write(meta, json.dumps({
+            "content_type": "application/pdf",
+            "size": len(data),
+            "sha256": digest,
+            "last_written": time.time(),
+        }).encode())
+        return created
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            return self._key(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        return None
+
+    def location(self, digest: str) -> str:
+        return f"object://{self.prefix}/{digest}"
+
+    def delete(self, digest: str) -> None:
+        key = self._key(digest)
+        key.unlink(missing_ok=True)
+        key.with_suffix(".meta.json").unlink(missing_ok=True)
+
+    def objects(self) -> Iterator[Tuple[str, int, float]]:
+        folder = self.bucket / self.prefix
+        if not folder.exists():
+            return
+        for meta_path in folder.glob("*.meta.json"):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (FileNotFoundError, ValueError):
+                continue
+            yield meta["sha256"], meta["size"], meta["last_written"]
+
+
+class LetterStore:
+    """
+    Content-addressed store for sanction letters.
+
+    Letters are keyed by the SHA-256 of their bytes, so re-issuing an
+    identical letter stores nothing new. collect_garbage() enforces a
+    retention period and a total size cap (oldest letters go first).
+
+    With a remote backend, downloads are served from `cache_dir`, a local
+    read-through copy that is trimmed by the same GC pass.
+    """
+
+    def __init__(
+        self,
+        backend,
+        cache_dir: Optional[Path] = None,
+        retention: float = 90 * 86400,
+        max_bytes: int = 1024 ** 3,
+        legacy_dir: Optional[Path] = None,
+    ):
+        self.backend = backend
+        self.cache = LocalLetterBackend(cache_dir) if cache_dir is not None else None
+        self.retention = retention
+        self.max_bytes = max_bytes
+        self.legacy_dir = legacy_dir
+        self.stored = 0
+        self.deduplicated = 0
+        self.collected = 0
+        self.cache_fills = 0
+
+    def put(self, data: bytes) -> str:
+        """Store a rendered letter and return its digest."""
+        digest = letter_digest(data)
+        if self.backend.put(digest, data):
+            self.stored += 1
+        else:
+            self.deduplicated += 1
+        return digest
+
+    def location(self, digest: str) -> str:
+        return self.backend.location(digest)
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        """A file that can be sent as-is, fetching it from the backend if needed."""
+        path = self.backend.local_path(digest)
+        if path is not None or self.cache is None:
+            return path
+
+        path = self.cache.local_path(digest)
+        if path is None:
+            data = self.backend.get(digest)
+            if data is None:
+                return None
+            self.cache.put(digest, data)
+            self.cache_fills += 1
+            path = self.cache.local_path(digest)
+        return path
+
+    def collect_garbage(self) -> int:
+        """Delete expired letters, then the oldest ones beyond max_bytes. Returns letters removed."""
+        removed = self._collect(self.backend, self.max_bytes)
+        if self.cache is not None:
+            self._collect(self.cache, self.max_bytes)
+        removed += self._collect_legacy()
+        self.collected += removed
+        return removed
+
+    def _collect(self, backend, max_bytes: int) -> int:
+        cutoff = time.time() - self.retention
+        removed = 0
+        kept = []
+        for digest, size, written in backend.objects():
+            if written < cutoff:
+                backend.delete(digest)
+                removed += 1
+            else:
+                kept.append((written, digest, size))
+
+        total = sum(size for _, _, size in kept)
+        for _, digest, size in sorted(kept):
+            if total <= max_bytes:
+                break
+            backend.delete(digest)
+            total -= size
+            removed += 1
+        return removed
+
+    def _collect_legacy(self) -> int:
+        """Expire letters written by the old one-file-per-approval scheme."""
+        if self.legacy_dir is None or not self.legacy_dir.exists():
+            return 0
+        cutoff = time.time() - self.retention
+        removed = 0
+        for path in self.legacy_dir.glob("sanction_letter_*.pdf"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def aput(self, data: bytes) -> str:
+        return await asyncio.to_thread(self.put, data)
+
+    async def alocal_path(self, digest: str) -> Optional[Path]:
+        return await asyncio.to_thread(self.local_path, digest)
+
+    async def acollect_garbage(self) -> int:
+        return await asyncio.to_thread(self.collect_garbage)
+
+    def stats(self) -> Dict:
+        letters = list(self.backend.objects())
+        return {
+            "backend": self.backend.name,
+            "letters": len(letters),
+            "bytes": sum(size for _, size, _ in letters),
+            "max_bytes": self.max_bytes,
+            "retention_days": round(self.retention / 86400, 2),
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "collected": self.collected,
+            "cache_fills": self.cache_fills,
+        }
+
+
+def create_letter_store() -> LetterStore:
+    """
+    Build the letter store from environment configuration.
+
+    LETTER_STORE_BACKEND     local (default) or object (local object-store stand-in)
+    LETTER_STORE_DIR         letter directory for the local backend (default data/sanction_letters)
+    LETTER_OBJECT_DIR        bucket directory for the object backend (default data/object_store)
+    LETTER_CACHE_DIR         download cache for the object backend (default LETTER_STORE_DIR)
+    LETTER_RETENTION_DAYS    days a letter is kept after it was last issued (default 90)
+    LETTER_STORE_MAX_MB      total size cap; oldest letters are removed first (default 1024)
+    """
+    letter_dir = Path(os.getenv("LETTER_STORE_DIR", DEFAULT_LETTER_DIR))
+    retention = float(os.getenv("LETTER_RETENTION_DAYS", 90)) * 86400
+    max_bytes = int(float(os.getenv("LETTER_STORE_MAX_MB", 1024)) * 1024 * 1024)
+
+    if os.getenv("LETTER_STORE_BACKEND", "local") == "object":
+        backend = ObjectStoreLetterBackend(Path(os.getenv("LETTER_OBJECT_DIR", DEFAULT_OBJECT_DIR)))
+        cache_dir = Path(os.getenv("LETTER_CACHE_DIR", letter_dir))
+    else:
+        backend = LocalLetterBackend(letter_dir)
+        cache_dir = None
+
+    return LetterStore(backend, cache_dir=cache_dir, retention=retention, max_bytes=max_bytes, legacy_dir=letter_dir)
+
+
+letter_store = create_letter_store()
+
+__all__ = [
+    "LetterStore",
+    "LocalLetterBackend",
+    "ObjectStoreLetterBackend",
+    "create_letter_store",
+    "letter_digest",
+    "letter_store",
+]
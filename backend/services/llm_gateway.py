@@ -0,0 +1,391 @@
+from dotenv import load_dotenv
+load_dotenv()
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from services.http_client import EndpointMetrics
+from services.response_cache import ResponseCache, create_response_cache
+from services.telemetry import llm_seconds, llm_tokens, tracer
+
+# Which model each agent talks to; override with LLM_MODEL_<AGENT>
+AGENT_MODELS = {
+    "master": "llama-3.1-8b-instant",
+    "sales": "llama-3.1-8b-instant",
+    "verification": "llama-3.1-8b-instant",
+    "underwriting": "llama-3.1-70b-versatile",
+}
+DEFAULT_TEMPERATURE = 0.7
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.waits = 0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            self.waits += 1
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for a provider model. Replies after `latency` seconds
+    (plus up to `jitter`) with a deterministic canned message and streams it
+    word by word, so streaming endpoints behave as with a real model.
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.0
+    jitter: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = messages[-1].content if messages else ""
+        first_line = prompt.strip().splitlines()[0] if prompt.strip() else ""
+        return f"(simulated {self.model_name} reply) {first_line[:80]}"
+
+    def _delay(self) -> float:
+        return self.latency + random.uniform(0, self.jitter)
+
+    def _message(self, messages: List[BaseMessage]) -> AIMessage:
+        # Rough token counts (words), so token metrics work offline too
+        reply = self._reply(messages)
+        prompt_tokens = sum(len(str(msg.content).split()) for msg in messages)
+        reply_tokens = len(reply.split())
+        return AIMessage(content=reply, usage_metadata={
+            "input_tokens": prompt_tokens, "output_tokens": reply_tokens, "total_tokens": prompt_tokens + reply_tokens,
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self._delay())
+        words = self._reply(messages).split(" ")
+        for i, word in enumerate(words):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+
+class GroqProvider:
+    """ChatGroq clients, one per (model, temperature), over one shared connection pool."""
+
+    name = "groq"
+
+    def __init__(self, max_connections: int = 50):
+        self.max_connections = max_connections
+        self._models: Dict[Tuple[str, float], BaseChatModel] = {}
+        self._http_async_client = None
+        self._lock = threading.Lock()
+
+    def chat_model(self, model: str, temperature: float) -> BaseChatModel:
+        key = (model, temperature)
+        if key not in self._models:
+            with self._lock:
+                if key not in self._models:
+                    import httpx
+                    from langchain_groq import ChatGroq
+
+                    if self._http_async_client is None:
+                        limits = httpx.Limits(max_connections=self.max_connections,
+                                              max_keepalive_connections=self.max_connections)
+                        self._http_async_client = httpx.AsyncClient(limits=limits, timeout=60)
+                    self._models[key] = ChatGroq(
+                        model=model,
+                        temperature=temperature,
+                        groq_api_key=os.getenv("GROQ_API_KEY"),
+                        http_async_client=self._http_async_client,
+                        # 429s are retried by the gateway so they show up in its metrics
+                        max_retries=0,
+                    )
+        return self._models[key]
+
+
+class FakeProvider:
+    """Local provider for offline development, tests and benchmarks."""
+
+    name = "fake"
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self._models: Dict[str, BaseChatModel] = {}
+
+    def chat_model(self, model: str, temperature: float) -> BaseChatModel:
+        if model not in self._models:
+            self._models[model] = FakeChatModel(model_name=model, latency=self.latency, jitter=self.jitter)
+        return self._models[model]
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class LLMGateway:
+    """
+    Single entry point for every agent's LLM calls.
+
+    - A global semaphore caps concurrent in-flight LLM requests.
+    - A token bucket per model keeps us under the provider's rate limit; if
+      a 429 still comes back, the call is retried after Retry-After (or a
+      jittered backoff) up to `max_retries` times.
+    - Identical concurrent requests (same model and prompt) are coalesced
+      into one provider call.
+    - Agents that opt in are served from the response cache when the same
+      (or, for the similarity tier, a near-identical) prompt was answered
+      recently.
+    - Latency, errors, retries and coalesced calls are tracked per agent;
+      every call is also a tracing span, timed by source (provider, cache,
+      coalesced) with the provider's token usage.
+    """
+
+    def __init__(
+        self,
+        provider,
+        max_concurrency: int = 32,
+        requests_per_minute: float = 600,
+        burst: float = 10,
+        coalesce: bool = True,
+        max_retries: int = 3,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self.coalesce = coalesce
+        self.max_retries = max_retries
+        self.cache = cache
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+
+        self.metrics: Dict[str, EndpointMetrics] = {}
+        self.coalesced: Dict[str, int] = {}
+        self.rate_limited: Dict[str, int] = {}
+
+    def use_provider(self, provider) -> None:
+        """Swap the provider, e.g. FakeProvider in tests and benchmarks."""
+        self.provider = provider
+
+    def model_for(self, agent: str) -> Tuple[str, float]:
+        env_key = f"LLM_MODEL_{agent.upper()}"
+        model = os.getenv(env_key) or AGENT_MODELS.get(agent, AGENT_MODELS["master"])
+        return model, DEFAULT_TEMPERATURE
+
+    def chat_model(self, agent: str) -> BaseChatModel:
+        return self.provider.chat_model(*self.model_for(agent))
+
+    def _semaphore_for_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _bucket(self, model: str) -> TokenBucket:
+        bucket = self._buckets.get(model)
+        if bucket is None:
+            bucket = self._buckets.setdefault(model, TokenBucket(self.requests_per_minute / 60, self.burst))
+        return bucket
+
+    async def ainvoke(self, agent: str, messages: List[BaseMessage]) -> AIMessage:
+        """
+        Run one chat completion on behalf of `agent`.
+
+        Args:
+            agent: calling agent ("master", "sales", "verification", "underwriting")
+            messages: prompt messages
+
+        Returns:
+            The model's AIMessage
+        """
+        model, temperature = self.model_for(agent)
+        metrics = self.metrics.setdefault(agent, EndpointMetrics())
+
+        with tracer.span(f"llm {agent}", kind="client", metric=llm_seconds,
+                         labels=(agent, model, "provider"), agent=agent, model=model) as span:
+            if self.cache is not None:
+                cached = self.cache.get(agent, model, messages)
+                if cached is not None:
+                    span.labels = (agent, model, "cache")
+                    return cached
+
+            key = None
+            if self.coalesce:
+                key = (model, temperature, tuple((msg.type, msg.content) for msg in messages))
+                while (pending := self._in_flight.get(key)) is not None:
+                    # asyncio.wait neither raises nor cancels `pending` if this caller is cancelled
+                    await asyncio.wait([pending])
+                    if not pending.cancelled():
+                        self.coalesced[agent] = self.coalesced.get(agent, 0) + 1
+                        span.labels = (agent, model, "coalesced")
+                        return pending.result()
+                    # The leader's caller went away: make the call ourselves (or join whoever did)
+                future = asyncio.get_running_loop().create_future()
+                self._in_flight[key] = future
+
+            try:
+                response = await self._call(agent, model, temperature, messages, metrics)
+            except asyncio.CancelledError:
+                if key is not None:
+                    future.cancel()
+                raise
+            except BaseException as e:
+                if key is not None:
+                    future.set_exception(e)
+                    future.exception()
+                raise
+            else:
+                if key is not None:
+                    future.set_result(response)
+                if self.cache is not None:
+                    self.cache.put(agent, model, messages, response)
+                self._record_usage(span, agent, model, response)
+                return response
+            finally:
+                if key is not None:
+                    del self._in_flight[key]
+
+    @staticmethod
+    def _record_usage(span, agent: str, model: str, response: AIMessage) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return
+        span.set(input_tokens=usage.get("input_tokens", 0), output_tokens=usage.get("output_tokens", 0))
+        llm_tokens.observe(usage.get("input_tokens", 0), agent, model, "input")
+        llm_tokens.observe(usage.get("output_tokens", 0), agent, model, "output")
+
+    async def _call(self, agent: str, model: str, temperature: float, messages: List[BaseMessage], metrics: EndpointMetrics) -> AIMessage:
+        chat_model = self.provider.chat_model(model, temperature)
+        bucket = self._bucket(model)
+
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore_for_loop():
+                await bucket.acquire()
+                start = time.perf_counter()
+                try:
+                    response = await chat_model.ainvoke(messages)
+                    metrics.observe(time.perf_counter() - start)
+                    if attempt:
+                        tracer.current().set(attempts=attempt + 1)
+                    return response
+                except Exception as e:
+                    metrics.observe(time.perf_counter() - start)
+                    metrics.errors += 1
+                    if not _is_rate_limited(e) or attempt == self.max_retries:
+                        raise
+                    self.rate_limited[agent] = self.rate_limited.get(agent, 0) + 1
+                    delay = _retry_after(e) or random.uniform(0, 0.5 * (2 ** attempt))
+            metrics.retries += 1
+            await asyncio.sleep(delay)
+
+    def warm_up(self) -> None:
+        """Construct every agent's client ahead of the first call (blocking)."""
+        for agent in AGENT_MODELS:
+            self.chat_model(agent)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider.name,
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.requests_per_minute,
+            "agents": {
+                agent: {
+                    "model": self.model_for(agent)[0],
+                    **metrics.snapshot(),
+                    "coalesced": self.coalesced.get(agent, 0),
+                    "rate_limited": self.rate_limited.get(agent, 0),
+                }
+                for agent, metrics in self.metrics.items()
+            },
+            "rate_limit_waits": {model: bucket.waits for model, bucket in self._buckets.items()},
+            "response_cache": self.cache.stats() if self.cache is not None else None,
+        }
+
+
+def create_llm_gateway() -> LLMGateway:
+    """
+    Build the gateway from environment configuration.
+
+    LLM_PROVIDER         groq (default) or fake
+    LLM_FAKE_LATENCY     fake provider latency in seconds (default 0)
+    LLM_FAKE_JITTER      extra random latency for the fake provider (default 0)
+    LLM_MAX_CONCURRENCY  max in-flight LLM requests per worker (default 32)
+    LLM_RPM              requests per minute allowed per model (default 600)
+    LLM_BURST            requests a model may burst above the steady rate (default 10)
+    LLM_COALESCE         share identical in-flight requests, 1 or 0 (default 1)
+    LLM_MODEL_<AGENT>    model override for one agent, e.g. LLM_MODEL_SALES
+    LLM_CACHE            response cache on/off, 1 or 0 (default 1; see create_response_cache)
+    """
+    if os.getenv("LLM_PROVIDER", "groq") == "fake":
+        provider = FakeProvider(
+            latency=float(os.getenv("LLM_FAKE_LATENCY", 0)),
+            jitter=float(os.getenv("LLM_FAKE_JITTER", 0)),
+        )
+    else:
+        provider = GroqProvider()
+
+    return LLMGateway(
+        provider,
+        max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 32)),
+        requests_per_minute=float(os.getenv("LLM_RPM", 600)),
+        burst=float(os.getenv("LLM_BURST", 10)),
+        coalesce=os.getenv("LLM_COALESCE", "1") == "1",
+        cache=create_response_cache() if os.getenv("LLM_CACHE", "1") == "1" else None,
+    )
+
+
+llm_gateway = create_llm_gateway()
+
+__all__ = [
+    "LLMGateway",
+    "GroqProvider",
+    "FakeProvider",
+    "FakeChatModel",
+    "TokenBucket",
+    "create_llm_gateway",
+    "llm_gateway",
+]
@@ -0,0 +1,308 @@
+import asyncio
+import math
+import os
+import time
+from typing import Dict, List, Optional, Sequence
+
+from services.batch_underwriting import BatchUnderwriter, ReferenceSnapshot, batch_underwriter
+from services.pricing import default_rates
+from services.rules_engine import CompiledPolicy, PolicyStore, underwriting_policy
+from utils.emi import emi
+
+
+class QuoteError(ValueError):
+    """The quote request is outside the grid (unknown tenure, amount out of range)."""
+
+
+class OfferGridSnapshot:
+    """
+    Immutable, array-backed offer grid for every customer with a
+    pre-approved limit.
+
+    Per customer row: the interest rate for each tenure (rate, shape
+    (N, T)), and for each (amount, tenure) cell the EMI in paise (emi_paise,
+    int32, (N, A, T)) and the index of the policy rule that decides it with
+    no salary slip on file (outcome, (N, A, T)). Amounts are multiples of
+    the amount step; a quote is rounded up to the next one.
+    """
+
+    def __init__(
+        self,
+        amounts,
+        tenures,
+        phones: List[str],
+        credit_score,
+        pre_approved_limit,
+        offer_rate,
+        rate,
+        emi_paise,
+        outcome,
+        policy: CompiledPolicy,
+        source: ReferenceSnapshot,
+        recomputed: int,
+    ):
+        self.amounts = amounts
+        self.tenures = tenures
+        self.amount_step = float(amounts[0])
+        self.tenure_index = {int(tenure): i for i, tenure in enumerate(tenures)}
+        self.phones = phones
+        self.index = {phone: i for i, phone in enumerate(phones)}
+        self.credit_score = credit_score
+        self.pre_approved_limit = pre_approved_limit
+        self.offer_rate = offer_rate
+        self.rate = rate
+        self.emi_paise = emi_paise
+        self.outcome = outcome
+        self.policy = policy
+        self.source = source
+        self.recomputed = recomputed
+        self.built_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.phones)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (
+            self.credit_score, self.pre_approved_limit, self.offer_rate, self.rate, self.emi_paise, self.outcome
+        ))
+
+    def quote(self, phone: str, amount: float, tenure: int, salary: Optional[float] = None) -> Optional[Dict]:
+        """
+        Look up one quote.
+
+        Args:
+            phone: customer phone
+            amount: requested amount, rounded up to the grid's amount step
+            tenure: months; must be one of the grid's tenures
+            salary: monthly salary, if known; the eligibility outcome is then
+                evaluated with it instead of read from the grid
+
+        Returns:
+            Quote dict, or None if the customer isn't in the grid
+
+        Raises:
+            QuoteError: tenure not on the grid or amount out of range
+        """
+        row = self.index.get(phone)
+        if row is None:
+            return None
+        t = self.tenure_index.get(tenure)
+        if t is None:
+            raise QuoteError(f"tenure must be one of {list(self.tenure_index)} months")
+        if not amount > 0:
+            raise QuoteError("amount must be positive")
+        if not math.isfinite(amount):
+            raise QuoteError("amount must be a finite number")
+        a = math.ceil(amount / self.amount_step) - 1
+        if a >= len(self.amounts):
+            raise QuoteError(f"amount must be at most {self.amounts[-1]:,.0f}")
+
+        quoted_amount = float(self.amounts[a])
+        instalment = int(self.emi_paise[row, a, t]) / 100
+        limit = float(self.pre_approved_limit[row])
+        if salary and salary > 0:
+            rule = self.policy.evaluate({
+                "credit_score": int(self.credit_score[row]),
+                "loan_ratio": quoted_amount / limit,
+                "emi_share": instalment / salary,
+                "has_salary": 1,
+            })
+        else:
+            rule = self.policy.rule_at(int(self.outcome[row, a, t]))
+        return {
+            "phone": phone,
+            "amount": quoted_amount,
+            "tenure": tenure,
+            "interest_rate": float(self.rate[row, t]),
+            "emi": instalment,
+            "decision": rule.decision,
+            "reason_code": rule.id,
+            "pre_approved_limit": limit,
+            "policy_version": self.policy.version,
+        }
+
+
+def _outcomes(policy: CompiledPolicy, credit_score, pre_approved_limit, amounts, tenure_count: int):
+    """Rule index for every (customer, amount) with no salary on file, repeated over tenures."""
+    import numpy as np
+
+    n, a = len(credit_score), len(amounts)
+    loan_ratio = amounts[None, :] / pre_approved_limit[:, None]
+    matched = policy.evaluate_many({
+        "credit_score": np.repeat(credit_score, a),
+        "loan_ratio": loan_ratio.ravel(),
+        "emi_share": np.full(n * a, math.inf),
+        "has_salary": np.zeros(n * a),
+    })
+    dtype = np.uint8 if len(policy.rules) < 255 else np.uint16
+    # Without a salary the EMI doesn't enter the policy, so tenure doesn't change the outcome
+    return np.repeat(matched.reshape(n, a, 1).astype(dtype), tenure_count, axis=2)
+
+
+def build_grid(
+    source: ReferenceSnapshot,
+    policy: CompiledPolicy,
+    amounts: Sequence[float],
+    tenures: Sequence[int],
+    previous: Optional[OfferGridSnapshot] = None,
+) -> OfferGridSnapshot:
+    """
+    Build the grid from a reference snapshot, reusing `previous` rows whose
+    credit score, limit and offer rate are unchanged; only new or changed
+    customers are priced (and all outcomes are re-evaluated when the policy
+    changed).
+    """
+    import numpy as np
+
+    amounts = np.asarray(amounts, dtype=float)
+    tenures = np.asarray(tenures, dtype=int)
+    eligible = ~np.isnan(source.pre_approved_limit) & (source.pre_approved_limit > 0)
+    rows = np.flatnonzero(eligible)
+    phones = [source.phones[i] for i in rows]
+    credit_score = source.credit_score[rows]
+    limit = source.pre_approved_limit[rows]
+    offer_rate = source.offer_rate[rows]
+    n = len(phones)
+
+    reuse = np.zeros(n, dtype=bool)
+    previous_rows = np.full(n, -1)
+    if (
+        previous is not None
+        and np.array_equal(previous.amounts, amounts)
+        and np.array_equal(previous.tenures, tenures)
+    ):
+        previous_rows = np.fromiter((previous.index.get(phone, -1) for phone in phones), dtype=np.int64, count=n)
+        known = previous_rows >= 0
+        safe = np.where(known, previous_rows, 0)
+        if len(previous):
+            reuse = (
+                known
+                & (previous.credit_score[safe] == credit_score)
+                & (previous.pre_approved_limit[safe] == limit)
+                & ((previous.offer_rate[safe] == offer_rate) | (np.isnan(previous.offer_rate[safe]) & np.isnan(offer_rate)))
+            )
+    changed = ~reuse
+
+    rate = np.where(np.isnan(offer_rate)[:, None], default_rates(tenures)[None, :], offer_rate[:, None])
+    emi_paise = np.empty((n, len(amounts), len(tenures)), dtype=np.int32)
+    emi_paise[reuse] = previous.emi_paise[previous_rows[reuse]] if reuse.any() else 0
+    if changed.any():
+        instalment = emi(amounts[None, :, None], rate[changed][:, None, :], tenures[None, None, :], decimals=2)
+        emi_paise[changed] = np.rint(np.asarray(instalment) * 100).astype(np.int32)
+
+    same_policy = previous is not None and previous.policy is policy
+    if same_policy and reuse.any():
+        outcome = np.empty((n, len(amounts), len(tenures)), dtype=previous.outcome.dtype)
+        outcome[reuse] = previous.outcome[previous_rows[reuse]]
+        if changed.any():
+            outcome[changed] = _outcomes(policy, credit_score[changed], limit[changed], amounts, len(tenures))
+    else:
+        outcome = _outcomes(policy, credit_score, limit, amounts, len(tenures))
+
+    return OfferGridSnapshot(
+        amounts, tenures, phones, credit_score, limit, offer_rate, rate, emi_paise, outcome,
+        policy, source, recomputed=int(changed.sum()),
+    )
+
+
+class OfferGrid:
+    """
+    Keeps an OfferGridSnapshot in step with the reference data and the
+    underwriting policy.
+
+    refresh() is cheap when nothing changed (the batch underwriter's
+    snapshot and the compiled policy are the same objects as last time);
+    otherwise the grid is rebuilt in a worker thread, re-pricing only the
+    customers whose inputs changed, and swapped in whole so lookups never
+    see a half-built grid.
+    """
+
+    def __init__(
+        self,
+        underwriter: BatchUnderwriter,
+        policy_store: PolicyStore,
+        amount_step: float = 10000,
+        max_amount: float = 1000000,
+        tenures: Sequence[int] = (6, 12, 18, 24, 36, 48, 60),
+    ):
+        self.underwriter = underwriter
+        self.policy_store = policy_store
+        self.amounts = [amount_step * i for i in range(1, int(max_amount // amount_step) + 1)]
+        self.tenures = sorted(tenures)
+        self.grid: Optional[OfferGridSnapshot] = None
+        self._lock = asyncio.Lock()
+        self.builds = 0
+        self.last_build_seconds = 0.0
+
+    async def refresh(self) -> bool:
+        """Rebuild the grid if the reference data or policy changed; True if it did."""
+        async with self._lock:
+            source = await self.underwriter.snapshot()
+            policy = self.policy_store.current()
+            grid = self.grid
+            if grid is not None and grid.source is source and grid.policy is policy:
+                return False
+
+            started = time.perf_counter()
+            self.grid = await asyncio.to_thread(build_grid, source, policy, self.amounts, self.tenures, grid)
+            self.last_build_seconds = time.perf_counter() - started
+            self.builds += 1
+            if self.grid.recomputed or grid is None or grid.policy is not policy:
+                print(f"🔄 Offer grid rebuilt: {self.grid.recomputed} of {len(self.grid)} customers re-priced "
+                      f"in {self.last_build_seconds * 1000:.0f} ms")
+            return True
+
+    def quote(self, phone: str, amount: float, tenure: int, salary: Optional[float] = None) -> Optional[Dict]:
+        """OfferGridSnapshot.quote on the current grid; raises LookupError before the first build."""
+        grid = self.grid
+        if grid is None:
+            raise LookupError("offer grid not built yet")
+        return grid.quote(phone, amount, tenure, salary)
+
+    def stats(self) -> Dict:
+        grid = self.grid
+        return {
+            "built": grid is not None,
+            "customers": len(grid) if grid else 0,
+            "amounts": len(self.amounts),
+            "amount_step": self.amounts[0],
+            "tenures": self.tenures,
+            "bytes": grid.nbytes if grid else 0,
+            "builds": self.builds,
+            "last_build_seconds": round(self.last_build_seconds, 4),
+            "last_recomputed": grid.recomputed if grid else 0,
+            "policy_version": grid.policy.version if grid else None,
+            "reference_versions": grid.source.versions if grid else None,
+            "built_at": grid.built_at if grid else None,
+        }
+
+
+def create_offer_grid() -> OfferGrid:
+    """
+    Build the offer grid from environment configuration.
+
+    OFFER_GRID_AMOUNT_STEP   quote amounts are multiples of this (default 10000)
+    OFFER_GRID_MAX_AMOUNT    largest amount quoted (default 1000000)
+    OFFER_GRID_TENURES       comma-separated tenures in months (default 6,12,18,24,36,48,60)
+    """
+    tenures = os.getenv("OFFER_GRID_TENURES", "6,12,18,24,36,48,60")
+    return OfferGrid(
+        batch_underwriter,
+        underwriting_policy,
+        amount_step=float(os.getenv("OFFER_GRID_AMOUNT_STEP", 10000)),
+        max_amount=float(os.getenv("OFFER_GRID_MAX_AMOUNT", 1000000)),
+        tenures=[int(tenure) for tenure in tenures.split(",") if tenure.strip()],
+    )
+
+
+offer_grid = create_offer_grid()
+
+__all__ = [
+    "OfferGrid",
+    "OfferGridSnapshot",
+    "QuoteError",
+    "build_grid",
+    "create_offer_grid",
+    "offer_grid",
+]
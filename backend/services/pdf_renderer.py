@@ -0,0 +1,145 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from services.telemetry import pdf_render_seconds, tracer
+from utils.sanction_pdf import render_sanction_letter, warm_up
+
+# Not fork: the server is multi-threaded, and a child forked while another
+# thread holds a lock can deadlock on its first render
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+class SanctionLetterRenderer:
+    """
+    Renders sanction letters off the event loop.
+
+    ReportLab is pure Python and holds the GIL, so a thread only keeps the
+    loop responsive; a process pool also renders letters in parallel. The
+    pool is created on first use (approvals are rare compared to chats) and
+    each worker precompiles the letter styles when it starts.
+
+    mode: "process" (default) or "thread"
+    """
+
+    def __init__(self, workers: int = 2, mode: str = "process"):
+        self.workers = max(1, workers)
+        self.mode = mode
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.rendered = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "thread":
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="pdf-render", initializer=warm_up
+                        )
+                    else:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers, initializer=warm_up,
+                            mp_context=multiprocessing.get_context(START_METHOD),
+                        )
+        return self._executor
+
+    def _observe(self, started: float, count: int, failed: int = 0) -> None:
+        self.total_seconds += time.perf_counter() - started
+        self.rendered += count - failed
+        self.failed += failed
+
+    async def render(self, fields: Dict) -> bytes:
+        """
+        Render one letter in the pool.
+
+        Args:
+            fields: plain letter data (utils.sanction_pdf.render_sanction_letter)
+
+        Returns:
+            The PDF document
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        with tracer.span("pdf render", metric=pdf_render_seconds, labels=(self.mode,), mode=self.mode):
+            try:
+                pdf = await loop.run_in_executor(self._pool(), render_sanction_letter, fields)
+            except Exception:
+                self._observe(started, 1, failed=1)
+                raise
+        self._observe(started, 1)
+        return pdf
+
+    async def render_batch(self, letters: List[Dict]) -> List[Union[bytes, Exception]]:
+        """
+        Render many letters concurrently across the pool.
+
+        Args:
+            letters: letter fields, one dict per letter
+
+        Returns:
+            One entry per letter, in order: the PDF document, or the exception
+            that letter failed with (one bad letter doesn't fail the batch)
+        """
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(pool, render_sanction_letter, fields) for fields in letters),
+            return_exceptions=True,
+        )
+        self._observe(started, len(letters), failed=sum(isinstance(r, Exception) for r in results))
+        return list(results)
+
+    def render_batch_sync(self, letters: List[Dict]) -> List[bytes]:
+        """Blocking batch render for scripts and back-office jobs (raises on the first failure)."""
+        started = time.perf_counter()
+        pool = self._pool()
+        futures = [pool.submit(render_sanction_letter, fields) for fields in letters]
+        try:
+            results = [future.result() for future in futures]
+        except Exception:
+            self._observe(started, len(letters), failed=len(letters))
+            raise
+        self._observe(started, len(letters))
+        return results
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "total_seconds": round(self.total_seconds, 3),
+        }
+
+
+def create_pdf_renderer() -> SanctionLetterRenderer:
+    """
+    Build the renderer from environment configuration.
+
+    PDF_RENDER_WORKERS   pool size (default: CPU count, at most 4)
+    PDF_RENDER_MODE      "process" or "thread" (default process)
+    """
+    return SanctionLetterRenderer(
+        workers=int(os.getenv("PDF_RENDER_WORKERS", min(4, os.cpu_count() or 1))),
+        mode=os.getenv("PDF_RENDER_MODE", "process"),
+    )
+
+
+pdf_renderer = create_pdf_renderer()
+
+__all__ = ["SanctionLetterRenderer", "create_pdf_renderer", "pdf_renderer"]
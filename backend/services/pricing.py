@@ -0,0 +1,28 @@
+from typing import Tuple
+
+# Rates (% p.a.) used when a customer has no pre-approved offer:
+# (max tenure in months, rate) bands, then FALLBACK_RATE for longer tenures.
+DEFAULT_RATE_BANDS: Tuple[Tuple[int, float], ...] = ((12, 10.5), (24, 11.5))
+FALLBACK_RATE = 12.5
+
+
+def default_rate(tenure_months: int) -> float:
+    """Default interest rate for a tenure."""
+    for max_tenure, rate in DEFAULT_RATE_BANDS:
+        if tenure_months <= max_tenure:
+            return rate
+    return FALLBACK_RATE
+
+
+def default_rates(tenures):
+    """Vectorised default_rate over an array of tenures."""
+    import numpy as np
+    tenures = np.asarray(tenures)
+    return np.select(
+        [tenures <= max_tenure for max_tenure, _ in DEFAULT_RATE_BANDS],
+        [rate for _, rate in DEFAULT_RATE_BANDS],
+        default=FALLBACK_RATE,
+    )
+
+
+__all__ = ["DEFAULT_RATE_BANDS", "FALLBACK_RATE", "default_rate", "default_rates"]
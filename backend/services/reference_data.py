@@ -0,0 +1,291 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from services.http_client import PooledHTTPClient, UpstreamError
+
+# Marker stored for keys the upstream answered 404 for (negative caching)
+_NOT_FOUND = object()
+
+# Cache entry: (value or _NOT_FOUND, fetched_at, etag)
+_Entry = Tuple[Any, float, Optional[str]]
+
+
+def _parse_record(response: httpx.Response, etag: Optional[str]) -> Tuple[int, Any, Optional[str]]:
+    if response.status_code in (304, 404):
+        return response.status_code, None, response.headers.get("ETag", etag)
+    if response.status_code >= 400:
+        raise UpstreamError(f"{response.request.url.path} returned HTTP {response.status_code}")
+    return 200, response.json(), response.headers.get("ETag")
+
+
+def fetch_record(client: PooledHTTPClient, path: str, etag: Optional[str] = None, endpoint: Optional[str] = None) -> Tuple[int, Any, Optional[str]]:
+    """
+    Fetch one record from the reference-data server.
+
+    Returns:
+        (status, data, etag) where status is 200, 304 (unchanged, data is
+        None) or 404 (unknown key, data is None)
+
+    Raises:
+        UpstreamError on network failures, 5xx responses or an open circuit
+    """
+    headers = {"If-None-Match": etag} if etag else None
+    return _parse_record(client.get(path, headers=headers, endpoint=endpoint), etag)
+
+
+async def afetch_record(client: PooledHTTPClient, path: str, etag: Optional[str] = None, endpoint: Optional[str] = None) -> Tuple[int, Any, Optional[str]]:
+    """Async variant of fetch_record."""
+    headers = {"If-None-Match": etag} if etag else None
+    return _parse_record(await client.aget(path, headers=headers, endpoint=endpoint), etag)
+
+
+class ReferenceDataCache:
+    """
+    Bounded LRU + TTL cache of records from one reference dataset.
+
+    - Lookups fetch a single record (e.g. /crm/{phone}) on a miss instead of
+      downloading the whole dataset.
+    - Unknown keys are cached too, for `negative_ttl` seconds, so repeated
+      lookups for a phone we don't know don't hit the upstream every time.
+    - Expired entries are revalidated with If-None-Match; a 304 just renews
+      the entry. If the upstream is down, the stale value keeps being served.
+    - Concurrent async misses for the same key share one upstream request.
+    - invalidate() drops everything, e.g. when the dataset version changes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path_for: Callable[[str], str],
+        client: PooledHTTPClient,
+        endpoint: Optional[str] = None,
+        max_size: int = 10000,
+        ttl: float = 300,
+        negative_ttl: float = 60,
+    ):
+        self.name = name
+        self.path_for = path_for
+        self.client = client
+        self.endpoint = endpoint
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.version: Optional[str] = None
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, "asyncio.Future"] = {}
+
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.stale_served = 0
+        self.evictions = 0
+        self.upstream_errors = 0
+        self.last_invalidated: Optional[float] = None
+
+    def _store(self, key: str, value: Any, etag: Optional[str]) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time(), etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _fresh(self, key: str) -> Tuple[bool, Optional[_Entry]]:
+        """Return (is_fresh, entry) for a cached key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            self._entries.move_to_end(key)
+
+        ttl = self.negative_ttl if entry[0] is _NOT_FOUND else self.ttl
+        return time.time() - entry[1] <= ttl, entry
+
+    def _count_hit(self, value: Any) -> Optional[Any]:
+        if value is _NOT_FOUND:
+            self.negative_hits += 1
+            return None
+        self.hits += 1
+        return value
+
+    def _etag_of(self, entry: Optional[_Entry]) -> Optional[str]:
+        return entry[2] if entry and entry[0] is not _NOT_FOUND else None
+
+    def _fetch(self, key: str, entry: Optional[_Entry]) -> Optional[Any]:
+        try:
+            result = fetch_record(self.client, self.path_for(key), self._etag_of(entry), self.endpoint)
+        except UpstreamError as e:
+            return self._on_error(key, entry, e)
+        return self._on_result(key, entry, result)
+
+    async def _afetch(self, key: str, entry: Optional[_Entry]) -> Optional[Any]:
+        try:
+            result = await afetch_record(self.client, self.path_for(key), self._etag_of(entry), self.endpoint)
+        except UpstreamError as e:
+            return self._on_error(key, entry, e)
+        return self._on_result(key, entry, result)
+
+    def _on_error(self, key: str, entry: Optional[_Entry], e: Exception) -> Optional[Any]:
+        self.upstream_errors += 1
+        if entry is not None:
+            self.stale_served += 1
+            return None if entry[0] is _NOT_FOUND else entry[0]
+        print(f"⚠️ Warning: {self.name} lookup failed for {key}: {e}")
+        return None
+
+    def _on_result(self, key: str, entry: Optional[_Entry], result: Tuple[int, Any, Optional[str]]) -> Optional[Any]:
+        status, data, new_etag = result
+        if status == 304:
+            self.revalidations += 1
+            self._store(key, entry[0], new_etag)
+            return entry[0]
+        if status == 404:
+            self._store(key, _NOT_FOUND, None)
+            return None
+
+        self._store(key, data, new_etag)
+        return data
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the record for `key`, or None if the upstream doesn't know it."""
+        fresh, entry = self._fresh(key)
+        if fresh:
+            return self._count_hit(entry[0])
+
+        self.misses += 1
+        return self._fetch(key, entry)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async get; concurrent misses for one key wait on a single fetch."""
+        fresh, entry = self._fresh(key)
+        if fresh:
+            return self._count_hit(entry[0])
+
+        self.misses += 1
+        while (pending := self._in_flight.get(key)) is not None:
+            # Unlike shield, asyncio.wait doesn't raise the fetcher's cancellation here
+            await asyncio.wait([pending])
+            if not pending.cancelled():
+                return pending.result()
+            # The fetching caller was cancelled: fetch it ourselves (or join whoever does)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self._afetch(key, entry)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; mark retrieved to avoid "never retrieved" warnings
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def prime(self, records: Dict[str, Any]) -> None:
+        """Seed the cache with known records (warm-up, tests, benchmarks)."""
+        for key, value in records.items():
+            self._store(key, value, None)
+
+    def invalidate(self, version: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries.clear()
+        self.version = version
+        self.last_invalidated = time.time()
+
+    def stats(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            size = len(self._entries)
+            oldest = min((entry[1] for entry in self._entries.values()), default=None)
+            negative = sum(1 for entry in self._entries.values() if entry[0] is _NOT_FOUND)
+
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "dataset": self.name,
+            "version": self.version,
+            "size": size,
+            "max_size": self.max_size,
+            "negative_entries": negative,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+            "revalidations": self.revalidations,
+            "stale_served": self.stale_served,
+            "evictions": self.evictions,
+            "upstream_errors": self.upstream_errors,
+            "max_staleness_seconds": round(now - oldest, 1) if oldest else 0.0,
+            "last_invalidated": self.last_invalidated,
+        }
+
+
+class ReferenceDataRefresher:
+    """
+    Polls the upstream /version endpoint with If-None-Match and invalidates
+    the caches whose dataset changed. A 304 costs one tiny round-trip.
+    """
+
+    def __init__(self, client: PooledHTTPClient, caches: Dict[str, ReferenceDataCache], interval: float = 30):
+        self.client = client
+        self.caches = caches
+        self.interval = interval
+        self._etag: Optional[str] = None
+        self.checks = 0
+        self.last_checked: Optional[float] = None
+
+    async def check_versions(self) -> bool:
+        """Returns True if any dataset changed since the previous check."""
+        self.checks += 1
+        try:
+            status, versions, etag = await afetch_record(self.client, "/version", self._etag)
+        except UpstreamError as e:
+            print(f"⚠️ Warning: Could not check reference data versions: {e}")
+            return False
+
+        self.last_checked = time.time()
+        if status != 200:
+            return False
+
+        first_check = self._etag is None
+        self._etag = etag
+        changed = False
+        for dataset, version in versions.items():
+            cache = self.caches.get(dataset)
+            if cache is None or cache.version == version:
+                continue
+            if first_check and cache.version is None:
+                # First sight of the version: just record it, nothing to drop
+                cache.version = version
+                continue
+            cache.invalidate(version)
+            changed = True
+            print(f"🔄 {dataset} reference data changed (version {version}), cache invalidated")
+        return changed
+
+    async def run(self) -> None:
+        """Background loop; run as an asyncio task for the app's lifetime."""
+        while True:
+            await self.check_versions()
+            await asyncio.sleep(self.interval)
+
+
+__all__ = [
+    "ReferenceDataCache",
+    "ReferenceDataRefresher",
+    "UpstreamError",
+    "fetch_record",
+    "afetch_record",
+]
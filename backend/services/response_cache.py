@@ -0,0 +1,191 @@
+import hashlib
+import math
+import os
+import re
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+_WHITESPACE = re.compile(r"\s+")
+EMBEDDING_DIM = 1024
+NGRAM = 3
+
+
+def normalize_prompt(messages: List[BaseMessage]) -> str:
+    """Lowercased, whitespace-collapsed prompt text with message roles kept."""
+    return "\n".join(f"{msg.type}:{_WHITESPACE.sub(' ', msg.content).strip().lower()}" for msg in messages)
+
+
+def embed(text: str) -> Dict[int, float]:
+    """
+    Local, dependency-free text embedding: character trigrams hashed into
+    EMBEDDING_DIM buckets (the hashing trick), L2-normalised and stored
+    sparsely. Good enough to tell "same template, same slots" from "same
+    template, different slots" without calling a model.
+    """
+    counts: Dict[int, float] = {}
+    padded = f"  {text}  "
+    for i in range(len(padded) - NGRAM + 1):
+        bucket = zlib.crc32(padded[i:i + NGRAM].encode()) % EMBEDDING_DIM
+        counts[bucket] = counts.get(bucket, 0.0) + 1.0
+
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+def cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class ResponseCache:
+    """
+    Cache of LLM responses keyed on the normalised prompt.
+
+    Two tiers, both opt-in per agent:
+    - exact: identical normalised prompt (dict lookup, microseconds)
+    - similarity: the most similar cached prompt for the same agent and
+      model, if its cosine similarity is at least `similarity_threshold`.
+      Only enable this for agents whose replies don't depend on the exact
+      slot values (names, amounts) in the prompt.
+
+    Entries expire after `ttl` seconds; the least recently used entries are
+    evicted beyond `max_entries`.
+    """
+
+    def __init__(
+        self,
+        exact_agents: Set[str],
+        similarity_agents: Set[str],
+        max_entries: int = 5000,
+        ttl: float = 3600,
+        similarity_threshold: float = 0.97,
+    ):
+        self.exact_agents = exact_agents
+        self.similarity_agents = similarity_agents
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+
+        # key -> (agent, model, response text, stored_at, embedding or None)
+        self._entries: "OrderedDict[str, Tuple[str, str, str, float, Optional[Dict[int, float]]]]" = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.similar_hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.evictions = 0
+
+    def enabled_for(self, agent: str) -> bool:
+        return agent in self.exact_agents or agent in self.similarity_agents
+
+    @staticmethod
+    def _key(agent: str, model: str, normalized: str) -> str:
+        return hashlib.blake2b(f"{agent}\0{model}\0{normalized}".encode(), digest_size=16).hexdigest()
+
+    def _count(self, counter: Dict[str, int], agent: str) -> None:
+        counter[agent] = counter.get(agent, 0) + 1
+
+    def get(self, agent: str, model: str, messages: List[BaseMessage]) -> Optional[AIMessage]:
+        if not self.enabled_for(agent):
+            return None
+
+        now = time.monotonic()
+        normalized = normalize_prompt(messages)
+        key = self._key(agent, model, normalized)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if now - entry[3] <= self.ttl:
+                self._entries.move_to_end(key)
+                self._count(self.hits, agent)
+                return AIMessage(content=entry[2])
+            del self._entries[key]
+
+        if agent in self.similarity_agents:
+            query = embed(normalized)
+            best_key, best_score = None, self.similarity_threshold
+            for candidate_key, (c_agent, c_model, _, stored_at, vector) in self._entries.items():
+                if c_agent != agent or c_model != model or vector is None or now - stored_at > self.ttl:
+                    continue
+                score = cosine(query, vector)
+                if score >= best_score:
+                    best_key, best_score = candidate_key, score
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self._count(self.similar_hits, agent)
+                return AIMessage(content=self._entries[best_key][2])
+
+        self._count(self.misses, agent)
+        return None
+
+    def put(self, agent: str, model: str, messages: List[BaseMessage], response: AIMessage) -> None:
+        if not self.enabled_for(agent) or not isinstance(response.content, str):
+            return
+
+        normalized = normalize_prompt(messages)
+        vector = embed(normalized) if agent in self.similarity_agents else None
+        key = self._key(agent, model, normalized)
+        self._entries[key] = (agent, model, response.content, time.monotonic(), vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        agents = set(self.hits) | set(self.similar_hits) | set(self.misses)
+        per_agent = {}
+        for agent in sorted(agents):
+            hits = self.hits.get(agent, 0)
+            similar = self.similar_hits.get(agent, 0)
+            misses = self.misses.get(agent, 0)
+            total = hits + similar + misses
+            per_agent[agent] = {
+                "exact_hits": hits,
+                "similar_hits": similar,
+                "misses": misses,
+                "hit_rate": round((hits + similar) / total, 4) if total else 0.0,
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "exact_agents": sorted(self.exact_agents),
+            "similarity_agents": sorted(self.similarity_agents),
+            "evictions": self.evictions,
+            "agents": per_agent,
+        }
+
+
+def _agent_set(value: str) -> Set[str]:
+    return {agent.strip() for agent in value.split(",") if agent.strip()}
+
+
+def create_response_cache() -> ResponseCache:
+    """
+    Build the cache from environment configuration.
+
+    LLM_CACHE_AGENTS             agents using the exact tier (default none), e.g. "master,verification";
+                                 replies are sampled, so only opt in agents whose reply
+                                 may be replayed to another customer with the same prompt
+    LLM_CACHE_SIMILAR_AGENTS     agents also using the similarity tier (default none)
+    LLM_CACHE_SIZE               max cached responses (default 5000)
+    LLM_CACHE_TTL                seconds a response stays valid (default 3600)
+    LLM_CACHE_SIMILARITY         minimum cosine similarity for a similarity hit (default 0.97)
+    """
+    return ResponseCache(
+        exact_agents=_agent_set(os.getenv("LLM_CACHE_AGENTS", "")),
+        similarity_agents=_agent_set(os.getenv("LLM_CACHE_SIMILAR_AGENTS", "")),
+        max_entries=int(os.getenv("LLM_CACHE_SIZE", 5000)),
+        ttl=float(os.getenv("LLM_CACHE_TTL", 3600)),
+        similarity_threshold=float(os.getenv("LLM_CACHE_SIMILARITY", 0.97)),
+    )
+
+
+__all__ = ["ResponseCache", "create_response_cache", "normalize_prompt", "embed", "cosine"]
@@ -0,0 +1,318 @@
+import math
+import operator
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import yaml
+
+DEFAULT_POLICY_PATH = Path(__file__).parent.parent / "config" / "underwriting_policy.yaml"
+
+FEATURES = ("credit_score", "loan_ratio", "emi_share", "has_salary")
+OPERATORS = {"lt": operator.lt, "lte": operator.le, "gt": operator.gt, "gte": operator.ge, "eq": operator.eq}
+DECISIONS = {"approved", "rejected", "salary_slip_required"}
+
+
+class PolicyError(ValueError):
+    """The policy file is malformed; the previously loaded policy stays in force."""
+
+
+class Rule:
+    def __init__(self, rule_id: str, decision: str, conditions: List[Tuple[str, str, float]],
+                 reason: Optional[str] = None, message: Optional[str] = None):
+        self.id = rule_id
+        self.decision = decision
+        self.conditions = conditions
+        self.reason = reason
+        self.message = message
+
+    def matches(self, features: Mapping[str, float]) -> bool:
+        return all(OPERATORS[op](features[feature], value) for feature, op, value in self.conditions)
+
+
+def _parse_rule(raw: Dict, default: bool = False) -> Rule:
+    if not isinstance(raw, dict) or "id" not in raw:
+        raise PolicyError(f"rule without an id: {raw!r}")
+    decision = raw.get("decision")
+    if decision not in DECISIONS:
+        raise PolicyError(f"rule {raw['id']}: decision must be one of {sorted(DECISIONS)}")
+
+    conditions = []
+    when = raw.get("when") or {}
+    if default and when:
+        raise PolicyError("the default rule cannot have conditions")
+    for feature, tests in when.items():
+        if feature not in FEATURES:
+            raise PolicyError(f"rule {raw['id']}: unknown feature {feature!r}")
+        for op, value in (tests or {}).items():
+            if op not in OPERATORS:
+                raise PolicyError(f"rule {raw['id']}: unknown operator {op!r}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise PolicyError(f"rule {raw['id']}: {feature} {op} needs a number")
+            conditions.append((feature, op, float(value)))
+    return Rule(str(raw["id"]), decision, conditions, raw.get("reason"), raw.get("message"))
+
+
+class CompiledPolicy:
+    """
+    A rule list compiled into a decision table.
+
+    Every threshold a rule compares a feature against splits that feature's
+    axis into slots: the open intervals between thresholds and the
+    thresholds themselves. Each condition is constant within a slot, so at
+    compile time every (feature, slot) gets a bitset of the rules that
+    feature doesn't rule out. Evaluating is one bisect plus one AND per
+    feature, then the lowest set bit is the first matching rule, whatever
+    the number of rules.
+    """
+
+    def __init__(self, version: str, rules: List[Rule], default: Rule):
+        self.version = version
+        self.rules = rules
+        self.default = default
+        self.compiled_at = time.time()
+
+        self.thresholds: Dict[str, List[float]] = {}
+        self.masks: Dict[str, List[int]] = {}
+        everything = (1 << len(rules)) - 1
+        for feature in FEATURES:
+            points = sorted({value for rule in rules for f, _, value in rule.conditions if f == feature})
+            self.thresholds[feature] = points
+            masks = []
+            for slot in range(2 * len(points) + 1):
+                probe = self._slot_value(points, slot)
+                mask = everything
+                for index, rule in enumerate(rules):
+                    for f, op, value in rule.conditions:
+                        if f == feature and not OPERATORS[op](probe, value):
+                            mask &= ~(1 << index)
+                            break
+                masks.append(mask)
+            self.masks[feature] = masks
+        self._vector_masks = None
+
+    @staticmethod
+    def _slot_value(points: List[float], slot: int) -> float:
+        """A representative feature value for a slot (odd slots are the thresholds themselves)."""
+        position, on_threshold = divmod(slot, 2)
+        if on_threshold:
+            return points[position]
+        if not points:
+            return 0.0
+        if position == 0:
+            return -math.inf
+        if position == len(points):
+            return math.inf
+        return (points[position - 1] + points[position]) / 2
+
+    @staticmethod
+    def _slot(points: List[float], value: float) -> int:
+        position = bisect_left(points, value)
+        if position < len(points) and points[position] == value:
+            return 2 * position + 1
+        return 2 * position
+
+    def evaluate(self, features: Mapping[str, float]) -> Rule:
+        """The first rule matching `features` (a value for every name in FEATURES)."""
+        mask = -1
+        for feature in FEATURES:
+            mask &= self.masks[feature][self._slot(self.thresholds[feature], features[feature])]
+            if not mask:
+                return self.default
+        return self.rules[(mask & -mask).bit_length() - 1]
+
+    def evaluate_many(self, columns: Mapping[str, "object"]):
+        """
+        Vectorised evaluate: `columns` maps each feature to a NumPy array.
+
+        Returns:
+            int array of rule indexes; len(self.rules) means the default rule
+        """
+        import numpy as np
+
+        if self._vector_masks is None:
+            words = max(1, math.ceil(len(self.rules) / 64))
+            self._vector_masks = {
+                feature: np.array(
+                    [[(mask >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(words)] for mask in masks],
+                    dtype=np.uint64,
+                )
+                for feature, masks in self.masks.items()
+            }
+
+        combined = None
+        for feature in FEATURES:
+            points = np.asarray(self.thresholds[feature], dtype=float)
+            values = np.asarray(columns[feature], dtype=float)
+            position = np.searchsorted(points, values, side="left")
+            on_threshold = (position < len(points)) & (points[np.minimum(position, max(len(points) - 1, 0))] == values) \
+                if len(points) else np.zeros(len(values), dtype=bool)
+            slots = 2 * position + on_threshold
+            selected = self._vector_masks[feature][slots]
+            combined = selected if combined is None else combined & selected
+
+        nonzero = combined != 0
+        has_match = nonzero.any(axis=1)
+        word = nonzero.argmax(axis=1)
+        bits = combined[np.arange(len(combined)), word]
+        lowest = bits & (~bits + np.uint64(1))
+        with np.errstate(divide="ignore"):
+            bit = np.where(has_match, np.log2(np.where(has_match, lowest, 1).astype(float)), 0).astype(int)
+        return np.where(has_match, word * 64 + bit, len(self.rules))
+
+    def rule_at(self, index: int) -> Rule:
+        return self.rules[index] if index < len(self.rules) else self.default
+
+    def decide(self, features: Mapping[str, float], context: Optional[Mapping] = None) -> Dict:
+        """
+        Evaluate and build a decision record.
+
+        Args:
+            features: values for every name in FEATURES
+            context: extra values for the rule's reason text (amount, emi, ...)
+
+        Returns:
+            {"decision", "rule", "reason", "message", "policy_version"}
+        """
+        rule = self.evaluate(features)
+        return self.record(rule, {**features, **(context or {})})
+
+    def record(self, rule: Rule, values: Mapping) -> Dict:
+        reason = None
+        if rule.reason:
+            try:
+                reason = rule.reason.format(**values)
+            except (KeyError, ValueError, TypeError):
+                reason = rule.reason
+        return {
+            "decision": rule.decision,
+            "rule": rule.id,
+            "reason": reason,
+            "message": rule.message,
+            "policy_version": self.version,
+        }
+
+    def describe(self) -> Dict:
+        return {
+            "version": self.version,
+            "rules": [rule.id for rule in self.rules],
+            "default": self.default.id,
+            "thresholds": self.thresholds,
+            "compiled_at": self.compiled_at,
+        }
+
+
+def compile_policy(raw: Dict) -> CompiledPolicy:
+    """Validate a parsed policy document and compile it."""
+    if not isinstance(raw, dict) or "version" not in raw:
+        raise PolicyError("policy needs a version")
+    rules = [_parse_rule(rule) for rule in raw.get("rules") or []]
+    ids = [rule.id for rule in rules]
+    if len(set(ids)) != len(ids):
+        raise PolicyError("rule ids must be unique")
+    if "default" not in raw:
+        raise PolicyError("policy needs a default rule")
+    return CompiledPolicy(str(raw["version"]), rules, _parse_rule(raw["default"], default=True))
+
+
+def load_policy(path: Path) -> CompiledPolicy:
+    with path.open(encoding="utf-8") as f:
+        try:
+            raw = yaml.safe_load(f)
+        except yaml.YAMLError as e:
+            raise PolicyError(f"{path.name}: {e}") from None
+    return compile_policy(raw)
+
+
+class PolicyStore:
+    """
+    Holds the compiled policy and hot-reloads it.
+
+    current() re-checks the file's mtime at most every `check_interval`
+    seconds and recompiles when it changed. A broken edit is reported and
+    ignored: the last good policy keeps deciding.
+    """
+
+    def __init__(self, path: Path, check_interval: float = 5):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = self.path.stat().st_mtime
+        self._policy = load_policy(path)
+        self._next_check = time.monotonic() + check_interval
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def current(self) -> CompiledPolicy:
+        if time.monotonic() >= self._next_check:
+            self._check()
+        return self._policy
+
+    def _check(self) -> None:
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_interval
+            try:
+                mtime = self.path.stat().st_mtime
+            except OSError as e:
+                self.last_error = str(e)
+                return
+            if mtime != self._mtime:
+                self._reload()
+
+    def reload(self) -> CompiledPolicy:
+        """Recompile now, regardless of the file's mtime."""
+        with self._lock:
+            self._reload()
+        return self._policy
+
+    def _reload(self) -> None:
+        try:
+            self._mtime = self.path.stat().st_mtime
+            policy = load_policy(self.path)
+        except (OSError, PolicyError) as e:
+            self.last_error = str(e)
+            print(f"⚠️ Warning: Keeping underwriting policy {self._policy.version}, reload failed: {e}")
+            return
+        self._policy = policy
+        self.reloads += 1
+        self.last_error = None
+        print(f"🔄 Underwriting policy {policy.version} loaded ({len(policy.rules)} rules)")
+
+    def stats(self) -> Dict:
+        return {
+            **self._policy.describe(),
+            "path": str(self.path),
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
+
+
+def create_policy_store() -> PolicyStore:
+    """
+    Build the policy store from environment configuration.
+
+    UNDERWRITING_POLICY_PATH       policy file (default config/underwriting_policy.yaml)
+    UNDERWRITING_POLICY_CHECK      seconds between checks for edits (default 5)
+    """
+    return PolicyStore(
+        Path(os.getenv("UNDERWRITING_POLICY_PATH", DEFAULT_POLICY_PATH)),
+        check_interval=float(os.getenv("UNDERWRITING_POLICY_CHECK", 5)),
+    )
+
+
+underwriting_policy = create_policy_store()
+
+__all__ = [
+    "CompiledPolicy",
+    "PolicyError",
+    "PolicyStore",
+    "Rule",
+    "compile_policy",
+    "create_policy_store",
+    "load_policy",
+    "underwriting_policy",
+    "FEATURES",
+]
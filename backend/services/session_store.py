@@ -0,0 +1,386 @@
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from graph.state import AgentState
+from services.telemetry import session_seconds, tracer
+
+DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "sessions.db"
+
+# Message classes we persist, keyed by a one-letter tag to keep blobs small
+_MESSAGE_TYPES = {"h": HumanMessage, "a": AIMessage, "s": SystemMessage}
+_MESSAGE_TAGS = {cls: tag for tag, cls in _MESSAGE_TYPES.items()}
+
+# Columns mirrored out of the blob so /sessions can list without decoding
+_SUMMARY_FIELDS = ("customer_name", "phone", "loan_status", "current_agent", "workflow_complete")
+
+
+def serialize_state(state: AgentState) -> bytes:
+    """
+    Encode an AgentState as compressed JSON.
+
+    Messages are stored as [tag, content, id] triples; provider metadata
+    (token usage, finish reasons) is dropped because no agent reads it back.
+    """
+    payload = dict(state)
+    payload["messages"] = [
+        [_MESSAGE_TAGS.get(type(msg), "a"), msg.content, msg.id]
+        for msg in state["messages"]
+    ]
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+    return zlib.compress(raw.encode("utf-8"), 1)
+
+
+def deserialize_state(blob: bytes) -> AgentState:
+    """Inverse of serialize_state."""
+    payload = json.loads(zlib.decompress(blob))
+    payload["messages"] = [
+        _MESSAGE_TYPES[tag](content=content, id=msg_id)
+        for tag, content, msg_id in payload["messages"]
+    ]
+    return AgentState(**payload)
+
+
+def _working_copy(state: AgentState) -> AgentState:
+    """
+    Copy handed to callers so that in-place edits by agent nodes never leak
+    into the cache before the session is written back.
+    """
+    # Nested dicts (salary_verification, underwriting_decision, ...) are
+    # copied too; message objects are never edited in place, only the list
+    working = {field: copy.deepcopy(value) for field, value in state.items() if field != "messages"}
+    working["messages"] = list(state["messages"])
+    return working
+
+
+def summarize_state(state: AgentState) -> Dict:
+    return {field: state[field] for field in _SUMMARY_FIELDS}
+
+
+class SQLiteSessionBackend:
+    """Durable session storage in a local SQLite file (WAL, shared by workers)."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB_PATH):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                summary TEXT NOT NULL,
+                state BLOB NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)")
+
+    def get_version(self, session_id: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get(self, session_id: str) -> Optional[Tuple[int, bytes]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, session_id: str, blob: bytes, summary: Dict) -> int:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """INSERT INTO sessions (session_id, version, updated_at, summary, state)
+                   VALUES (?, 1, ?, ?, ?)
+                   ON CONFLICT(session_id) DO UPDATE SET
+                       version = version + 1,
+                       updated_at = excluded.updated_at,
+                       summary = excluded.summary,
+                       state = excluded.state
+                   RETURNING version""",
+                (session_id, now, json.dumps(summary), blob),
+            ).fetchone()
+        return row[0]
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def list_summaries(self, limit: int, offset: int) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, summary FROM sessions ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            ).fetchall()
+        return [{"session_id": sid, **json.loads(summary)} for sid, summary in rows]
+
+    def evict_idle(self, idle_seconds: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - idle_seconds,)
+            )
+        return cursor.rowcount
+
+
+class RedisSessionBackend:
+    """
+    Session storage on any Redis-protocol server (Redis, Valkey, KeyDB...).
+
+    Requires the optional `redis` package. Each session is a hash that the
+    server expires after the idle TTL. A sorted set of session ids scored by
+    last update backs count and list_summaries (ZCARD, ZREVRANGE), so paging
+    never scans the keyspace; evict_idle trims ids whose hash has expired.
+    """
+
+    def __init__(self, url: str, idle_seconds: float, prefix: str = "credsaathi:session:",
+                 index_key: str = "credsaathi:sessions"):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_BACKEND=redis requires the 'redis' package") from e
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+        self._index = index_key
+        self._ttl = int(idle_seconds)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self._prefix}{session_id}"
+
+    def get_version(self, session_id: str) -> Optional[int]:
+        version = self._client.hget(self._key(session_id), "version")
+        return int(version) if version is not None else None
+
+    def get(self, session_id: str) -> Optional[Tuple[int, bytes]]:
+        version, blob = self._client.hmget(self._key(session_id), "version", "state")
+        if blob is None:
+            return None
+        return int(version), blob
+
+    def put(self, session_id: str, blob: bytes, summary: Dict) -> int:
+        key = self._key(session_id)
+        now = time.time()
+        pipe = self._client.pipeline()
+        pipe.hincrby(key, "version", 1)
+        pipe.hset(key, mapping={"state": blob, "summary": json.dumps(summary), "updated_at": now})
+        pipe.expire(key, self._ttl)
+        pipe.zadd(self._index, {session_id: now})
+        version = pipe.execute()[0]
+        return int(version)
+
+    def delete(self, session_id: str) -> bool:
+        pipe = self._client.pipeline()
+        pipe.delete(self._key(session_id))
+        pipe.zrem(self._index, session_id)
+        deleted, _ = pipe.execute()
+        return deleted > 0
+
+    def count(self) -> int:
+        return self._client.zcard(self._index)
+
+    def list_summaries(self, limit: int, offset: int) -> List[Dict]:
+        session_ids = [sid.decode() for sid in self._client.zrevrange(self._index, offset, offset + limit - 1)]
+        if not session_ids:
+            return []
+        pipe = self._client.pipeline()
+        for session_id in session_ids:
+            pipe.hget(self._key(session_id), "summary")
+        # Ids whose hash expired since the last evict_idle are skipped
+        return [
+            {"session_id": session_id, **json.loads(summary)}
+            for session_id, summary in zip(session_ids, pipe.execute())
+            if summary is not None
+        ]
+
+    def evict_idle(self, idle_seconds: float) -> int:
+        # The hashes expire on their own; drop their ids from the index
+        return self._client.zremrangebyscore(self._index, "-inf", time.time() - idle_seconds)
+
+
+class SessionStore:
+    """
+    Session state behind a bounded in-process LRU cache.
+
+    Every write goes through to the durable backend, so any worker can pick
+    up any session. Reads check the backend's version counter (a cheap point
+    lookup) and only decode the blob when another worker has written since
+    this process cached it. Entries untouched for `cache_ttl` seconds are
+    dropped from the cache; sessions idle for `idle_ttl` seconds are deleted
+    from the backend by evict_idle.
+    """
+
+    def __init__(self, backend, cache_size: int = 1000, cache_ttl: float = 300, idle_ttl: float = 86400):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.idle_ttl = idle_ttl
+        # session_id -> (version, state, cached_at); touched from to_thread
+        # workers and the event loop, so every access holds _lock
+        self._cache: "OrderedDict[str, Tuple[int, AgentState, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # session_id -> [asyncio.Lock, holders + waiters]; dropped when unused
+        self._turn_locks: Dict[str, list] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_put(self, session_id: str, version: int, state: AgentState) -> None:
+        """Insert or refresh an entry; callers hold _lock."""
+        self._cache[session_id] = (version, state, time.monotonic())
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _get(self, session_id: str) -> Optional[AgentState]:
+        with self._lock:
+            cached = self._cache.get(session_id)
+        if cached and time.monotonic() - cached[2] <= self.cache_ttl:
+            if self.backend.get_version(session_id) == cached[0]:
+                with self._lock:
+                    self._cache_put(session_id, cached[0], cached[1])
+                    self.hits += 1
+                return _working_copy(cached[1])
+
+        with self._lock:
+            self.misses += 1
+            self._cache.pop(session_id, None)
+        row = self.backend.get(session_id)
+        if row is None:
+            return None
+
+        version, blob = row
+        state = deserialize_state(blob)
+        with self._lock:
+            self._cache_put(session_id, version, state)
+        return _working_copy(state)
+
+    def _put(self, session_id: str, state: AgentState) -> None:
+        version = self.backend.put(session_id, serialize_state(state), summarize_state(state))
+        cached = _working_copy(state)
+        with self._lock:
+            self._cache_put(session_id, version, cached)
+
+    def _delete(self, session_id: str) -> bool:
+        with self._lock:
+            self._cache.pop(session_id, None)
+        return self.backend.delete(session_id)
+
+    @asynccontextmanager
+    async def locked(self, session_id: str):
+        """
+        Run one load -> workflow -> save sequence on a session at a time.
+
+        Turns on the same session (chat, stream, WebSocket, slip jobs) queue
+        behind each other in this worker, so two concurrent messages can't
+        both advance the application from the same starting state.
+        """
+        entry = self._turn_locks.get(session_id)
+        if entry is None:
+            entry = self._turn_locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._turn_locks[session_id]
+
+    async def get(self, session_id: str) -> Optional[AgentState]:
+        with tracer.span("session load", metric=session_seconds, labels=("load",)):
+            return await asyncio.to_thread(self._get, session_id)
+
+    async def put(self, session_id: str, state: AgentState) -> None:
+        with tracer.span("session save", metric=session_seconds, labels=("save",)):
+            await asyncio.to_thread(self._put, session_id, state)
+
+    async def delete(self, session_id: str) -> bool:
+        return await asyncio.to_thread(self._delete, session_id)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self.backend.count)
+
+    async def list_summaries(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+        return await asyncio.to_thread(self.backend.list_summaries, limit, offset)
+
+    async def evict_idle(self) -> int:
+        """Drop idle sessions from the backend and stale entries from the cache."""
+        now = time.monotonic()
+        with self._lock:
+            for session_id in [sid for sid, (_, _, at) in self._cache.items() if now - at > self.cache_ttl]:
+                del self._cache[session_id]
+        return await asyncio.to_thread(self.backend.evict_idle, self.idle_ttl)
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            cached, hits, misses = len(self._cache), self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "cached_sessions": cached,
+            "cache_size": self.cache_size,
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def create_session_store() -> SessionStore:
+    """
+    Build the session store from environment configuration.
+
+    SESSION_BACKEND     sqlite (default) or redis
+    SESSION_DB_PATH     SQLite file (default data/sessions.db)
+    REDIS_URL           Redis-protocol server for SESSION_BACKEND=redis
+    SESSION_CACHE_SIZE  max sessions held in memory per worker (default 1000)
+    SESSION_CACHE_TTL   seconds a cached session stays in memory (default 300)
+    SESSION_IDLE_TTL    seconds of inactivity before a session is evicted (default 86400)
+    """
+    idle_ttl = float(os.getenv("SESSION_IDLE_TTL", 86400))
+
+    if os.getenv("SESSION_BACKEND", "sqlite") == "redis":
+        backend = RedisSessionBackend(os.getenv("REDIS_URL", "redis://localhost:6379/0"), idle_ttl)
+    else:
+        backend = SQLiteSessionBackend(Path(os.getenv("SESSION_DB_PATH", DEFAULT_DB_PATH)))
+
+    return SessionStore(
+        backend,
+        cache_size=int(os.getenv("SESSION_CACHE_SIZE", 1000)),
+        cache_ttl=float(os.getenv("SESSION_CACHE_TTL", 300)),
+        idle_ttl=idle_ttl,
+    )
+
+
+session_store = create_session_store()
+
+__all__ = [
+    "SessionStore",
+    "SQLiteSessionBackend",
+    "RedisSessionBackend",
+    "create_session_store",
+    "serialize_state",
+    "deserialize_state",
+    "session_store",
+]
@@ -0,0 +1,169 @@
+import asyncio
+import copy
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from utils.scanpdf import extract_salary_slip
+
+# Workers must not be forked from the server: a lock held by one of its
+# threads (aiosqlite, to_thread workers, the span exporter) at fork time
+# stays held forever in the child
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _warm_up() -> None:
+    """Pool initializer: import the PDF stack before the first slip arrives."""
+    import pdfplumber  # noqa: F401
+
+
+class SalarySlipExtractor:
+    """
+    Runs utils.scanpdf extraction in a worker pool, cached by file hash.
+
+    Parsing a PDF is CPU-bound pure Python, so it runs in a process pool
+    (created on first use) to stay off the event loop. Results are kept in
+    an LRU keyed by the upload's SHA-256, and concurrent requests for the
+    same file share one extraction.
+
+    mode: "process" (default) or "thread"
+    """
+
+    def __init__(self, workers: int = 2, mode: str = "process", cache_size: int = 1000, ocr: bool = True):
+        self.workers = max(1, workers)
+        self.mode = mode
+        self.cache_size = cache_size
+        self.ocr = ocr
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.failed = 0
+        self.pages = 0
+        self.total_seconds = 0.0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "thread":
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix="slip-extract", initializer=_warm_up
+                        )
+                    else:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers, initializer=_warm_up,
+                            mp_context=multiprocessing.get_context(START_METHOD),
+                        )
+        return self._executor
+
+    def _remember(self, sha256: str, result: Dict) -> None:
+        self._cache[sha256] = result
+        self._cache.move_to_end(sha256)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def extract(self, path: Union[str, Path], sha256: str) -> Dict:
+        """
+        Extract salary details from an uploaded slip.
+
+        Args:
+            path: saved upload (PDF, JPG or PNG)
+            sha256: hash of the file, computed while it was uploaded
+
+        Returns:
+            utils.scanpdf.extract_salary_slip result (a copy the caller may modify)
+        """
+        cached = self._cache.get(sha256)
+        if cached is not None:
+            self._cache.move_to_end(sha256)
+            self.hits += 1
+            return copy.deepcopy(cached)
+
+        while (inflight := self._inflight.get(sha256)) is not None:
+            # asyncio.wait doesn't raise if the extracting caller was cancelled
+            await asyncio.wait([inflight])
+            if not inflight.cancelled():
+                self.hits += 1
+                return copy.deepcopy(inflight.result())
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[sha256] = future
+        started = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(self._pool(), extract_salary_slip, str(path), self.ocr)
+        except Exception as e:
+            self.failed += 1
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        except BaseException:
+            # Cancelled: callers waiting on this file retry instead of hanging
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(sha256, None)
+            self.total_seconds += time.perf_counter() - started
+
+        self.pages += result["pages"]
+        self._remember(sha256, result)
+        future.set_result(result)
+        return copy.deepcopy(result)
+
+    def extract_many_sync(self, paths: List[Union[str, Path]]) -> List[Dict]:
+        """Blocking, uncached extraction of many files across the pool (scripts, benchmarks)."""
+        pool = self._pool()
+        futures = [pool.submit(extract_salary_slip, str(path), self.ocr) for path in paths]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "started": self._executor is not None,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "failed": self.failed,
+            "pages": self.pages,
+            "total_seconds": round(self.total_seconds, 3),
+        }
+
+
+def create_slip_extractor() -> SalarySlipExtractor:
+    """
+    Build the extractor from environment configuration.
+
+    SLIP_EXTRACT_WORKERS   pool size (default: CPU count, at most 2)
+    SLIP_EXTRACT_MODE      "process" or "thread" (default process)
+    SLIP_CACHE_SIZE        extraction results kept by file hash (default 1000)
+    SCANPDF_OCR            "auto" (OCR if tesseract is installed) or "off"
+    """
+    return SalarySlipExtractor(
+        workers=int(os.getenv("SLIP_EXTRACT_WORKERS", min(2, os.cpu_count() or 1))),
+        mode=os.getenv("SLIP_EXTRACT_MODE", "process"),
+        cache_size=int(os.getenv("SLIP_CACHE_SIZE", 1000)),
+        ocr=os.getenv("SCANPDF_OCR", "auto") != "off",
+    )
+
+
+slip_extractor = create_slip_extractor()
+
+__all__ = ["SalarySlipExtractor", "create_slip_extractor", "slip_extractor"]
@@ -0,0 +1,146 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from services.pdf_renderer import SanctionLetterRenderer, pdf_renderer
+
+
+def letter_key(fields: Dict) -> str:
+    """Identity of a letter's content: the same fields always render the same PDF."""
+    raw = json.dumps(fields, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SpeculativeLetters:
+    """
+    Sanction letters rendered ahead of the underwriting decision.
+
+    Once the loan is priced and the policy already approves it on what is
+    known (so underwriting can only confirm it), start() begins rendering
+    the letter in the background. The sanction step then take()s the
+    finished PDF instead of rendering it, as long as the letter fields are
+    still identical; if underwriting decides otherwise the render is
+    discard()ed. Nothing reaches the letter store until the letter is
+    taken, so a discarded speculation leaves no trace.
+
+    Renders are held in this worker's memory: at most max_pending at once,
+    each for at most ttl seconds (the oldest are dropped first).
+    """
+
+    def __init__(self, renderer: SanctionLetterRenderer, max_pending: int = 256, ttl: float = 120, enabled: bool = True):
+        self.renderer = renderer
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.enabled = enabled
+        # letter key -> (render task, started_at)
+        self._pending: "OrderedDict[str, Tuple[asyncio.Task, float]]" = OrderedDict()
+        self.started = 0
+        self.committed = 0
+        self.discarded = 0
+        self.expired = 0
+        self.failed = 0
+
+    def start(self, fields: Dict) -> Optional[str]:
+        """
+        Start rendering a letter in the background.
+
+        Returns:
+            The letter key to hand to take()/discard(), or None if
+            speculation is off
+        """
+        if not self.enabled:
+            return None
+        self._expire()
+        key = letter_key(fields)
+        if key in self._pending:
+            return key
+        while len(self._pending) >= self.max_pending:
+            self._drop(next(iter(self._pending)))
+            self.expired += 1
+        self._pending[key] = (asyncio.create_task(self.renderer.render(fields)), time.monotonic())
+        self.started += 1
+        return key
+
+    async def take(self, key: Optional[str], fields: Dict) -> Optional[bytes]:
+        """
+        The speculatively rendered PDF for these fields, waiting for it if
+        it is still rendering.
+
+        Returns:
+            The PDF, or None if there is no matching render (not started,
+            fields changed since, expired, or the render failed)
+        """
+        if not key or key != letter_key(fields):
+            self.discard(key)
+            return None
+        entry = self._pending.pop(key, None)
+        if entry is None:
+            return None
+        try:
+            pdf = await entry[0]
+        except Exception as e:
+            print(f"⚠️ Warning: Speculative sanction letter render failed, rendering again: {e}")
+            self.failed += 1
+            return None
+        self.committed += 1
+        return pdf
+
+    def discard(self, key: Optional[str]) -> None:
+        """Drop a speculative render that won't be used."""
+        if key and key in self._pending:
+            self._drop(key)
+            self.discarded += 1
+
+    def _drop(self, key: str) -> None:
+        task, _ = self._pending.pop(key)
+        task.cancel()
+        # Cancelling doesn't stop a render already running in the pool;
+        # retrieve its outcome so a failure isn't reported as never awaited
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        while self._pending:
+            key, (_, started_at) = next(iter(self._pending.items()))
+            if started_at >= cutoff:
+                break
+            self._drop(key)
+            self.expired += 1
+
+    def stats(self) -> Dict:
+        decided = self.committed + self.discarded
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "started": self.started,
+            "committed": self.committed,
+            "discarded": self.discarded,
+            "expired": self.expired,
+            "failed": self.failed,
+            "commit_rate": round(self.committed / decided, 4) if decided else 0.0,
+        }
+
+
+def create_speculative_letters() -> SpeculativeLetters:
+    """
+    Build the speculative letter renderer from environment configuration.
+
+    SPECULATIVE_LETTERS          1 (default) to pre-render likely approvals, 0 to turn off
+    SPECULATIVE_LETTERS_MAX      renders held at once per worker (default 256)
+    SPECULATIVE_LETTERS_TTL      seconds an unclaimed render is kept (default 120)
+    """
+    return SpeculativeLetters(
+        pdf_renderer,
+        max_pending=int(os.getenv("SPECULATIVE_LETTERS_MAX", 256)),
+        ttl=float(os.getenv("SPECULATIVE_LETTERS_TTL", 120)),
+        enabled=os.getenv("SPECULATIVE_LETTERS", "1") == "1",
+    )
+
+
+speculative_letters = create_speculative_letters()
+
+__all__ = ["SpeculativeLetters", "create_speculative_letters", "letter_key", "speculative_letters"]
@@ -0,0 +1,435 @@
+import bisect
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+# (labels, value) samples of one metric family, produced at scrape time
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets, one series per label combination."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (last is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(values, list(counts), total) for values, (counts, total) in self._series.items()]
+        for values, counts, total in sorted(series):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                labels = _label_text(self.labels, values, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _label_text(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    The metrics served at /metrics in the Prometheus text format.
+
+    Histograms are observed as things happen; collectors are
+    called at scrape time for values other services already count (cache
+    hits and misses), so those keep a single source of truth.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name: str, kind: str, help: str, collect: Callable[[], Samples]) -> None:
+        """
+        Add a metric family read at scrape time.
+
+        Args:
+            name: metric name, e.g. "llm_cache_lookups_total"
+            kind: "counter" or "gauge"
+            help: HELP text
+            collect: returns (labels, value) samples
+        """
+        self._collectors.append((name, kind, help, collect))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name, kind, help, collect in self._collectors:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            try:
+                samples = list(collect())
+            except Exception as e:
+                print(f"⚠️ Warning: Metrics collector {name} failed: {e}")
+                continue
+            for labels, value in samples:
+                lines.append(f"{name}{_label_text(list(labels), list(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation of a trace, in the shape of an OpenTelemetry span.
+    Created by Tracer.span and used as a context manager: it is the current
+    span while the block runs and is finished when the block exits.
+    """
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "sampled", "start_ns", "end_ns",
+                 "attributes", "status", "labels", "metric", "exporter", "_token")
+
+    def __init__(self, name: str, kind: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: Dict, metric: Optional[Histogram] = None, labels: Sequence[str] = (),
+                 exporter=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.labels = tuple(labels)
+        self.metric = metric
+        self.exporter = exporter if sampled else None
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.status = "error"
+            self.attributes["error"] = exc_type.__name__
+        if self.metric is not None:
+            self.metric.observe((self.end_ns - self.start_ns) / 1e9, *self.labels)
+        if self.exporter is not None:
+            self.exporter.export(self)
+        return False
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def seconds(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e9
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header value pointing at this span."""
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round(self.seconds * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """(trace_id, parent span_id, sampled) from a W3C traceparent header, or None if absent/invalid."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+
+
+class FileSpanExporter:
+    """
+    Appends finished spans to a local file as NDJSON, one span per line.
+
+    Spans are buffered and written by a background thread every `interval`
+    seconds (or once `batch_size` are waiting), so exporting never blocks
+    the event loop on disk. The file is rotated to <path>.1 once it grows
+    past max_bytes.
+    """
+
+    def __init__(self, path: Path, batch_size: int = 512, interval: float = 1.0, max_bytes: int = 100 * 1024 * 1024):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._buffer: List[Dict] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            if len(self._buffer) >= self.batch_size * 20:
+                self.dropped += 1  # the writer can't keep up; don't grow without bound
+                return
+            self._buffer.append(span.to_dict())
+            full = len(self._buffer) >= self.batch_size
+        if self._thread is None:
+            self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out the buffered spans now."""
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+        if not spans:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                self.path.replace(self.path.with_name(self.path.name + ".1"))
+            with self.path.open("a", encoding="utf-8") as f:
+                f.writelines(json.dumps(span, separators=(",", ":"), default=str) + "\n" for span in spans)
+            self.exported += len(spans)
+        except OSError as e:
+            self.dropped += len(spans)
+            print(f"⚠️ Warning: Could not export {len(spans)} spans to {self.path}: {e}")
+
+    def stats(self) -> Dict:
+        return {"path": str(self.path), "exported": self.exported, "dropped": self.dropped,
+                "buffered": len(self._buffer)}
+
+
+class Tracer:
+    """
+    Spans for where a request spends its time: the HTTP request, each
+    LangGraph node, each LLM call, upstream HTTP call, session load/save and
+    PDF render. The current span is tracked in a context variable, so spans
+    started in nodes, tasks and worker threads (asyncio.to_thread copies
+    the context) nest under the request that caused them.
+
+    A span can feed a histogram: pass metric= and the label values, and its
+    duration is observed when it ends (whether or not the trace is
+    sampled), so /metrics and the traces agree.
+
+    Traces are sampled per request (sample_rate) and finished sampled spans
+    go to the exporter; without one, spans only drive the metrics.
+    """
+
+    def __init__(self, exporter: Optional[FileSpanExporter] = None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current_span.get()
+
+    def span(self, name: str, kind: str = "internal", metric: Optional[Histogram] = None,
+             labels: Sequence[str] = (), traceparent: Optional[str] = None, **attributes) -> Span:
+        """
+        A span timing the block it is entered for (`with tracer.span(...) as span:`).
+
+        Args:
+            name: span name, e.g. "node sales" or "llm sales"
+            kind: "server", "client" or "internal"
+            metric: histogram to observe the duration in, with `labels`
+                (span.labels may be changed inside the block, e.g. to add
+                the response status)
+            traceparent: incoming W3C traceparent header, for root spans
+            attributes: span attributes
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = parent.trace_id, parent.span_id, parent.sampled
+        else:
+            incoming = parse_traceparent(traceparent)
+            if incoming:
+                trace_id, parent_id, sampled = incoming
+            else:
+                trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+                sampled = self.exporter is not None and random.random() < self.sample_rate
+        return Span(name, kind, trace_id, parent_id, sampled, attributes, metric, labels, self.exporter)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "exporter": self.exporter.stats() if self.exporter is not None else None,
+        }
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: one server span per HTTP request, named by method and
+    route template, timed until the response body (including streamed
+    responses) has been sent. Honours an incoming traceparent header and
+    returns the request's own in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        headers = dict(scope.get("headers") or ())
+        incoming = headers.get(b"traceparent")
+        with tracer.span(method, kind="server", metric=request_seconds,
+                         labels=(method, "unmatched", "500"),
+                         traceparent=incoming.decode("latin-1") if incoming else None,
+                         path=scope["path"]) as span:
+            status = "500"
+
+            async def send_with_trace(message):
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = str(message["status"])
+                    message.setdefault("headers", [])
+                    message["headers"] = [*message["headers"], (b"traceparent", span.traceparent.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                route = scope.get("route")
+                path = getattr(route, "path", "unmatched")
+                span.name = f"{method} {path}"
+                span.labels = (method, path, status)
+                span.set(route=path, status_code=int(status))
+
+
+def create_tracer() -> Tracer:
+    """
+    Build the tracer from environment configuration.
+
+    TRACE_EXPORT_FILE   NDJSON file finished spans are appended to (default: no export)
+    TRACE_SAMPLE_RATE   share of requests whose spans are exported, 0-1 (default 1)
+    TRACE_FILE_MAX_MB   size at which the file is rotated to <file>.1 (default 100)
+    """
+    path = os.getenv("TRACE_EXPORT_FILE")
+    exporter = FileSpanExporter(
+        Path(path), max_bytes=int(float(os.getenv("TRACE_FILE_MAX_MB", 100)) * 1024 * 1024)
+    ) if path else None
+    return Tracer(exporter, sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", 1)))
+
+
+tracer = create_tracer()
+metrics = MetricsRegistry()
+
+request_seconds = metrics.histogram(
+    "http_server_request_duration_seconds", "Time to serve an HTTP request, until its body was sent",
+    ("method", "route", "status"))
+node_seconds = metrics.histogram(
+    "loan_graph_node_duration_seconds", "Time spent in one LangGraph node run", ("node",))
+llm_seconds = metrics.histogram(
+    "llm_request_duration_seconds", "Time to answer one agent LLM call, by where the answer came from",
+    ("agent", "model", "source"))
+llm_tokens = metrics.histogram(
+    "llm_tokens", "Tokens per provider LLM call", ("agent", "model", "direction"), buckets=TOKEN_BUCKETS)
+upstream_seconds = metrics.histogram(
+    "upstream_request_duration_seconds", "Time for one upstream HTTP call, retries included",
+    ("endpoint", "status"))
+session_seconds = metrics.histogram(
+    "session_store_duration_seconds", "Time to load or save a session", ("operation",))
+pdf_render_seconds = metrics.histogram(
+    "pdf_render_duration_seconds", "Time to render one sanction letter", ("mode",))
+
+__all__ = [
+    "FileSpanExporter",
+    "Histogram",
+    "MetricsRegistry",
+    "Span",
+    "Tracer",
+    "TracingMiddleware",
+    "create_tracer",
+    "metrics",
+    "parse_traceparent",
+    "tracer",
+    "llm_seconds",
+    "llm_tokens",
+    "node_seconds",
+    "pdf_render_seconds",
+    "request_seconds",
+    "session_seconds",
+    "upstream_seconds",
+]
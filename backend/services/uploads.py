@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+
+DEFAULT_UPLOAD_DIR = Path(__file__).parent.parent / "data" / "uploaded_salary_slips"
+
+# Accepted salary slip types: extension -> (content types, leading magic bytes)
+ALLOWED_TYPES = {
+    ".pdf": ({"application/pdf"}, (b"%PDF-",)),
+    ".jpg": ({"image/jpeg", "image/jpg"}, (b"\xff\xd8\xff",)),
+    ".jpeg": ({"image/jpeg", "image/jpg"}, (b"\xff\xd8\xff",)),
+    ".png": ({"image/png"}, (b"\x89PNG\r\n\x1a\n",)),
+}
+SNIFF_BYTES = 8
+MAX_FIELD_BYTES = 1024  # non-file form fields are short (e.g. monthly_salary)
+
+
+class UploadRejected(Exception):
+    """The upload broke a size or type limit; carries the HTTP status to answer with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+@dataclass
+class ReceivedFile:
+    path: Path
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    fields: Dict[str, str] = field(default_factory=dict)
+
+
+class _Part:
+    """State for the multipart part currently being parsed."""
+
+    def __init__(self):
+        self.headers: Dict[bytes, bytes] = {}
+        self.name: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.content_type = ""
+        self.value = bytearray()
+
+
+class SalarySlipReceiver:
+    """
+    Streams a multipart/form-data upload straight to disk.
+
+    The request body is fed to python-multipart chunk by chunk as it
+    arrives, so a file is never held in memory. Limits are enforced while
+    streaming: the declared extension/content type when the part starts,
+    magic bytes at the start of the file, and the size cap on every chunk, so an
+    oversized or disguised upload is cut off early. The file is hashed as
+    it is written; rejected uploads leave nothing behind.
+    """
+
+    def __init__(self, upload_dir: Path, max_bytes: int = 5 * 1024 * 1024):
+        self.upload_dir = upload_dir
+        self.max_bytes = max_bytes
+
+    async def receive(
+        self,
+        stream: AsyncIterator[bytes],
+        content_type: Optional[str],
+        content_length: Optional[str],
+        file_field: str = "file",
+        name_prefix: str = "salary_slip",
+    ) -> ReceivedFile:
+        """
+        Args:
+            stream: the raw request body (Request.stream())
+            content_type: the request's Content-Type header
+            content_length: the request's Content-Length header, if any
+            file_field: form field holding the file
+            name_prefix: prefix of the saved file name
+
+        Returns:
+            The saved file with its size, SHA-256 and the other form fields
+        """
+        mime, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if mime != b"multipart/form-data" or not boundary:
+            raise UploadRejected(415, "Expected a multipart/form-data upload")
+
+        # Reject obviously oversized bodies before reading any of them
+        # (leave room for the other fields and multipart framing).
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes + 64 * 1024:
+            raise UploadRejected(413, f"File exceeds the {self.max_bytes // (1024 * 1024)}MB limit")
+
+        part = _Part()
+        fields: Dict[str, str] = {}
+        pending = []  # file chunks parsed from the current body chunk
+        upload = {"size": 0, "sniffed": False, "ext": None, "filename": None, "content_type": None}
+        head = bytearray()
+        header_field = bytearray()
+        header_value = bytearray()
+        hasher = hashlib.sha256()
+
+        def on_part_begin():
+            nonlocal part
+            part = _Part()
+
+        def on_header_field(data, start, end):
+            header_field.extend(data[start:end])
+
+        def on_header_value(data, start, end):
+            header_value.extend(data[start:end])
+
+        def on_header_end():
+            part.headers[bytes(header_field).lower()] = bytes(header_value)
+            header_field.clear()
+            header_value.clear()
+
+        def on_headers_finished():
+            _, disposition = parse_options_header(part.headers.get(b"content-disposition"))
+            part.name = disposition.get(b"name", b"").decode("utf-8", "replace")
+            if b"filename" in disposition:
+                part.filename = Path(disposition[b"filename"].decode("utf-8", "replace")).name
+                part.content_type = parse_options_header(part.headers.get(b"content-type"))[0].decode("latin-1")
+            if part.name == file_field and part.filename is not None:
+                if upload["filename"] is not None:
+                    raise UploadRejected(400, "Upload exactly one salary slip")
+                ext = Path(part.filename).suffix.lower()
+                allowed = ALLOWED_TYPES.get(ext)
+                if allowed is None:
+                    raise UploadRejected(415, "Salary slip must be a PDF, JPG or PNG file")
+                if part.content_type and part.content_type not in allowed[0] and part.content_type != "application/octet-stream":
+                    raise UploadRejected(415, f"Content type {part.content_type} does not match a {ext} file")
+                upload.update(ext=ext, filename=part.filename, content_type=part.content_type or next(iter(allowed[0])))
+
+        def on_part_data(data, start, end):
+            chunk = data[start:end]
+            if part.filename is None:
+                if len(part.value) + len(chunk) > MAX_FIELD_BYTES:
+                    raise UploadRejected(413, f"Form field {part.name} is too large")
+                part.value.extend(chunk)
+                return
+            if part.name != file_field:
+                raise UploadRejected(400, f"Unexpected file field {part.name}")
+
+            if not upload["sniffed"]:
+                head.extend(chunk[:SNIFF_BYTES - len(head)])
+                if len(head) >= SNIFF_BYTES:
+                    sniff()
+
+            upload["size"] += len(chunk)
+            if upload["size"] > self.max_bytes:
+                raise UploadRejected(413, f"File exceeds the {self.max_bytes // (1024 * 1024)}MB limit")
+            hasher.update(chunk)
+            pending.append(bytes(chunk))
+
+        def sniff():
+            if not any(bytes(head).startswith(magic) for magic in ALLOWED_TYPES[upload["ext"]][1]):
+                raise UploadRejected(415, f"File content is not a valid {upload['ext'][1:].upper()}")
+            upload["sniffed"] = True
+
+        def on_part_end():
+            if part.filename is None and part.name:
+                fields[part.name] = part.value.decode("utf-8", "replace")
+            elif part.name == file_field and head and not upload["sniffed"]:
+                sniff()  # files shorter than SNIFF_BYTES
+
+        parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": on_part_begin,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+        })
+
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.upload_dir / f".upload_{uuid.uuid4().hex}.part"
+        handle = await asyncio.to_thread(tmp_path.open, "wb")
+        try:
+            async for chunk in stream:
+                parser.write(chunk)
+                if pending:
+                    data = b"".join(pending)
+                    pending.clear()
+                    await asyncio.to_thread(handle.write, data)
+            parser.finalize()
+            await asyncio.to_thread(handle.close)
+
+            if upload["filename"] is None or not upload["sniffed"]:
+                raise UploadRejected(400, f"No file uploaded in field '{file_field}'")
+
+            digest = hasher.hexdigest()
+            final_path = self.upload_dir / f"{name_prefix}_{digest[:16]}_{uuid.uuid4().hex[:8]}{upload['ext']}"
+            await asyncio.to_thread(os.replace, tmp_path, final_path)
+        except BaseException:
+            handle.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        return ReceivedFile(
+            path=final_path,
+            filename=upload["filename"],
+            content_type=upload["content_type"],
+            size=upload["size"],
+            sha256=digest,
+            fields=fields,
+        )
+
+
+def create_salary_slip_receiver() -> SalarySlipReceiver:
+    """
+    Build the receiver from environment configuration.
+
+    UPLOAD_DIR          where salary slips are saved (default data/uploaded_salary_slips)
+    UPLOAD_MAX_MB       largest accepted salary slip (default 5)
+    """
+    return SalarySlipReceiver(
+        Path(os.getenv("UPLOAD_DIR", DEFAULT_UPLOAD_DIR)),
+        max_bytes=int(float(os.getenv("UPLOAD_MAX_MB", 5)) * 1024 * 1024),
+    )
+
+
+salary_slip_receiver = create_salary_slip_receiver()
+
+__all__ = ["SalarySlipReceiver", "ReceivedFile", "UploadRejected", "create_salary_slip_receiver", "salary_slip_receiver"]
@@ -0,0 +1,244 @@
+"""
+EMI and amortisation maths for reducing-balance loans.
+
+Two flavours:
+- array functions (emi, total_interest, amortization_schedule(s),
+  price_grid) take scalars or array-likes of (amount, annual rate %,
+  tenure months), broadcast them with NumPy and return floats/ndarrays,
+  so whole offer grids are priced without Python loops;
+- exact functions (emi_exact, amortization_schedule_exact) use Decimal
+  arithmetic and round to paise the way the bank books them.
+
+NumPy is imported on first use of an array function: the chat path only
+needs emi_exact, and importing NumPy would add ~0.1s to API startup.
+"""
+from decimal import Decimal, ROUND_HALF_UP, localcontext
+from typing import Dict, List, Optional, Union
+
+Number = Union[int, float, Decimal]
+PAISE = Decimal("0.01")
+
+
+def _round_half_up(values, decimals: int):
+    """Currency rounding (half away from zero) for float arrays; np.round rounds half to even."""
+    import numpy as np
+    scale = 10.0 ** decimals
+    return np.sign(values) * np.floor(np.abs(values) * scale + 0.5) / scale
+
+
+def _unwrap(values):
+    """0-d arrays back to Python floats so scalar calls return scalars."""
+    return values.item() if getattr(values, "ndim", 1) == 0 else values
+
+
+def emi(principal, annual_rate, tenure_months, decimals: Optional[int] = None):
+    """
+    Monthly instalment: P * r * (1+r)^n / ((1+r)^n - 1), r = annual_rate / 1200.
+
+    Args:
+        principal: loan amount(s)
+        annual_rate: interest rate(s) in percent per annum
+        tenure_months: tenure(s) in months
+        decimals: round the result half-up to this many decimals
+
+    Returns:
+        float for scalar inputs, otherwise an ndarray of the broadcast shape
+    """
+    import numpy as np
+    principal = np.asarray(principal, dtype=float)
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 1200
+    tenure = np.asarray(tenure_months, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.power(1 + monthly_rate, tenure)
+        result = np.where(
+            monthly_rate == 0,
+            principal / tenure,
+            principal * monthly_rate * growth / (growth - 1),
+        )
+    if decimals is not None:
+        result = _round_half_up(result, decimals)
+    return _unwrap(result)
+
+
+def total_interest(principal, annual_rate, tenure_months, decimals: Optional[int] = None):
+    """Interest paid over the life of the loan(s): EMI * tenure - principal."""
+    import numpy as np
+    instalment = np.asarray(emi(principal, annual_rate, tenure_months, decimals))
+    result = instalment * np.asarray(tenure_months, dtype=float) - np.asarray(principal, dtype=float)
+    if decimals is not None:
+        result = _round_half_up(result, decimals)
+    return _unwrap(result)
+
+
+def amortization_schedules(principals, annual_rates, tenures) -> Dict:
+    """
+    Month-by-month schedules for many loans at once.
+
+    Uses the closed form for the outstanding balance after k payments,
+    B_k = P(1+r)^k - E((1+r)^k - 1)/r, so every cell is computed in one
+    vectorised pass.
+
+    Args:
+        principals, annual_rates, tenures: equal-length (or broadcastable) 1-d inputs
+
+    Returns:
+        {"month": (T,), and (loans, T) arrays "emi", "interest", "principal",
+        "balance"}, T being the longest tenure; months past a loan's tenure
+        are zero.
+    """
+    import numpy as np
+    principal, rate, tenure = np.broadcast_arrays(
+        np.atleast_1d(np.asarray(principals, dtype=float)),
+        np.atleast_1d(np.asarray(annual_rates, dtype=float)),
+        np.atleast_1d(np.asarray(tenures, dtype=int)),
+    )
+    monthly_rate = rate / 1200
+    instalment = np.asarray(emi(principal, rate, tenure))
+
+    months = np.arange(1, int(tenure.max()) + 1)
+    k = months[None, :]
+    r = monthly_rate[:, None]
+    p = principal[:, None]
+    e = instalment[:, None]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth_before = np.power(1 + r, k - 1)
+        growth_after = growth_before * (1 + r)
+        opening = np.where(r == 0, p - e * (k - 1), p * growth_before - e * (growth_before - 1) / r)
+        closing = np.where(r == 0, p - e * k, p * growth_after - e * (growth_after - 1) / r)
+
+    active = k <= tenure[:, None]
+    interest = np.where(active, opening * r, 0.0)
+    principal_paid = np.where(active, e - interest, 0.0)
+    balance = np.where(active, np.maximum(closing, 0.0), 0.0)
+    balance[np.isclose(balance, 0.0, atol=1e-6)] = 0.0
+
+    return {
+        "month": months,
+        "emi": np.where(active, e, 0.0),
+        "interest": interest,
+        "principal": principal_paid,
+        "balance": balance,
+    }
+
+
+def amortization_schedule(principal: Number, annual_rate: Number, tenure_months: int) -> Dict:
+    """Schedule for a single loan: 1-d arrays "month", "emi", "interest", "principal", "balance"."""
+    schedules = amortization_schedules([float(principal)], [float(annual_rate)], [int(tenure_months)])
+    return {
+        "month": schedules["month"],
+        **{name: schedules[name][0] for name in ("emi", "interest", "principal", "balance")},
+    }
+
+
+def price_grid(amounts, annual_rates, tenures, decimals: Optional[int] = 2) -> Dict:
+    """
+    Price every (amount, rate, tenure) combination.
+
+    Returns:
+        {"amount", "rate", "tenure": the 1-d axes, "emi", "total_interest",
+        "total_payment": arrays of shape (len(amounts), len(rates), len(tenures))}
+    """
+    import numpy as np
+    amount_axis = np.asarray(amounts, dtype=float)
+    rate_axis = np.asarray(annual_rates, dtype=float)
+    tenure_axis = np.asarray(tenures, dtype=int)
+    a, r, t = np.meshgrid(amount_axis, rate_axis, tenure_axis, indexing="ij")
+
+    instalment = np.asarray(emi(a, r, t, decimals))
+    total_payment = instalment * t
+    return {
+        "amount": amount_axis,
+        "rate": rate_axis,
+        "tenure": tenure_axis,
+        "emi": instalment,
+        "total_interest": total_payment - a,
+        "total_payment": total_payment,
+    }
+
+
+def emi_exact(principal: Number, annual_rate: Number, tenure_months: int, places: Decimal = PAISE, rounding=ROUND_HALF_UP) -> Decimal:
+    """
+    EMI in Decimal arithmetic, rounded to `places` (paise by default).
+
+    Floats go through str() first, so 11.5 is exactly 11.5, not its binary
+    approximation.
+    """
+    with localcontext() as ctx:
+        ctx.prec = 34
+        p = Decimal(str(principal))
+        r = Decimal(str(annual_rate)) / Decimal(1200)
+        n = int(tenure_months)
+        if r == 0:
+            return (p / n).quantize(places, rounding=rounding)
+        growth = (1 + r) ** n
+        return (p * r * growth / (growth - 1)).quantize(places, rounding=rounding)
+
+
+def amortization_schedule_exact(
+    principal: Number, annual_rate: Number, tenure_months: int, places: Decimal = PAISE, rounding=ROUND_HALF_UP
+) -> List[Dict[str, Decimal]]:
+    """
+    Booked schedule: EMI and each month's interest rounded to `places`, the
+    last instalment adjusted so the loan closes at exactly zero.
+
+    Each row depends on the previous row's rounded balance, so this walks
+    month by month; use amortization_schedule(s) for display and analytics.
+    """
+    with localcontext() as ctx:
+        ctx.prec = 34
+        balance = Decimal(str(principal))
+        r = Decimal(str(annual_rate)) / Decimal(1200)
+        instalment = emi_exact(principal, annual_rate, tenure_months, places, rounding)
+        rows = []
+        for month in range(1, int(tenure_months) + 1):
+            interest = (balance * r).quantize(places, rounding=rounding)
+            payment = balance + interest if month == tenure_months else instalment
+            principal_paid = payment - interest
+            balance -= principal_paid
+            rows.append({
+                "month": month,
+                "emi": payment,
+                "interest": interest,
+                "principal": principal_paid,
+                "balance": balance,
+            })
+        return rows
+
+
+
+def emi_booked(principal, annual_rate, tenure_months):
+    """
+    Array EMI in rupees that equals float(emi_exact(...)) element by element.
+
+    The float formula is off from the exact value by far less than a paisa,
+    so rounding only disagrees when the exact EMI sits on a half-paisa
+    boundary; those few elements are recomputed with emi_exact. Lets
+    vectorised paths (batch underwriting) compare the same EMI as the chat.
+    """
+    import numpy as np
+    raw = np.asarray(emi(principal, annual_rate, tenure_months), dtype=float)
+    result = np.array(_round_half_up(raw, 2), dtype=float, ndmin=1)
+    paise = np.abs(np.atleast_1d(raw)) * 100
+    ambiguous = np.flatnonzero(np.isfinite(paise) & (np.abs(paise - np.floor(paise) - 0.5) < 1e-5))
+    if len(ambiguous):
+        shape = result.shape
+        p, r, n = (np.broadcast_to(np.asarray(x, dtype=float), shape).ravel() for x in (principal, annual_rate, tenure_months))
+        flat = result.ravel()
+        for i in ambiguous:
+            flat[i] = float(emi_exact(p[i].item(), r[i].item(), int(n[i])))
+        result = flat.reshape(shape)
+    return result.item() if raw.ndim == 0 else result
+
+
+__all__ = [
+    "emi",
+    "total_interest",
+    "amortization_schedule",
+    "amortization_schedules",
+    "price_grid",
+    "emi_exact",
+    "emi_booked",
+    "amortization_schedule_exact",
+]
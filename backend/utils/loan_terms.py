@@ -0,0 +1,259 @@
+"""
+Loan amount and tenure extraction from chat messages.
+
+One compiled pattern splits the message into numbers (Indian or Western
+digit grouping), words and symbols in a single pass; a dict lookup then
+classifies each word as a number word (English or Hindi), an amount unit
+(k, thousand/hazaar, L/lakh/lac, cr/crore), a tenure unit (months/mahine,
+years/saal) or a joiner, and drops the rest. A unit only applies to the
+number right before it, so "like", "work" or "place" elsewhere in the
+message can't change the multiplier.
+
+Terms that follow each other ("2 years 6 months", "1 lakh 50 thousand")
+add up, "2 and a half years", "a year and a half" and "saadhe teen lakh"
+add a half, and for a range ("3-4 lakh") the lower bound is taken.
+Numbers without a unit keep the old conventions: 1000 and above are
+rupees, smaller ones are lakhs, unless an amount is already known and the
+tenure isn't, in which case a small bare number is a tenure in months.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+AMOUNT_UNITS = {
+    "k": 1_000, "thousand": 1_000, "thousands": 1_000, "hazar": 1_000, "hazaar": 1_000, "hajar": 1_000,
+    "l": 100_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000, "lacks": 100_000,
+    "lk": 100_000, "lkh": 100_000, "lakh's": 100_000,
+    "cr": 10_000_000, "crore": 10_000_000, "crores": 10_000_000, "karod": 10_000_000, "karor": 10_000_000,
+}
+TENURE_UNITS = {
+    "month": 1, "months": 1, "mon": 1, "mons": 1, "mo": 1, "mos": 1, "mth": 1, "mths": 1,
+    "mahina": 1, "mahine": 1, "mahino": 1, "mahinon": 1, "mahiney": 1,
+    "year": 12, "years": 12, "yr": 12, "yrs": 12, "y": 12, "saal": 12, "sal": 12, "varsh": 12, "baras": 12,
+}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "eighteen": 18,
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+    "half": 0.5,
+    "ek": 1, "do": 2, "teen": 3, "char": 4, "chaar": 4, "paanch": 5, "panch": 5, "chhe": 6, "chhah": 6,
+    "saat": 7, "aath": 8, "nau": 9, "das": 10, "bees": 20, "pachas": 50, "pachaas": 50,
+    "dedh": 1.5, "dhai": 2.5, "dhaai": 2.5, "adhai": 2.5, "aadha": 0.5,
+}
+TENS = {"twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"}
+ONES = {"one", "two", "three", "four", "five", "six", "seven", "eight", "nine"}
+MAX_TENURE_MONTHS = 360
+
+
+# Scanner: every number, word and relevant symbol is one token, along with
+# the text skipped before it; words are then classified with one dict
+# lookup rather than by the pattern.
+_TOKEN = re.compile(
+    r"([^a-z0-9₹%+-]*)"
+    r"(?:(\+\d{1,3}[\s-]?(?:\d[\s-]?){9}\d)"
+    r"|(\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)"
+    r"|([a-z]+(?:'s)?)"
+    r"|([₹%+-]))"
+)
+_WORD_KINDS = {
+    **{word: "amount_unit" for word in AMOUNT_UNITS},
+    **{word: "tenure_unit" for word in TENURE_UNITS},
+    **{word: "word" for word in NUMBER_WORDS},
+    **{word: "currency" for word in ("rs", "inr", "rupees", "rupee", "rupaye", "rupaiye", "rupay")},
+    **{word: "range" for word in ("to", "or", "se")},
+    **{word: "half_prefix" for word in ("saadhe", "sadhe", "sade")},
+    **{word: "and" for word in ("and", "aur")},
+    # rates ("10.5 percent", "11 p.a."), times ("5 pm") and ages ("28 years old") aren't loan terms
+    **{word: "not_a_term" for word in ("percent", "pc", "p", "am", "pm")},
+    "old": "old",
+}
+_SYMBOL_KINDS = {"₹": "currency", "%": "not_a_term", "-": "range", "+": "and"}
+_JOIN_GAP = " ,&\t\n"  # what may separate terms that add up, besides "and"/"aur"
+
+
+class _Term:
+    __slots__ = ("kind", "value", "unit", "first", "last")
+
+    def __init__(self, kind: str, value: float, unit: float, first: int, last: int):
+        self.kind = kind  # "amount", "tenure", "bare" (number without unit) or "currency"
+        self.value = value
+        self.unit = unit
+        self.first = first  # token indexes
+        self.last = last
+
+
+def _tokens(text: str) -> List[Tuple[str, str, bool, bool]]:
+    """
+    (kind, text, tight, joinable) for each token that can be part of a term.
+
+    tight: only whitespace since the previous token; joinable: only
+    whitespace or separators (see _JOIN_GAP). Other words are dropped, but
+    the token after one is neither.
+    """
+    tokens = []
+    skipped = False
+    for gap, phone, number, word, symbol in _TOKEN.findall(text):
+        if word:
+            kind = _WORD_KINDS.get(word)
+            if kind is None:
+                skipped = True
+                continue
+            token = word
+        elif number:
+            kind, token = ("phone" if len(number) >= 10 and number.isdigit() else "number"), number
+        elif symbol:
+            kind, token = _SYMBOL_KINDS[symbol], symbol
+        else:
+            kind, token = "phone", phone
+        if skipped:
+            tokens.append((kind, token, False, False))
+            skipped = False
+        else:
+            tokens.append((kind, token, not gap or gap.isspace(), not gap.strip(_JOIN_GAP)))
+    return tokens
+
+
+def _terms(tokens: List[Tuple[str, str, bool, bool]]) -> List[_Term]:
+    """Group numbers with their units, in one pass over the tokens."""
+    count = len(tokens)
+
+    def next_is(index: int, *kinds: str) -> bool:
+        """tokens[index] is one of `kinds` and directly follows the previous token."""
+        return index < count and tokens[index][0] in kinds and tokens[index][2]
+
+    def number_at(index: int) -> Tuple[float, int]:
+        """(value, next index) of the number starting at tokens[index]; "twenty four" is one number."""
+        kind, token = tokens[index][:2]
+        if kind == "number":
+            return float(token.replace(",", "")), index + 1
+        value = NUMBER_WORDS[token]
+        if token in TENS and next_is(index + 1, "word") and tokens[index + 1][1] in ONES:
+            return value + NUMBER_WORDS[tokens[index + 1][1]], index + 2
+        return value, index + 1
+
+    def half_at(index: int) -> int:
+        """Index after "and a half" / "and half" / "aur aadha" at tokens[index], or 0."""
+        if not next_is(index, "and"):
+            return 0
+        if next_is(index + 1, "word") and tokens[index + 1][1] in ("half", "aadha"):
+            return index + 2
+        if next_is(index + 1, "word") and tokens[index + 1][1] == "a" \
+                and next_is(index + 2, "word") and tokens[index + 2][1] == "half":
+            return index + 3
+        return 0
+
+    terms: List[_Term] = []
+    i = 0
+    while i < count:
+        kind = tokens[i][0]
+        first = i
+        if kind == "currency":
+            terms.append(_Term("currency", 0, 0, i, i))
+            i += 1
+            continue
+
+        plus_half = 0.0
+        if kind == "half_prefix" and next_is(i + 1, "number", "word"):
+            plus_half, i = 0.5, i + 1
+        elif kind not in ("number", "word"):
+            i += 1
+            continue
+
+        is_word = tokens[i][0] == "word"
+        value, i = number_at(i)
+        value += plus_half
+        after_half = half_at(i)
+        if after_half:
+            value, i = value + 0.5, after_half
+
+        # A range keeps its lower bound; the unit after the upper bound applies to both
+        if next_is(i, "range") and next_is(i + 1, "number", "word"):
+            is_word = is_word and tokens[i + 1][0] == "word"
+            upper, i = number_at(i + 1)
+            value = min(value, upper)
+
+        if next_is(i, "not_a_term"):
+            i += 1
+        elif next_is(i, "amount_unit", "tenure_unit"):
+            unit_kind, unit_token = tokens[i][:2]
+            i += 1
+            if next_is(i, "old"):
+                continue
+            after_half = half_at(i)  # "a year and a half"
+            if after_half:
+                value, i = value + 0.5, after_half
+            if unit_kind == "amount_unit":
+                unit = AMOUNT_UNITS[unit_token]
+                terms.append(_Term("amount", value * unit, unit, first, i - 1))
+            else:
+                unit = TENURE_UNITS[unit_token]
+                terms.append(_Term("tenure", value * unit, unit, first, i - 1))
+        elif not is_word:
+            terms.append(_Term("bare", value, 0, first, i - 1))
+    return terms
+
+
+def parse_loan_terms(message: str, expect_tenure: bool = False) -> Dict[str, Optional[float]]:
+    """
+    Extract a loan amount (rupees) and tenure (months) from a message.
+
+    Args:
+        message: the user's chat message
+        expect_tenure: the amount is already known and the tenure isn't, so a
+            small bare number ("24") is read as months
+
+    Returns:
+        {"amount": float or None, "tenure": int or None}
+    """
+    tokens = _tokens(message.lower())
+
+    # Adjacent terms of one kind with falling units add up: "2 years 6 months", "1 lakh 50 thousand"
+    merged: List[_Term] = []
+    for term in _terms(tokens):
+        previous = merged[-1] if merged else None
+        if (
+            previous is not None
+            and term.kind == previous.kind
+            and term.kind in ("amount", "tenure")
+            and term.unit < previous.unit
+            and all(token[0] == "and" and token[3] for token in tokens[previous.last + 1:term.first])
+            and tokens[term.first][3]
+        ):
+            previous.value += term.value
+            previous.unit = term.unit
+            previous.last = term.last
+        else:
+            merged.append(term)
+
+    amount = next((term for term in merged if term.kind == "amount"), None)
+    tenure = next((term.value for term in merged if term.kind == "tenure"), None)
+    amount_end = amount.last if amount is not None else None
+    amount = amount.value if amount is not None else None
+
+    after_currency = False
+    for term in merged:
+        if term.kind == "bare":
+            value = term.value
+            if value >= 1000 or after_currency:
+                if amount is None:
+                    amount = value if value >= 1000 else value * 100_000
+                    amount_end = term.last
+            elif (
+                tenure is None
+                and (expect_tenure or (amount_end is not None and term.first > amount_end))
+                and value.is_integer()
+                and 1 <= value <= MAX_TENURE_MONTHS
+            ):
+                tenure = value
+            elif amount is None and value > 0:
+                amount = value * 100_000
+                amount_end = term.last
+        after_currency = term.kind == "currency"
+
+    if amount is not None:
+        amount = round(amount, 2)
+    if tenure is not None:
+        tenure = int(round(tenure)) if 0 < tenure <= MAX_TENURE_MONTHS else None
+    return {"amount": amount, "tenure": tenure}
+
+
+__all__ = ["parse_loan_terms", "AMOUNT_UNITS", "TENURE_UNITS", "NUMBER_WORDS"]
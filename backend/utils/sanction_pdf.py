@@ -0,0 +1,155 @@
+"""
+Sanction letter PDF rendering.
+
+Kept free of LangGraph/agent imports so it can run cheaply inside worker
+processes. Everything reusable across letters (ReportLab imports, the
+sample stylesheet, paragraph and table styles) is built once per process
+by _compiled(); each letter only builds its own flowables.
+"""
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict
+
+TERMS = [
+    "This sanction is valid for 30 days from the date of issue.",
+    "The loan is subject to verification of all submitted documents.",
+    "EMI payments must be made on or before the due date each month.",
+    "Prepayment charges: 2% of outstanding principal (if prepaid before 12 months).",
+    "Late payment charges: 2% per month on overdue amount.",
+    "The bank reserves the right to recall the loan in case of default.",
+]
+
+
+@lru_cache(maxsize=1)
+def _compiled() -> Dict:
+    """Import ReportLab and build the shared styles (once per process)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib import colors
+
+    styles = getSampleStyleSheet()
+    base_table = [
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ]
+
+    return {
+        "A4": A4,
+        "inch": inch,
+        "SimpleDocTemplate": SimpleDocTemplate,
+        "Paragraph": Paragraph,
+        "Spacer": Spacer,
+        "Table": Table,
+        "normal": styles['Normal'],
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#1a237e'),
+            spaceAfter=30,
+            alignment=1  # Center
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor=colors.HexColor('#1a237e'),
+            spaceAfter=12
+        ),
+        "congrats": ParagraphStyle(
+            'Congrats',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=colors.HexColor('#2e7d32'),
+            spaceAfter=12
+        ),
+        "customer_table": TableStyle(base_table),
+        "loan_table": TableStyle(base_table + [
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#f5f5f5')),
+        ]),
+    }
+
+
+def warm_up() -> None:
+    """Process-pool initializer: pay for imports and styles before the first letter."""
+    _compiled()
+
+
+def render_sanction_letter(fields: Dict) -> bytes:
+    """
+    Render a sanction letter to PDF bytes.
+
+    Args:
+        fields: plain letter data (see agents.sanction_generator.letter_fields):
+            date, reference, customer_name, address, phone, customer_id,
+            amount, rate, tenure, emi, total_interest, total_repayment
+
+    Returns:
+        The PDF document
+    """
+    c = _compiled()
+    Paragraph, Spacer, Table, inch = c["Paragraph"], c["Spacer"], c["Table"], c["inch"]
+
+    buffer = BytesIO()
+    # invariant=1 fixes the creation date and document ID, so identical
+    # letters produce identical bytes (the letter store dedupes on content).
+    doc = c["SimpleDocTemplate"](buffer, pagesize=c["A4"], invariant=1)
+    story = []
+
+    story.append(Paragraph("LOAN SANCTION LETTER", c["title"]))
+    story.append(Spacer(1, 0.2 * inch))
+
+    story.append(Paragraph(f"<b>Date:</b> {fields['date']}", c["normal"]))
+    story.append(Paragraph(f"<b>Reference No:</b> {fields['reference']}", c["normal"]))
+    story.append(Spacer(1, 0.3 * inch))
+
+    story.append(Paragraph("BORROWER DETAILS", c["heading"]))
+    customer_data = [
+        ['Name:', fields['customer_name']],
+        ['Address:', fields['address']],
+        ['Phone:', fields['phone']],
+        ['Customer ID:', str(fields['customer_id'])]
+    ]
+    customer_table = Table(customer_data, colWidths=[2*inch, 4*inch])
+    customer_table.setStyle(c["customer_table"])
+    story.append(customer_table)
+    story.append(Spacer(1, 0.3 * inch))
+
+    story.append(Paragraph("LOAN DETAILS", c["heading"]))
+
+    loan_data = [
+        ['Loan Amount:', f"₹{fields['amount']:,.2f}"],
+        ['Interest Rate:', f"{fields['rate']}% per annum"],
+        ['Loan Tenure:', f"{fields['tenure']} months"],
+        ['Monthly EMI:', f"₹{fields['emi']:,.2f}"],
+        ['Total Interest:', f"₹{fields['total_interest']:,.2f}"],
+        ['Total Repayment:', f"₹{fields['total_repayment']:,.2f}"],
+    ]
+    loan_table = Table(loan_data, colWidths=[2*inch, 4*inch])
+    loan_table.setStyle(c["loan_table"])
+    story.append(loan_table)
+    story.append(Spacer(1, 0.3 * inch))
+
+    story.append(Paragraph("TERMS & CONDITIONS", c["heading"]))
+    for i, term in enumerate(TERMS, 1):
+        story.append(Paragraph(f"{i}. {term}", c["normal"]))
+        story.append(Spacer(1, 0.1 * inch))
+
+    story.append(Spacer(1, 0.3 * inch))
+    story.append(Paragraph(
+        "Congratulations on your loan approval! We look forward to serving you.",
+        c["congrats"]
+    ))
+    story.append(Spacer(1, 0.3 * inch))
+
+    story.append(Paragraph("<b>Authorized Signatory</b>", c["normal"]))
+    story.append(Paragraph("Loan Department", c["normal"]))
+    story.append(Paragraph("CredSaathi Bank", c["normal"]))
+
+    doc.build(story)
+    return buffer.getvalue()
+
@@ -0,0 +1,236 @@
+"""
+Salary slip text extraction.
+
+Reads a slip page by page, preferring the PDF text layer and falling back
+to offline OCR (pytesseract + a local tesseract binary, if installed) for
+scanned pages and JPG/PNG uploads. Gross salary, net salary and employer
+are pulled out with labelled patterns, each with a confidence score.
+
+Only plain data crosses the module boundary, so extract_salary_slip() can
+run in a process pool; caching and pooling live in services.slip_extractor.
+"""
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+MIN_TEXT_CHARS = 40  # a page with less text than this is treated as scanned
+OCR_RESOLUTION = 200
+OCR_PENALTY = 0.85  # OCR'd digits are less trustworthy than a text layer
+
+# An amount token: optional currency marker, then Indian/Western grouped digits.
+# Not glued to a word ("FY2024") and not part of a dd/mm/yyyy or dd-mm-yyyy date.
+_AMOUNT = re.compile(
+    r"(?<![\w/])(?<!\d-)(?:(?P<currency>₹|\brs\.?|\binr)\s*:?\s*)?"
+    r"(?P<amount>\d{1,3}(?:,\d{2,3})+(?:\.\d{1,2})?|\d+(?:\.\d{1,2})?)(?![\d/])(?!-\d)",
+    re.I,
+)
+_MONTH_BEFORE = re.compile(r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?[\s,'-]*$", re.I)
+
+# (label pattern, confidence) in order of preference. Patterns run per line,
+# case-insensitive; the amount is read from the rest of the line.
+GROSS_PATTERNS = [
+    (re.compile(r"\bgross\s+(?:salary|pay|earnings|income)\b", re.I), 0.95),
+    (re.compile(r"\btotal\s+(?:earnings|gross)\b", re.I), 0.85),
+    (re.compile(r"\bgross\b", re.I), 0.7),
+]
+NET_PATTERNS = [
+    (re.compile(r"\bnet\s+(?:salary|pay|amount\s+payable|payable|earnings)\b", re.I), 0.95),
+    (re.compile(r"\b(?:take[\s-]*home(?:\s+pay)?|amount\s+credited)\b", re.I), 0.85),
+    (re.compile(r"\bnet\b", re.I), 0.7),
+]
+DEDUCTION_PATTERN = re.compile(r"\btotal\s+deductions?\b", re.I)
+EMPLOYER_PATTERNS = [
+    (re.compile(r"\b(?:employer|company|organi[sz]ation)(?:\s+name)?\s*[:\-]\s*(?P<name>[^\n:]{2,80})", re.I), 0.9),
+    (re.compile(
+        r"^(?P<name>[A-Z][\w&.,' -]{1,70}?\b(?:Pvt\.?\s+Ltd\.?|Private\s+Limited|Limited|Ltd\.?|LLP|Inc\.?|Corporation|Corp\.?))\s*$",
+        re.I | re.M,
+    ), 0.6),
+]
+
+
+def _parse_amount(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+@lru_cache(maxsize=1)
+def ocr_available() -> bool:
+    """True if pytesseract and a tesseract binary are installed (and SCANPDF_OCR isn't "off")."""
+    if os.getenv("SCANPDF_OCR", "auto") == "off":
+        return False
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+    except Exception:
+        return False
+    return True
+
+
+def _ocr(image) -> str:
+    import pytesseract
+    return pytesseract.image_to_string(image)
+
+
+def iter_pages(path: Union[str, Path], ocr: bool = True) -> Iterator[Tuple[int, str, str]]:
+    """
+    Yield (page number, text, source) one page at a time.
+
+    source is "text" (PDF text layer), "ocr", or "none" when a page has no
+    text layer and OCR is unavailable. Each page's parsed objects are
+    released before the next page is read, so memory stays flat regardless
+    of page count.
+    """
+    path = Path(path)
+    use_ocr = ocr and ocr_available()
+
+    if path.suffix.lower() in IMAGE_SUFFIXES:
+        if not use_ocr:
+            yield 1, "", "none"
+            return
+        from PIL import Image
+        with Image.open(path) as image:
+            yield 1, _ocr(image), "ocr"
+        return
+
+    import pdfplumber
+
+    with pdfplumber.open(path) as pdf:
+        for number, page in enumerate(pdf.pages, 1):
+            try:
+                text = page.extract_text() or ""
+                source = "text"
+                if len(text.strip()) < MIN_TEXT_CHARS:
+                    if use_ocr:
+                        text, source = _ocr(page.to_image(resolution=OCR_RESOLUTION).original), "ocr"
+                    elif not text.strip():
+                        source = "none"
+                yield number, text, source
+            finally:
+                page.close()
+
+
+def _best_match(patterns, lines: List[str], group: str) -> Optional[Tuple[str, float]]:
+    for pattern, confidence in patterns:
+        for line in lines:
+            match = pattern.search(line)
+            if match:
+                return match.group(group).strip(), confidence
+    return None
+
+
+def _amount_after(line: str, start: int) -> Optional[str]:
+    """
+    The amount a label at `start` refers to: among the amounts after it,
+    skipping dates ("Apr 2024", bare years), one with a currency marker,
+    else one with digit grouping, else the last.
+    """
+    candidates = []
+    for match in _AMOUNT.finditer(line, start):
+        amount, currency = match.group("amount"), match.group("currency")
+        if not currency and "," not in amount:
+            if _MONTH_BEFORE.search(line, 0, match.start()):
+                continue
+            if "." not in amount and len(amount) == 4 and 1900 <= int(amount) <= 2100:
+                continue
+        candidates.append((bool(currency), "," in amount, match.start(), amount))
+    return max(candidates)[3] if candidates else None
+
+
+def _best_amount(patterns, lines: List[str]) -> Optional[Tuple[str, float]]:
+    for pattern, confidence in patterns:
+        for line in lines:
+            match = pattern.search(line)
+            if match:
+                amount = _amount_after(line, match.end())
+                if amount is not None:
+                    return amount, confidence
+    return None
+
+
+def _field(value, confidence: float, page: int, source: str) -> Dict:
+    if source == "ocr":
+        confidence *= OCR_PENALTY
+    return {"value": value, "confidence": round(confidence, 3), "page": page, "source": source}
+
+
+def extract_fields(text: str, page: int = 1, source: str = "text") -> Dict[str, Optional[Dict]]:
+    """Gross salary, net salary, total deductions and employer found in one page of text."""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    found: Dict[str, Optional[Dict]] = {}
+
+    gross = _best_amount(GROSS_PATTERNS, lines)
+    net = _best_amount(NET_PATTERNS, lines)
+    deductions = _best_amount([(DEDUCTION_PATTERN, 0.9)], lines)
+    employer = _best_match(EMPLOYER_PATTERNS, lines, "name")
+
+    found["gross_salary"] = _field(_parse_amount(gross[0]), gross[1], page, source) if gross else None
+    found["net_salary"] = _field(_parse_amount(net[0]), net[1], page, source) if net else None
+    found["total_deductions"] = _field(_parse_amount(deductions[0]), deductions[1], page, source) if deductions else None
+    found["employer"] = _field(employer[0].strip(" .,-"), employer[1], page, source) if employer else None
+    return found
+
+
+def _cross_check(result: Dict, warnings: List[str]) -> None:
+    """Adjust confidences using the relationships between the amounts."""
+    gross, net, deductions = result["gross_salary"], result["net_salary"], result.pop("total_deductions")
+    if not gross or not net:
+        return
+    if net["value"] > gross["value"]:
+        gross["confidence"] = round(gross["confidence"] * 0.5, 3)
+        net["confidence"] = round(net["confidence"] * 0.5, 3)
+        warnings.append("net salary is higher than gross salary")
+    elif deductions and abs(gross["value"] - deductions["value"] - net["value"]) <= 1:
+        # gross - deductions == net: the three figures corroborate each other
+        gross["confidence"] = net["confidence"] = 0.99
+    elif deductions:
+        # At least one of the three was misread
+        gross["confidence"] = round(gross["confidence"] * 0.6, 3)
+        net["confidence"] = round(net["confidence"] * 0.6, 3)
+        warnings.append("gross salary minus deductions does not match net salary")
+
+
+def extract_salary_slip(path: Union[str, Path], ocr: bool = True, max_pages: int = 10) -> Dict:
+    """
+    Extract salary details from a salary slip.
+
+    Pages are read lazily and reading stops as soon as every field has a
+    high-confidence match.
+
+    Args:
+        path: PDF, JPG or PNG file
+        ocr: allow the OCR fallback (used only if tesseract is installed)
+        max_pages: read at most this many pages
+
+    Returns:
+        {"gross_salary", "net_salary", "employer"}: each None or
+        {"value", "confidence", "page", "source"}; plus "pages" read,
+        "ocr_pages", and "warnings"
+    """
+    result: Dict = {"gross_salary": None, "net_salary": None, "total_deductions": None, "employer": None}
+    pages = ocr_pages = 0
+    warnings: List[str] = []
+
+    for number, text, source in iter_pages(path, ocr=ocr):
+        pages += 1
+        if source == "ocr":
+            ocr_pages += 1
+        elif source == "none":
+            warnings.append(f"page {number} has no text layer and OCR is unavailable")
+
+        for name, found in extract_fields(text, number, source).items():
+            if found and (result[name] is None or found["confidence"] > result[name]["confidence"]):
+                result[name] = found
+
+        if all(result[name] and result[name]["confidence"] >= 0.9 for name in ("gross_salary", "net_salary", "employer")):
+            break
+        if pages >= max_pages:
+            break
+
+    _cross_check(result, warnings)
+    result.update(pages=pages, ocr_pages=ocr_pages, warnings=warnings)
+    return result
+
+
+__all__ = ["extract_salary_slip", "extract_fields", "iter_pages", "ocr_available"]